@@ -0,0 +1,79 @@
+"""
+Memory and allocation benchmark for pattern nodes and capture trails.
+
+Run with `poetry run python benchmarks/memory.py`. It reports the memory
+used per generated pattern, the memory allocated while matching with
+captures, and the time taken per match.
+"""
+import random
+import time
+import tracemalloc
+
+from regex4seq import ANY, MANY, Item, IfItem, OneOf
+
+PATTERNS = 20000
+SEED = 4
+
+
+def generate(rnd: random.Random, depth: int):
+    if depth == 0 or rnd.random() < 0.25:
+        k = rnd.randrange(4)
+        if k == 0:
+            return Item(rnd.randrange(100))
+        if k == 1:
+            return OneOf(*rnd.sample(range(100), 3))
+        if k == 2:
+            return IfItem(bool)
+        return ANY
+    k = rnd.randrange(5)
+    if k == 0:
+        return generate(rnd, depth - 1) | generate(rnd, depth - 1)
+    if k == 1:
+        return generate(rnd, depth - 1).repeat()
+    if k == 2:
+        return generate(rnd, depth - 1).var('v%d' % rnd.randrange(5))
+    return generate(rnd, depth - 1) & generate(rnd, depth - 1)
+
+
+def patternMemory() -> float:
+    rnd = random.Random(SEED)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    patterns = [generate(rnd, 5) for _ in range(PATTERNS)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(patterns) == PATTERNS
+    return (after - before) / PATTERNS
+
+
+def captureAllocation(pattern, inputSeq, repeat: int) -> tuple[float, int, int]:
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    matches = sum(1 for _ in pattern.findAllMatches(inputSeq, end=False))
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for _ in pattern.findAllMatches(inputSeq, end=False):
+            pass
+    elapsed = (time.perf_counter() - t0) / repeat
+    return elapsed, peak, matches
+
+
+def main():
+    print(f'{"benchmark":<48} {"result":>16}')
+    print(f'{"bytes per generated pattern":<48} {patternMemory():>16.0f}')
+    cases = [
+        ('captures: (ANY.var(x)).repeat()', ANY.var('x').repeat(), list(range(300)), 20),
+        ('captures: (ANY.var(x) | ANY.var(y)).repeat()', (ANY.var('x') | ANY.var('y')).repeat(), list(range(12)), 3),
+    ]
+    for name, pattern, inputSeq, repeat in cases:
+        elapsed, peak, matches = captureAllocation(pattern, inputSeq, repeat)
+        print(f'{name:<48} {elapsed * 1000:>13.2f} ms')
+        print(f'{"  peak bytes allocated":<48} {peak:>16}')
+        print(f'{"  matches":<48} {matches:>16}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""
+Timing benchmarks for matching, with stored baselines.
+
+Run with `poetry run python benchmarks/suite.py run --output results.json`
+to time every case and save the results as JSON, and with
+`poetry run python benchmarks/suite.py compare baseline.json results.json`
+to compare two sets of results. The comparison lists every case and exits
+with status 1 if any of them is slower than the baseline by more than the
+threshold, which is 25% unless --threshold is given. The option --filter
+runs only the cases whose names contain the given text.
+
+The cases cover how matching scales with the length of the input, both
+anchored and unanchored, patterns whose nested repeats and alternatives
+make backtracking explode, captures with and without a namespace and with
+history, enumerating every match with findAllMatches, and patterns made
+mostly of IfItem predicates. Baselines are only comparable when they were
+recorded on the same machine.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+from typing import Callable, Iterator
+
+from regex4seq import ANY, MANY, Item, IfItem, IfItems, Items, OneOf
+
+# Each case is timed by running it for at least this long, and the best of
+# this many rounds is kept.
+ROUND_SECONDS = 0.1
+ROUNDS = 5
+
+
+def scalingCases() -> Iterator[tuple[str, Callable]]:
+    for n in (1000, 10000, 100000):
+        digits = list(range(n)) + [-1]
+        p = IfItem(lambda x: x >= 0).repeat() & Item(-1)
+        yield f'scaling/anchored-repeat/{n}', lambda p=p, s=digits: p.matches(s, namespace=False)
+        text = 'ab' * (n // 2) + 'xyz'
+        q = Items('x', 'y', 'z')
+        yield f'scaling/unanchored-literal/{n}', lambda q=q, s=text: q.matches(s, start=False, end=False, namespace=False)
+        r = Item('a') & IfItem(lambda x: x == 'y') & Item('z')
+        yield f'scaling/unanchored-predicate/{n}', lambda r=r, s=text: r.matches(s, start=False, end=False, namespace=False)
+
+
+def pathologicalCases() -> Iterator[tuple[str, Callable]]:
+    for n in (10, 14, 18):
+        s = 'a' * n
+        nested = (Item('a').repeat() & Item('a')).repeat() & Item('b')
+        yield f'pathological/nested-repeat/{n}', lambda p=nested, s=s: p.matches(s, namespace=False)
+        overlap = (Item('a') | Item('a') & Item('a')).repeat() & Item('b')
+        yield f'pathological/overlapping-otherwise/{n}', lambda p=overlap, s=s: p.matches(s, namespace=False)
+        optional = Items(*'a' * n)
+        for _ in range(n):
+            optional = Item('a').optional() & optional
+        yield f'pathological/optional-chain/{n}', lambda p=optional, s=s: p.matches(s, namespace=False)
+        # The same blow-up with a predicate, which the memo avoids.
+        memo = (Item('a') | IfItem(lambda x: x == 'a')).repeat() & Item('b')
+        yield f'pathological/memo/{n}', lambda p=memo, s=s: p.matches(s, namespace=False, memo=True)
+
+
+def captureCases() -> Iterator[tuple[str, Callable]]:
+    s = list(range(2000))
+    p = ANY.var('x').repeat() & ANY.var('last')
+    yield 'captures/namespace-true', lambda: p.matches(s)
+    yield 'captures/namespace-false', lambda: p.matches(s, namespace=False)
+    yield 'captures/history', lambda: p.matches(s, history={'x': 'xs'})
+    words = 'the cat sat on the mat with the hat'.split() * 50
+    q = (Item('the') & ANY.var('noun')).repeat().var('phrase') & MANY
+    yield 'captures/unanchored-groups', lambda: q.matches(words, start=False)
+    yield 'captures/spans', lambda: p.matches(s, spans=True)
+
+
+def findAllCases() -> Iterator[tuple[str, Callable]]:
+    s = list(range(300))
+    split = MANY.var('left') & MANY.var('right')
+    yield 'findall/split-300', lambda: sum(1 for _ in split.findAllMatches(s))
+    both = (ANY.var('x') | ANY.var('y')).repeat()
+    t = list(range(12))
+    yield 'findall/alternating-captures-12', lambda: sum(1 for _ in both.findAllMatches(t))
+    yield 'findall/alternating-nonamespace-12', lambda: sum(1 for _ in both.findAllMatches(t, namespace=False))
+    u = 'abcabd' * 100
+    anywhere = Items('a', 'b').var('x') & OneOf('c', 'd')
+    yield 'findall/unanchored-600', lambda: sum(1 for _ in anywhere.findAllMatches(u, start=False, end=False))
+
+
+def predicateCases() -> Iterator[tuple[str, Callable]]:
+    s = [i % 97 for i in range(20000)]
+    chain = IfItems(lambda x: x % 2 == 0, lambda x: x % 3 == 0, lambda x: x % 5 == 0, lambda x: x > 90)
+    yield 'predicates/chain-unanchored', lambda: chain.matches(s, start=False, end=False, namespace=False)
+    branches = (IfItem(lambda x: x < 10) | IfItem(lambda x: x < 50) | IfItem(lambda x: x < 97)).repeat()
+    yield 'predicates/alternatives-repeat', lambda: branches.matches(s, namespace=False)
+    pairs = IfItem(lambda x: x >= 0).repeat().var('run') & IfItem(lambda x: x < 0)
+    yield 'predicates/repeat-then-fail', lambda: pairs.matches(s, start=False, namespace=False)
+    # Cached predicates are looked up by position, so this is matched by the
+    # backtracking VM rather than from the end.
+    yield 'predicates/repeat-then-fail-cached', lambda: pairs.matches(s, start=False, namespace=False, cachePredicates=True)
+
+
+CASES = (scalingCases, pathologicalCases, captureCases, findAllCases, predicateCases)
+
+
+def timeCase(f: Callable) -> float:
+    """Returns the best time per call, in seconds, over several rounds."""
+    f()
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            f()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= ROUND_SECONDS:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(ROUND_SECONDS / elapsed) + 1))
+    best = elapsed / number
+    for _ in range(ROUNDS - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            f()
+        best = min(best, (time.perf_counter() - t0) / number)
+    return best
+
+
+def run(args) -> int:
+    results = {}
+    print(f'{"case":<48} {"time":>12}')
+    for cases in CASES:
+        for name, f in cases():
+            if args.filter and args.filter not in name:
+                continue
+            seconds = timeCase(f)
+            results[name] = seconds
+            print(f'{name:<48} {seconds * 1000:>9.3f} ms', flush=True)
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+    return 0
+
+
+def compare(args) -> int:
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.current) as f:
+        current = json.load(f)['results']
+    slower = []
+    print(f'{"case":<48} {"baseline":>12} {"current":>12} {"ratio":>7}')
+    for name in sorted(baseline.keys() | current.keys()):
+        if name not in current or name not in baseline:
+            where = 'baseline' if name in baseline else 'current results'
+            print(f'{name:<48} only in the {where}')
+            continue
+        ratio = current[name] / baseline[name] if baseline[name] > 0 else 1.0
+        flag = ''
+        if ratio > 1 + args.threshold:
+            flag = '  SLOWER'
+            slower.append(name)
+        print(f'{name:<48} {baseline[name] * 1000:>9.3f} ms {current[name] * 1000:>9.3f} ms {ratio:>7.2f}{flag}')
+    if slower:
+        print(f'{len(slower)} case(s) are more than {args.threshold:.0%} slower than the baseline')
+        return 1
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Timing benchmarks for regex4seq')
+    commands = parser.add_subparsers(dest='command', required=True)
+    runner = commands.add_parser('run', help='time every case')
+    runner.add_argument('--output', help='the JSON file to save the results in')
+    runner.add_argument('--filter', help='only run the cases whose names contain this')
+    runner.set_defaults(action=run)
+    comparer = commands.add_parser('compare', help='compare results with a baseline')
+    comparer.add_argument('baseline', help='the JSON file of the baseline results')
+    comparer.add_argument('current', help='the JSON file of the current results')
+    comparer.add_argument('--threshold', type=float, default=0.25, help='the slowdown that is flagged, as a fraction')
+    comparer.set_defaults(action=compare)
+    args = parser.parse_args()
+    return args.action(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,15 @@
 from regex4seq.regex4seq import Item, IfItem, IfNext, MatchGroup, Empty, AnyItem, ManyItems, RegEx4Seq, NONE, ANY, MANY, Items, IfItems, OneOf, FAIL
+from regex4seq.program import CompileError
+from regex4seq.pikevm import PikeVM
+from regex4seq.lazydfa import LazyDFA
+from regex4seq.stream import StreamMatcher
+from regex4seq.patternset import PatternSet
+from regex4seq.predcache import PredicateCache
+from regex4seq.span import Span, SequenceView
+from regex4seq.predicates import registerPredicate, NamedPredicate
+from regex4seq.cache import setCacheSize, clearCaches, cacheInfo
+from regex4seq.profiling import ProfileStats, NodeStats
+from regex4seq.budget import MatchBudgetExceeded
+from regex4seq.records import RecordArray
 
-__all__ = ['Item', 'IfItem', 'IfNext', 'MatchGroup', 'Empty', 'NONE', 'AnyItem', 'ANY', 'ManyItems', 'MANY', 'RegEx4Seq', 'Items', 'IfItems', 'OneOf', 'FAIL']
+__all__ = ['Item', 'IfItem', 'IfNext', 'MatchGroup', 'Empty', 'NONE', 'AnyItem', 'ANY', 'ManyItems', 'MANY', 'RegEx4Seq', 'Items', 'IfItems', 'OneOf', 'FAIL', 'CompileError', 'PikeVM', 'LazyDFA', 'StreamMatcher', 'registerPredicate', 'NamedPredicate', 'PatternSet', 'PredicateCache', 'Span', 'SequenceView', 'setCacheSize', 'clearCaches', 'cacheInfo', 'ProfileStats', 'NodeStats', 'MatchBudgetExceeded', 'RecordArray']
@@ -0,0 +1,124 @@
+from typing import Iterable, Iterator, Sequence
+
+
+class Analysis:
+    """
+    What can be worked out about the matches of a pattern without looking at
+    the input: the least and the greatest number of items that a match can
+    consume, where the greatest is None if there is no limit, whether it can
+    match the empty sequence, and the set of items that a non-empty match can
+    start with, which is None if it could start with any item.
+    :meta private:
+    """
+    __slots__ = ('minLength', 'maxLength', 'nullable', 'first')
+
+    def __init__(self, minLength: int, maxLength: int | None, nullable: bool, first: frozenset | None):
+        self.minLength = minLength
+        self.maxLength = maxLength
+        self.nullable = nullable
+        self.first = first
+
+    def isImpossible(self) -> bool:
+        """Returns True if the pattern cannot match anything at all."""
+        return not self.nullable and self.first is not None and not self.first
+
+    def then(self, other: 'Analysis') -> 'Analysis':
+        """Returns the analysis of this pattern followed by the other."""
+        if self.isImpossible() or other.isImpossible():
+            return IMPOSSIBLE
+        first = self.first
+        if self.nullable:
+            first = None if first is None or other.first is None else first | other.first
+        maxLength = None if self.maxLength is None or other.maxLength is None else self.maxLength + other.maxLength
+        return Analysis(self.minLength + other.minLength, maxLength, self.nullable and other.nullable, first)
+
+    def otherwise(self, other: 'Analysis') -> 'Analysis':
+        """Returns the analysis of this pattern or the other."""
+        if self.isImpossible():
+            return other
+        if other.isImpossible():
+            return self
+        first = None if self.first is None or other.first is None else self.first | other.first
+        maxLength = None if self.maxLength is None or other.maxLength is None else max(self.maxLength, other.maxLength)
+        return Analysis(min(self.minLength, other.minLength), maxLength, self.nullable or other.nullable, first)
+
+    def optional(self) -> 'Analysis':
+        """Returns the analysis of zero or one occurrences of this pattern."""
+        return Analysis(0, self.maxLength, True, self.first)
+
+    def repeat(self) -> 'Analysis':
+        """Returns the analysis of zero or more occurrences of this pattern."""
+        return Analysis(0, 0 if self.maxLength == 0 else None, True, self.first)
+
+    def canStartAt(self, inputSeq: Sequence, idx: int, end) -> bool:
+        """
+        Returns False if the pattern certainly cannot match the inputSeq from
+        idx, or to the end of it if end is truthy.
+        """
+        remaining = len(inputSeq) - idx
+        if remaining < self.minLength:
+            return False
+        if end and self.maxLength is not None and remaining > self.maxLength:
+            return False
+        if self.nullable and (not end or remaining == 0):
+            return True
+        if remaining == 0:
+            return False
+        if self.first is None:
+            return True
+        try:
+            return inputSeq[idx] in self.first
+        except TypeError:
+            # An unhashable item cannot be looked up, so it might match.
+            return True
+
+    def startPositions(self, inputSeq: Sequence, end, seeds: Iterable[int] | None) -> Iterator[int] | None:
+        """
+        Returns a generator of the positions, in increasing order, that are
+        generated by seeds, or of all the positions if seeds is None, except
+        for those from which the pattern certainly cannot match. Returns
+        seeds unchanged if none of them can be ruled out like that.
+        """
+        n = len(inputSeq)
+        lo = 0 if not end or self.maxLength is None else max(0, n - self.maxLength)
+        hi = n - self.minLength
+        if lo == 0 and hi == n and (self.first is None or self.nullable and not end):
+            return iter(seeds) if seeds is not None else None
+        return self._filter(inputSeq, end, range(lo, hi + 1) if seeds is None else seeds, lo, hi)
+
+    def _filter(self, inputSeq: Sequence, end, seeds: Iterable[int], lo: int, hi: int) -> Iterator[int]:
+        """:meta private:"""
+        first = self.first
+        n = len(inputSeq)
+        for idx in seeds:
+            if idx < lo:
+                continue
+            if idx > hi:
+                return
+            if first is not None and idx < n and not (self.nullable and not end):
+                # The common case is decided by a single lookup.
+                try:
+                    if inputSeq[idx] not in first:
+                        continue
+                except TypeError:
+                    pass
+                yield idx
+            elif self.canStartAt(inputSeq, idx, end):
+                yield idx
+
+
+EMPTY = Analysis(0, 0, True, frozenset())
+IMPOSSIBLE = Analysis(0, 0, False, frozenset())
+ANY_ITEM = Analysis(1, 1, False, None)
+ANY_ITEMS = Analysis(0, None, True, None)
+
+
+def itemsAnalysis(items: Iterable) -> Analysis:
+    """
+    Returns the analysis of a pattern that consumes a single item that is one
+    of the items.
+    """
+    try:
+        return Analysis(1, 1, False, frozenset(items))
+    except TypeError:
+        return ANY_ITEM
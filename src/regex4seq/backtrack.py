@@ -0,0 +1,196 @@
+import time
+from typing import Any, Iterator, Sequence
+
+from .program import Program
+from .program import ITEM, ONEOF, ANY, IFITEM, IFNEXT, SPLIT, JMP, MARK, PROGRESS, OPEN, CLOSE, MATCH
+from .program import CPUSH, CLOOP, CSTEP, CPOP, IFPREV, IFAT, PENTER, PLEAVE, PEXIT, PRESUME
+from .trail import Trail
+from .budget import Budget
+from .profiling import NodeStats
+
+
+def backtrack(program: Program, inputSeq: Sequence, idx: int, trail: Trail, budget: Budget | None=None) -> Iterator[tuple[int, Trail]]:
+    """
+    Returns a generator of the same results, in the same order, as the
+    `_gobble` method of the pattern that the program was compiled from. The
+    program is run depth first, always trying the first branch of a SPLIT
+    and pushing the second onto an explicit stack of alternatives, so the
+    depth of Python calls does not grow with the length of the input.
+
+    Unlike the other compiled engines, it honours suchthat guards. Each
+    thread keeps the positions of its open match groups, and the positions
+    of the start of the iterations and the counts of the repeats that it is
+    inside, as linked lists, so that the alternatives share them.
+
+    If there is a budget, the first thread, every alternative that is
+    pushed and every thread that fails counts as a step. The steps are counted down locally so that
+    the budget is only consulted once in a while.
+
+    A profiled node is bracketed by PENTER and PEXIT, which push PLEAVE and
+    PRESUME as alternatives, so that they run when the node has no more
+    matches and when its match is rejected. The nodes being profiled are
+    kept on the marks. A node's time is taken off when it becomes active
+    and put back when it stops, so its seconds include its sub-patterns
+    but not the rest of the pattern.
+    :meta private:
+    """
+    code = program.code
+    n = len(inputSeq)
+    stack: list[tuple[int, int, Trail, Any, Any]] = []
+    pc = 0
+    marks: Any = None
+    groups: Any = None
+    # Without a budget the count goes negative and never reaches zero.
+    left = budget.allowance() - 1 if budget is not None else -1
+    try:
+        if not left:
+            left = budget.spend(idx)  # type: ignore[union-attr]
+        while True:
+            op, a, b = code[pc]
+            if op == ITEM:
+                if idx < n and inputSeq[idx] == a:
+                    pc += 1
+                    idx += 1
+                    continue
+            elif op == SPLIT:
+                stack.append((b, idx, trail, marks, groups))
+                pc = a
+                left -= 1
+                if not left:
+                    left = budget.spend(idx)  # type: ignore[union-attr]
+                continue
+            elif op == JMP:
+                pc = a
+                continue
+            elif op == ANY:
+                if idx < n:
+                    pc += 1
+                    idx += 1
+                    continue
+            elif op == IFITEM:
+                if idx < n and a(inputSeq[idx]):
+                    pc += 1
+                    idx += 1
+                    continue
+            elif op == ONEOF:
+                if idx < n and inputSeq[idx] in a:
+                    pc += 1
+                    idx += 1
+                    continue
+            elif op == MARK:
+                marks = (idx, marks)
+                pc += 1
+                continue
+            elif op == PROGRESS:
+                # An iteration that consumed nothing is abandoned, just like the
+                # original pattern does.
+                if idx > marks[0]:
+                    marks = marks[1]
+                    pc += 1
+                    continue
+            elif op == OPEN:
+                groups = (idx, groups)
+                pc += 1
+                continue
+            elif op == CLOSE:
+                lo = groups[0]
+                if b is None or b(inputSeq, lo, idx):
+                    trail = trail.add(a[0], lo, idx, a[1])
+                    groups = groups[1]
+                    pc += 1
+                    continue
+            elif op == CLOOP:
+                count = marks[0]
+                if count < a[0]:
+                    marks = (idx, marks)
+                    pc += 1
+                    continue
+                if a[1] is None or count < a[1]:
+                    # Another iteration is preferred to stopping.
+                    stack.append((b, idx, trail, marks, groups))
+                    marks = (idx, marks)
+                    pc += 1
+                    left -= 1
+                    if not left:
+                        left = budget.spend(idx)  # type: ignore[union-attr]
+                    continue
+                pc = b
+                continue
+            elif op == CSTEP:
+                begin, (count, outer) = marks
+                # An optional iteration that consumed nothing is abandoned, just
+                # like an iteration of repeat.
+                if count < a[0] or idx > begin:
+                    marks = (nextCount(count, a), outer)
+                    pc = b
+                    continue
+            elif op == CPUSH:
+                marks = (0, marks)
+                pc += 1
+                continue
+            elif op == CPOP:
+                marks = marks[1]
+                pc += 1
+                continue
+            elif op == IFNEXT:
+                if idx + 1 < n and a(inputSeq[idx], inputSeq[idx + 1]):
+                    pc += 1
+                    idx += 1
+                    continue
+            elif op == IFPREV:
+                if 0 < idx < n and a(inputSeq[idx], inputSeq[idx - 1]):
+                    pc += 1
+                    idx += 1
+                    continue
+            elif op == IFAT:
+                if idx < n and a(inputSeq, idx):
+                    pc += 1
+                    idx += 1
+                    continue
+            elif op == MATCH:
+                yield idx, trail
+            elif op == PENTER:
+                a.entries += 1
+                a.seconds -= time.perf_counter()
+                stack.append((pc + 1, idx, trail, marks, groups))
+                marks = (a, marks)
+                pc += 2
+                continue
+            elif op == PEXIT:
+                a.results += 1
+                a.seconds += time.perf_counter()
+                stack.append((pc + 1, idx, trail, marks, groups))
+                marks = marks[1]
+                pc += 2
+                continue
+            elif op == PRESUME:
+                a.backtracks += 1
+                a.seconds -= time.perf_counter()
+            elif op == PLEAVE:
+                a.seconds += time.perf_counter()
+            # The thread has failed or matched, so resume the latest alternative.
+            if not stack:
+                return
+            pc, idx, trail, marks, groups = stack.pop()
+            left -= 1
+            if not left:
+                left = budget.spend(idx)  # type: ignore[union-attr]
+    finally:
+        if budget is not None:
+            budget.settle(left)
+        # The nodes that are still being profiled stop when the search does.
+        while marks is not None:
+            if type(marks[0]) is NodeStats:
+                marks[0].seconds += time.perf_counter()
+            marks = marks[1]
+
+
+def nextCount(count: int, limits: tuple[int, int | None]) -> int:
+    """
+    Returns the count of iterations of a counted repeat after one more.
+    Without a maximum, every count from the minimum on behaves the same, so
+    the count stops there.
+    :meta private:
+    """
+    lo, hi = limits
+    return count + 1 if hi is not None or count < lo else count
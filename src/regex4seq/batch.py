@@ -0,0 +1,225 @@
+import hashlib
+import os
+import pickle
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+from types import SimpleNamespace
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from .budget import Budget, makeBudget
+from .records import RecordArray
+from .scan import scanMatches
+
+# The patterns that a worker process has already unpickled, keyed by the
+# digest of their pickled form, so that each is only unpickled once.
+_WORKER_PATTERNS: OrderedDict[str, Any] = OrderedDict()
+_WORKER_PATTERNS_LIMIT = 16
+
+
+def matchMany(pattern, sequences: Iterable[Sequence], workers: int | None=None, chunksize: int | None=None, executor: Executor | None=None, namespace: bool=True, start=True, end=True, maxSteps: int | None=None, deadline: float | None=None) -> list[bool | SimpleNamespace]:
+    """
+    Matches the pattern against each of the sequences in a pool of worker
+    processes and returns the list of results in the same order.
+    :meta private:
+    """
+    # The limits are checked here, rather than in each worker.
+    makeBudget(maxSteps, deadline)
+    digest, payload = _pickled(pattern)
+    if not isinstance(sequences, Sequence):
+        sequences = list(sequences)
+    if not sequences:
+        return []
+    if chunksize is None:
+        # Four chunks per worker balances the load without many round trips.
+        n = workers or os.cpu_count() or 1
+        chunksize = max(1, -(-len(sequences) // (n * 4)))
+    elif chunksize < 1:
+        raise ValueError('The chunksize must be at least 1')
+    options = dict(namespace=namespace, start=start, end=end, maxSteps=maxSteps, deadline=deadline)
+    tasks = ((digest, payload, chunk, options) for chunk in _chunks(sequences, chunksize))
+    results: list[bool | SimpleNamespace] = []
+    for batch in _mapTasks(_matchChunk, tasks, workers, executor):
+        results.extend(batch)
+    return results
+
+
+def searchParallel(pattern, inputSeq: Sequence, workers: int | None=None, chunksize: int | None=None, executor: Executor | None=None, namespace: bool=True, longest=False, spans=False, maxSteps: int | None=None, deadline: float | None=None) -> list[tuple[int, int, bool | SimpleNamespace]]:
+    """
+    Returns the same list of matches as `scan`, searching chunks of the
+    inputSeq in a pool of worker processes. Each worker is sent its chunk
+    together with the maxLength items that follow it, so it can find every
+    match that starts in its chunk, and the item before it, for IfPrevious
+    to look at. It reports the chain of matches that
+    a scan from the start of the chunk finds. The chains are then joined:
+    where the scan arrives in a chunk at a position inside a match of that
+    chunk's chain, it is carried on in this process until it falls back
+    into step with the chain. The captures of the matches are worked out
+    at the end, in this process, from the whole inputSeq. Each worker has
+    a budget of its own for the search of its chunk, and the work done in
+    this process has another.
+    :meta private:
+    """
+    n = len(inputSeq)
+    budget = makeBudget(maxSteps, deadline)
+    maxLength = pattern.maxLength()
+    if maxLength is None:
+        # Without a bound on the length of a match, the chunks cannot be
+        # searched independently.
+        return list(pattern.scan(inputSeq, namespace=namespace, longest=longest, spans=spans, maxSteps=maxSteps, deadline=deadline))
+    digest, payload = _pickled(pattern)
+    if chunksize is None:
+        k = workers or os.cpu_count() or 1
+        chunksize = max(1, -(-(n + 1) // (k * 4)))
+    elif chunksize < 1:
+        raise ValueError('The chunksize must be at least 1')
+    # A match can start at any position up to and including n.
+    bounds = [(a, min(a + chunksize, n + 1)) for a in range(0, n + 1, chunksize)]
+    # One more item is sent, for IfNext to look at.
+    overlap = maxLength + 1
+    tasks = ((digest, payload, _portable(inputSeq[max(a - 1, 0):b + overlap]), min(a, 1), b - a, longest, maxSteps, deadline) for a, b in bounds)
+    chains = list(_mapTasks(_scanChunk, tasks, workers, executor))
+    found = _joinChains(pattern, inputSeq, bounds, chains, overlap, longest, budget)
+    if not namespace:
+        return [(lo, hi, True) for lo, hi in found]
+    find = pattern._finder(inputSeq, True, longest, budget)
+    results: list[tuple[int, int, bool | SimpleNamespace]] = []
+    for lo, hi in found:
+        # The search from lo finds the same match as the scan did, since no
+        # match starts between the position the scan searched from and lo.
+        _, _, trail = find(lo)
+        results.append((lo, hi, trail.namespace(inputSeq, spans=spans)))
+    return results
+
+
+def _joinChains(pattern, inputSeq: Sequence, bounds: list[tuple[int, int]], chains: list[list[tuple[int, int]]], overlap: int, longest: bool, budget: Budget | None=None) -> list[tuple[int, int]]:
+    """
+    Returns the start and end positions of the matches of a scan of the
+    whole inputSeq, given the chain of matches that a scan from the start
+    of each chunk finds among those that start in the chunk.
+    :meta private:
+    """
+    found: list[tuple[int, int]] = []
+    pos = 0
+    for (a, b), chain in zip(bounds, chains):
+        matches = [(a + lo, a + hi) for lo, hi in chain]
+        starts = [lo for lo, _ in matches]
+        find: Callable[[int], tuple | None] | None = None
+        offset = a
+        while pos < b:
+            # A search from anywhere between the position that the chain
+            # searched from and the start of the match it found finds the
+            # same match.
+            k = bisect_left(starts, pos)
+            searchedFrom = a if k == 0 else _after(matches[k - 1])
+            if pos >= searchedFrom:
+                found.extend(matches[k:])
+                pos = max(b, _after(matches[-1])) if matches else b
+                break
+            # The scan is inside a match of the chain, so it has to search
+            # again from where it is.
+            if find is None:
+                # The item before is kept for IfPrevious.
+                offset = max(pos - 1, 0)
+                find = pattern._finder(inputSeq[offset:b + overlap], False, longest, budget)
+            hit = find(pos - offset)
+            if hit is None or hit[0] + offset >= b:
+                pos = b
+                break
+            lo, hi = hit[0] + offset, hit[1] + offset
+            found.append((lo, hi))
+            pos = _after((lo, hi))
+    return found
+
+
+def _after(match: tuple[int, int]) -> int:
+    """Returns the position that a scan searches from after the match."""
+    lo, hi = match
+    return hi if hi > lo else hi + 1
+
+
+def _portable(chunk: Sequence) -> Sequence:
+    """
+    Returns the chunk in a form that can be pickled, which views of buffers
+    cannot.
+    :meta private:
+    """
+    if isinstance(chunk, memoryview):
+        return chunk.tolist()
+    if isinstance(chunk, RecordArray):
+        return list(chunk)
+    return chunk
+
+
+def _pickled(pattern) -> tuple[str, bytes]:
+    """
+    Returns the digest and the pickled form of the pattern, for sending to
+    the workers.
+    :meta private:
+    """
+    try:
+        payload = pickle.dumps(pattern)
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        raise ValueError('The pattern cannot be pickled: use registerPredicate for predicates that are lambdas') from e
+    return hashlib.sha256(payload).hexdigest(), payload
+
+
+def _mapTasks(f: Callable, tasks: Iterable, workers: int | None, executor: Executor | None) -> Iterator:
+    """
+    Returns the results of f for each of the tasks, in order, run by the
+    executor or else by a pool of worker processes of its own.
+    :meta private:
+    """
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(f, tasks)
+    else:
+        yield from executor.map(f, tasks)
+
+
+def _chunks(sequences: Sequence, chunksize: int) -> Iterator[list]:
+    it = iter(sequences)
+    while chunk := list(islice(it, chunksize)):
+        yield chunk
+
+
+def _workerPattern(digest: str, payload: bytes) -> Any:
+    """
+    Returns the unpickled pattern, which each worker only unpickles once.
+    :meta private:
+    """
+    pattern = _WORKER_PATTERNS.get(digest)
+    if pattern is None:
+        pattern = pickle.loads(payload)
+        _WORKER_PATTERNS[digest] = pattern
+        if len(_WORKER_PATTERNS) > _WORKER_PATTERNS_LIMIT:
+            _WORKER_PATTERNS.popitem(last=False)
+    else:
+        _WORKER_PATTERNS.move_to_end(digest)
+    return pattern
+
+
+def _matchChunk(task) -> list[bool | SimpleNamespace]:
+    """Runs in a worker process. :meta private:"""
+    digest, payload, chunk, options = task
+    pattern = _workerPattern(digest, payload)
+    return [pattern.matches(seq, **options) for seq in chunk]
+
+
+def _scanChunk(task) -> list[tuple[int, int]]:
+    """
+    Runs in a worker process. Returns the start and end positions, from the
+    start of the chunk, of the matches of a scan of the chunk that start in
+    its first size positions. The chunk begins with the given number of
+    items that come before it, which only IfPrevious looks at.
+    :meta private:
+    """
+    digest, payload, chunk, before, size, longest, maxSteps, deadline = task
+    pattern = _workerPattern(digest, payload)
+    chain = []
+    for lo, hi, _ in scanMatches(pattern._finder(chunk, False, longest, makeBudget(maxSteps, deadline)), chunk, False, before):
+        if lo - before >= size:
+            break
+        chain.append((lo - before, hi - before))
+    return chain
@@ -0,0 +1,134 @@
+import time
+from typing import Any, Callable, Iterable, Iterator
+
+# The number of steps between checks of the deadline.
+CHECK_INTERVAL = 1024
+
+
+class MatchBudgetExceeded(Exception):
+    """
+    Raised when a match takes more steps than the maxSteps option allows, or
+    goes on past the deadline option. The attribute reason is 'maxSteps' or
+    'deadline', steps is the number of steps that had been taken and
+    position is the position in the input that the search had reached.
+    """
+
+    def __init__(self, reason: str, steps: int, position: int):
+        super().__init__(f'Matching was stopped by its {reason} after {steps} steps at position {position}')
+        self.reason = reason
+        self.steps = steps
+        self.position = position
+
+    def __reduce__(self):
+        # So that it can be raised in a worker process and passed back.
+        return (MatchBudgetExceeded, (self.reason, self.steps, self.position))
+
+
+class Budget:
+    """
+    Counts the steps taken by a single call of a matching method against its
+    limits: at most maxSteps steps, and no later than deadline, which is a
+    time on the `time.monotonic` clock. A step is a branch or a failure of
+    the backtracker, a thread step of a compiled engine, or a node tried by
+    the recursive backtracker. The deadline is only checked every so many
+    steps, so that keeping to the limits costs very little.
+    :meta private:
+    """
+    __slots__ = ('maxSteps', 'deadline', 'steps', '_granted', '_nextCheck', '_trees')
+
+    def __init__(self, maxSteps: int | None, deadline: float | None):
+        if maxSteps is not None and maxSteps < 0:
+            raise ValueError('The maxSteps cannot be negative')
+        self.maxSteps = maxSteps
+        self.deadline = deadline
+        self.steps = 0
+        self._granted = 0
+        self._nextCheck = 0
+        self._trees: dict[int, tuple[Any, Any]] = {}
+
+    def charge(self, n: int, position: int):
+        """Counts n more steps, raising MatchBudgetExceeded if that is too many."""
+        self.steps += n
+        if self.maxSteps is not None and self.steps > self.maxSteps:
+            raise MatchBudgetExceeded('maxSteps', self.steps, position)
+        if self.steps >= self._nextCheck:
+            self._nextCheck = self.steps + CHECK_INTERVAL
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                raise MatchBudgetExceeded('deadline', self.steps, position)
+
+    def allowance(self) -> int:
+        """
+        Returns the number of steps that may be taken before the next call
+        of spend. A caller that counts down its allowance only has to call
+        the budget once in a while.
+        """
+        n = CHECK_INTERVAL
+        if self.maxSteps is not None:
+            n = max(1, min(n, self.maxSteps + 1 - self.steps))
+        self._granted = n
+        return n
+
+    def spend(self, position: int) -> int:
+        """Counts the steps of the last allowance and returns the next one."""
+        self.charge(self._granted, position)
+        return self.allowance()
+
+    def settle(self, left: int):
+        """
+        Counts the steps that were taken from the last allowance, where left
+        is the number that were not, when the caller stops counting down.
+        """
+        self.steps += self._granted - left
+        self._granted = 0
+
+    def tree(self, pattern, build: Callable) -> Any:
+        """
+        Returns build(self) for the pattern, which is made only once per
+        pattern, for patterns that count their own steps.
+        """
+        entry = self._trees.get(id(pattern))
+        if entry is None:
+            # The pattern is kept so that its id cannot be reused.
+            entry = self._trees[id(pattern)] = (pattern, build(self))
+        return entry[1]
+
+    def remaining(self) -> int | None:
+        """
+        Returns the number of steps that are left, or None if there is no
+        limit, for handing the rest of the budget to another matching call.
+        """
+        return None if self.maxSteps is None else max(0, self.maxSteps - self.steps)
+
+    def metered(self, items: Iterable, position: int=0) -> Iterator:
+        """Returns a generator of the items that counts a step for each."""
+        left = self.allowance()
+        try:
+            for item in items:
+                left -= 1
+                if not left:
+                    left = self.spend(position)
+                yield item
+                position += 1
+        finally:
+            self.settle(left)
+
+
+def limitsOf(budget: Budget | None) -> dict[str, Any]:
+    """
+    Returns the options maxSteps and deadline that hand what is left of the
+    budget on to another matching call.
+    :meta private:
+    """
+    if budget is None:
+        return {}
+    return {'maxSteps': budget.remaining(), 'deadline': budget.deadline}
+
+
+def makeBudget(maxSteps: int | None, deadline: float | None) -> Budget | None:
+    """
+    Returns a Budget for the limits, or None if there are none.
+    :meta private:
+    """
+    if maxSteps is None and deadline is None:
+        return None
+    return Budget(maxSteps, deadline)
@@ -0,0 +1,102 @@
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """
+    A dictionary that holds at most maxSize entries, discarding the least
+    recently used entry to make room for a new one. It is safe to share
+    between threads.
+    :meta private:
+    """
+
+    def __init__(self, maxSize: int):
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._maxSize = maxSize
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the value for key, calling compute to work it out and
+        remembering it if it is not already known. A key that cannot be
+        hashed is never remembered.
+        """
+        try:
+            with self._lock:
+                value = self._entries[key]
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+        except KeyError:
+            pass
+        except TypeError:
+            return compute()
+        value = compute()
+        with self._lock:
+            self._misses += 1
+            if self._maxSize > 0:
+                # Another thread may have put an equal value in meanwhile,
+                # in which case the first one is kept.
+                value = self._entries.setdefault(key, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._maxSize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def resize(self, maxSize: int):
+        with self._lock:
+            self._maxSize = maxSize
+            while len(self._entries) > max(maxSize, 0):
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def info(self) -> SimpleNamespace:
+        with self._lock:
+            return SimpleNamespace(hits=self._hits, misses=self._misses, size=len(self._entries), maxSize=self._maxSize)
+
+
+# The canonical copy of each pattern that has been interned.
+INTERNED = LRUCache(1024)
+
+# The compiled and optimized forms of patterns, keyed by their structure.
+COMPILED = LRUCache(1024)
+
+
+def setCacheSize(maxSize: int):
+    """
+    Sets the greatest number of entries that the process-wide caches of
+    interned patterns and of compiled and optimized patterns each hold. The
+    least recently used entries are discarded when a cache is full. A size
+    of 0 turns caching off. The default size is 1024.
+    """
+    if maxSize < 0:
+        raise ValueError('The cache size cannot be negative')
+    INTERNED.resize(maxSize)
+    COMPILED.resize(maxSize)
+
+
+def clearCaches():
+    """
+    Empties the process-wide caches of interned patterns and of compiled and
+    optimized patterns.
+    """
+    INTERNED.clear()
+    COMPILED.clear()
+
+
+def cacheInfo() -> SimpleNamespace:
+    """
+    Returns a namespace object that describes the process-wide cache of
+    compiled and optimized patterns, with the attributes hits, misses, size
+    and maxSize.
+    """
+    return COMPILED.info()
@@ -0,0 +1,240 @@
+import threading
+from typing import Generic, Iterable, Iterator, Sequence, TypeVar
+from types import SimpleNamespace
+
+from .program import Program, compileProgram
+from .program import ITEM, ONEOF, ANY, SPLIT, JMP, MARK, PROGRESS, OPEN, CLOSE, MATCH
+from .budget import Budget, makeBudget, limitsOf
+from .span import itemsOf
+
+T = TypeVar("T")
+
+# The opcodes that a lazy DFA supports. Items are only tested by equality, so
+# the transition taken on an item depends on nothing but the item.
+_EQUALITY_OPS = frozenset((ITEM, ONEOF, ANY, SPLIT, JMP, MARK, PROGRESS, OPEN, CLOSE, MATCH))
+
+# The status of a DFA state.
+_LIVE = 0
+_ACCEPT = 1
+_DEAD = 2
+
+
+class _StateCache:
+    """
+    The DFA states built so far, for either anchored or unanchored matching.
+    Each DFA state is numbered and stands for a set of NFA instructions. The
+    number of cached transitions is limited to maxTransitions; when the limit
+    is reached the cache is emptied and rebuilt on demand. A state cache
+    belongs to a single thread, since the state numbers change when it is
+    emptied.
+    :meta private:
+    """
+
+    def __init__(self, dfa: 'LazyDFA', unanchored: bool, maxTransitions: int):
+        self._dfa = dfa
+        self._unanchored = unanchored
+        self._maxTransitions = maxTransitions
+        self._index: dict[frozenset[int], int] = {}
+        self.sets: list[frozenset[int]] = []
+        self.status: list[int] = []
+        self.transitions: list[dict] = []
+        self._size = 0
+        self.initial = self._state(dfa._closure(0))
+
+    def _state(self, pcs: frozenset[int]) -> int:
+        s = self._index.get(pcs)
+        if s is None:
+            s = len(self.sets)
+            self._index[pcs] = s
+            self.sets.append(pcs)
+            self.status.append(_ACCEPT if self._dfa._match in pcs else _LIVE if pcs else _DEAD)
+            self.transitions.append({})
+        return s
+
+    def _flush(self):
+        # The lists are cleared in place so that the matching loops can hold
+        # on to them.
+        self._dfa._flushed()
+        initial = self.sets[self.initial]
+        self._index.clear()
+        self.sets.clear()
+        self.status.clear()
+        self.transitions.clear()
+        self._size = 0
+        self.initial = self._state(initial)
+
+    def move(self, s: int, item) -> int:
+        """Builds, caches and returns the transition from state s on item."""
+        pcs = self._dfa._step(self.sets[s], item)
+        if self._unanchored:
+            pcs = pcs | self.sets[self.initial]
+        if self._size >= self._maxTransitions:
+            source = self.sets[s]
+            self._flush()
+            s = self._state(source)
+        t = self._state(pcs)
+        try:
+            self.transitions[s][item] = t
+            self._size += 1
+        except TypeError:
+            # Unhashable items are matched but their transitions are not cached.
+            pass
+        return t
+
+
+class LazyDFA(Generic[T]):
+    """
+    A compiled pattern that is matched by a DFA whose states are built on
+    demand, so that each item usually costs a single dictionary lookup. It
+    only applies to patterns that test items by equality. Patterns that use
+    IfItem, IfNext or match groups with a suchthat guard are matched by the
+    original pattern instead.
+
+    Match groups are allowed. When a match succeeds and bindings are wanted,
+    they are found by the original pattern, so the results are always the
+    same as those of the original pattern.
+
+    A LazyDFA may be shared between threads. Each thread builds its own DFA
+    states, so that no thread sees the states of another change under it.
+    """
+
+    def __init__(self, pattern, maxTransitions: int=10000):
+        self._pattern = pattern
+        program: Program = compileProgram(pattern)
+        self._supported = not program.guarded and all(op in _EQUALITY_OPS for op, _, _ in program.code)
+        self._code = program.code
+        self._match = len(program.code) - 1
+        self._hasGroups = any(op == OPEN for op, _, _ in program.code)
+        self._closures: list[frozenset[int]] = [frozenset(c) for c in program.closures()]
+        self._local = threading.local()
+        self._maxTransitions = maxTransitions
+        self._lock = threading.Lock()
+        self._flushes = 0
+
+    def pattern(self):
+        """Returns the original, uncompiled pattern."""
+        return self._pattern
+
+    def isSupported(self) -> bool:
+        """
+        Returns True if the pattern is matched by the DFA, or False if it is
+        matched by the original pattern.
+        """
+        return self._supported
+
+    def flushes(self) -> int:
+        """
+        Returns how many times the transition cache has been emptied, in any
+        thread.
+        """
+        return self._flushes
+
+    def _flushed(self):
+        """:meta private:"""
+        with self._lock:
+            self._flushes += 1
+
+    def _closure(self, pc: int) -> frozenset[int]:
+        """:meta private:"""
+        return self._closures[pc]
+
+    def _step(self, pcs: frozenset[int], item) -> frozenset[int]:
+        """:meta private:"""
+        code = self._code
+        result: set[int] = set()
+        for pc in pcs:
+            op, a, _ = code[pc]
+            if op == ANY or (op == ITEM and item == a) or (op == ONEOF and item in a):
+                result.update(self._closure(pc + 1))
+        return frozenset(result)
+
+    def _cache(self, unanchored: bool) -> _StateCache:
+        """:meta private:"""
+        caches: dict[bool, _StateCache] | None = getattr(self._local, 'caches', None)
+        if caches is None:
+            caches = self._local.caches = {}
+        cache = caches.get(unanchored)
+        if cache is None:
+            cache = caches[unanchored] = _StateCache(self, unanchored, self._maxTransitions)
+        return cache
+
+    def _accepts(self, inputSeq: Sequence[T], start, end, budget: Budget | None=None) -> bool:
+        """:meta private:"""
+        cache = self._cache(not start)
+        transitions = cache.transitions
+        status = cache.status
+        s = cache.initial
+        if status[s] == _ACCEPT and not end:
+            return True
+        # Each item is a step, but the items are only counted when there is
+        # a budget.
+        items: Iterable[T] = itemsOf(inputSeq) if budget is None else budget.metered(itemsOf(inputSeq))
+        for item in items:
+            try:
+                s = transitions[s][item]
+            except (KeyError, TypeError):
+                s = cache.move(s, item)
+            st = status[s]
+            if st == _DEAD:
+                return False
+            if st == _ACCEPT and not end:
+                return True
+        return status[s] == _ACCEPT
+
+    def _lastAccept(self, items: Iterable[T], start, budget: Budget | None=None) -> int | None:
+        """
+        Returns the greatest number of the items after which the DFA accepts,
+        or None if it never does. The items are read until they run out or
+        no match can go any further.
+        :meta private:
+        """
+        cache = self._cache(not start)
+        transitions = cache.transitions
+        status = cache.status
+        s = cache.initial
+        last = 0 if status[s] == _ACCEPT else None
+        if budget is not None:
+            items = budget.metered(items)
+        i = 0
+        for item in items:
+            i += 1
+            try:
+                s = transitions[s][item]
+            except (KeyError, TypeError):
+                s = cache.move(s, item)
+            st = status[s]
+            if st == _DEAD:
+                break
+            if st == _ACCEPT:
+                last = i
+        return last
+
+    def matches(self, inputSeq: Sequence[T], namespace: bool=True, start=True, end=True, history=None, spans=False, maxSteps: int | None=None, deadline: float | None=None) -> bool | SimpleNamespace:
+        """
+        Returns truthy if the pattern matches the inputSeq, exactly as the
+        `matches` method of the original pattern does. Each item that the
+        DFA examines counts as one step towards maxSteps, and the steps that
+        are left are handed on to the original pattern when it is used.
+        """
+        return self._matches(inputSeq, namespace, start, end, history, spans, makeBudget(maxSteps, deadline))
+
+    def _matches(self, inputSeq: Sequence[T], namespace: bool, start, end, history, spans, budget: Budget | None) -> bool | SimpleNamespace:
+        """:meta private:"""
+        if self._supported:
+            if not self._accepts(inputSeq, start, end, budget):
+                return False
+            if not (namespace and self._hasGroups):
+                return True
+        return self._pattern.matches(inputSeq, namespace=namespace, start=start, end=end, history=history, spans=spans, **limitsOf(budget))
+
+    def findAllMatches(self, inputSeq: Sequence[T], namespace: bool=True, start=True, end=True, spans=False, maxSteps: int | None=None, deadline: float | None=None) -> Iterator[bool | SimpleNamespace]:
+        """
+        Returns a generator that will find all matches of the pattern in the
+        inputSeq, exactly as the `findAllMatches` method of the original
+        pattern does. The DFA is only used to skip inputs that cannot match.
+        The options maxSteps and deadline are the same as for `matches`.
+        """
+        budget = makeBudget(maxSteps, deadline)
+        if self._supported and not self._accepts(inputSeq, start, end, budget):
+            return iter(())
+        return self._pattern.findAllMatches(inputSeq, namespace=namespace, start=start, end=end, spans=spans, **limitsOf(budget))
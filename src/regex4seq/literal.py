@@ -0,0 +1,66 @@
+import mmap
+from typing import Iterator, Sequence
+
+from .records import RecordArray
+
+
+def literalPositions(inputSeq: Sequence, literal: tuple) -> Iterator[int]:
+    """
+    Returns a generator of the positions, in increasing order, at which the
+    literal sequence of items occurs in the inputSeq. Strings, bytes and
+    mmaps are searched with their own find method, and so are the buffers
+    of RecordArrays of integers; other sequences are searched with the
+    Boyer-Moore-Horspool algorithm, which skips ahead by up to the length of
+    the literal at each step.
+    :meta private:
+    """
+    m = len(literal)
+    if isinstance(inputSeq, str) and all(type(x) is str and len(x) == 1 for x in literal):
+        return _findAll(inputSeq, ''.join(literal))
+    if isinstance(inputSeq, (bytes, bytearray, mmap.mmap)) and all(type(x) is int and 0 <= x < 256 for x in literal):
+        return _findAll(inputSeq, bytes(literal))
+    if isinstance(inputSeq, RecordArray):
+        found = inputSeq._literalPositions(literal)
+        if found is not None:
+            return found
+    try:
+        skip = {x: m - 1 - i for i, x in enumerate(literal[:-1])}
+    except TypeError:
+        # Unhashable items cannot be put into a skip table.
+        return _naive(inputSeq, literal)
+    return _horspool(inputSeq, literal, skip)
+
+
+def _findAll(inputSeq, needle) -> Iterator[int]:
+    i = inputSeq.find(needle)
+    while i >= 0:
+        yield i
+        i = inputSeq.find(needle, i + 1)
+
+
+def _naive(inputSeq: Sequence, literal: tuple) -> Iterator[int]:
+    m = len(literal)
+    for i in range(0, len(inputSeq) - m + 1):
+        if all(inputSeq[i + k] == literal[k] for k in range(m)):
+            yield i
+
+
+def _horspool(inputSeq: Sequence, literal: tuple, skip: dict) -> Iterator[int]:
+    m = len(literal)
+    last = m - 1
+    lastItem = literal[last]
+    i = 0
+    limit = len(inputSeq) - m
+    while i <= limit:
+        x = inputSeq[i + last]
+        if x == lastItem:
+            k = last - 1
+            while k >= 0 and inputSeq[i + k] == literal[k]:
+                k -= 1
+            if k < 0:
+                yield i
+        try:
+            i += skip.get(x, m)
+        except TypeError:
+            # An unhashable item in the input.
+            i += 1
@@ -0,0 +1,63 @@
+from typing import Sequence
+
+from .budget import Budget
+
+
+class MemoFull(Exception):
+    """
+    Raised when a Memo would have to hold more end positions than its limit.
+    :meta private:
+    """
+
+
+class Memo:
+    """
+    Remembers, for each pattern node and each start position, the positions
+    where the node's matches end and how many distinct ways there are of
+    reaching each one. It lives for the duration of a single call of
+    `matches` or `findAllMatches` and holds at most limit end positions in
+    all; once that many are needed, MemoFull is raised so that the caller can
+    carry on without it. If there is a budget, each result that has to be
+    worked out counts as a step.
+    :meta private:
+    """
+
+    def __init__(self, limit: int, budget: Budget | None=None):
+        self._table: dict[tuple[int, int], dict[int, int]] = {}
+        self._limit = limit
+        self._size = 0
+        self._budget = budget
+
+    def __len__(self):
+        return len(self._table)
+
+    def get(self, node, idx: int) -> dict[int, int] | None:
+        return self._table.get((id(node), idx))
+
+    def put(self, node, idx: int, ends: dict[int, int]):
+        self._size += len(ends)
+        if self._size > self._limit:
+            raise MemoFull()
+        self._table[(id(node), idx)] = ends
+
+    def reach(self, node, inputSeq: Sequence, idx: int) -> dict[int, int]:
+        """
+        Returns a dictionary that maps each position where a match of node
+        from idx ends to the number of ways of matching.
+        """
+        ends = self._table.get((id(node), idx))
+        if ends is None:
+            if self._budget is not None:
+                self._budget.charge(1, idx)
+            ends = node._reach(inputSeq, idx, self)
+            self.put(node, idx, ends)
+        return ends
+
+
+def addEnds(result: dict[int, int], ends: dict[int, int], times: int = 1):
+    """
+    Adds the ways of reaching each end, multiplied by times, into result.
+    :meta private:
+    """
+    for e, c in ends.items():
+        result[e] = result.get(e, 0) + c * times
@@ -0,0 +1,361 @@
+from typing import Generic, Iterable, Sequence, TypeVar
+
+from .program import Program, CompileError, ITEM, ONEOF, ANY, MATCH
+from .pikevm import PikeVM
+from .trail import DiscardTrail
+from .span import itemsOf
+from .budget import Budget, makeBudget
+
+T = TypeVar("T")
+
+
+class PatternSet(Generic[T]):
+    """
+    A collection of patterns that are all matched against the same input in
+    a single pass. Patterns that are just a fixed run of items are found with
+    an Aho-Corasick automaton and the others are run as compiled Pike VMs in
+    lock-step, where a pattern is only started at the positions where its
+    first item can match. The cost therefore grows with the length of the
+    input and the number of patterns that are actually in play, rather than
+    with the total number of patterns.
+
+    Patterns that cannot be compiled, because they use a match group with a
+    suchthat guard, and patterns with counted repeats are matched separately
+    with their own `matches` method.
+    """
+
+    def __init__(self, patterns: Iterable):
+        self._patterns = list(patterns)
+        self._literals: dict[int, tuple] = {}
+        self._vms: dict[int, PikeVM[T]] = {}
+        self._others: list[int] = []
+        for i, p in enumerate(self._patterns):
+            literal, complete = p._literalPrefix()
+            if complete and literal and _hashable(literal):
+                self._literals[i] = literal
+                continue
+            try:
+                vm: PikeVM[T] = PikeVM(p)
+            except CompileError:
+                self._others.append(i)
+                continue
+            if vm._program.counted:
+                # The threads here only hold an instruction, not the counts.
+                self._others.append(i)
+            else:
+                self._vms[i] = vm
+        self._automaton = _AhoCorasick(self._literals)
+        self._index, self._always, self._nullable = _firstItemIndex(self._vms)
+        self._parking: dict[tuple[int, tuple[int, ...]], tuple[frozenset, list[int]] | None] = {}
+
+    def __len__(self):
+        return len(self._patterns)
+
+    def patterns(self) -> list:
+        """Returns the list of patterns, in the order they were given."""
+        return list(self._patterns)
+
+    def matches(self, inputSeq: Sequence[T], start=True, end=True, maxSteps: int | None=None, deadline: float | None=None) -> dict[int, tuple[int, int]]:
+        """
+        Returns a dictionary that maps the index of each of the patterns that
+        match the inputSeq to the start and end positions of its match, with
+        the keys in increasing order. The match of each pattern is the one
+        that its own `matches` method would find. The options start and end
+        are the same as for `matches`, so an unanchored search for all the
+        patterns is done with start=False and end=False.
+
+        The options maxSteps and deadline are also the same as for `matches`,
+        with the steps of all the patterns counted together. A step is one
+        thread of a compiled pattern at one position, or a backtrack of a
+        pattern that is matched separately.
+        """
+        budget = makeBudget(maxSteps, deadline)
+        found: dict[int, tuple[int, int]] = {}
+        self._matchLiterals(inputSeq, start, end, found)
+        self._matchCompiled(inputSeq, start, end, found, budget)
+        for i in self._others:
+            span = _backtrackSpan(self._patterns[i], inputSeq, start, end, budget)
+            if span is not None:
+                found[i] = span
+        return dict(sorted(found.items()))
+
+    def _matchLiterals(self, inputSeq: Sequence[T], start, end, found: dict):
+        """:meta private:"""
+        n = len(inputSeq)
+        if start or end:
+            # Only one position needs to be checked for each literal.
+            for i, literal in self._literals.items():
+                m = len(literal)
+                lo = 0 if start else n - m
+                if (not (start and end) or m == n) and lo >= 0 and tuple(inputSeq[lo:lo + m]) == literal:
+                    found[i] = (lo, lo + m)
+            return
+        for hi, i in self._automaton.search(inputSeq):
+            if i not in found:
+                found[i] = (hi - len(self._literals[i]), hi)
+
+    def _matchCompiled(self, inputSeq: Sequence[T], start, end, found: dict, budget: Budget | None=None):
+        """
+        Runs the compiled patterns in lock-step, each exactly as the `matches`
+        method of a PikeVM does. No bindings are needed, so each thread is
+        just its instruction and start position and the instructions that can
+        be reached without consuming input are looked up in the closures of
+        the program.
+
+        A pattern whose threads would be unchanged by every item except a few
+        is parked, for example while it waits in a MANY for the next item, and
+        is only woken up when one of those items arrives.
+        :meta private:
+        """
+        n = len(inputSeq)
+        active: dict[int, tuple[list, set]] = {}
+        parked: dict[int, tuple[list, frozenset]] = {}
+        waiting: dict[object, set[int]] = {}
+        pending = sum(1 for i in self._vms if i not in found)
+
+        def wake(i: int):
+            threads, keys = parked.pop(i)
+            for k in keys:
+                waiting[k].discard(i)
+            active[i] = (threads, {pc for pc, _ in threads})
+
+        for idx in range(0, n + 1):
+            if idx == n:
+                # A parked pattern cannot match without another item.
+                parked.clear()
+            elif parked:
+                try:
+                    woken = waiting.get(inputSeq[idx])
+                except TypeError:
+                    woken = None
+                for i in list(woken or ()):
+                    wake(i)
+            if idx == 0 or not start:
+                for i in self._seeds(inputSeq, idx):
+                    if i in found:
+                        continue
+                    if i in parked:
+                        wake(i)
+                    threads, visited = active.get(i) or active.setdefault(i, ([], set()))
+                    # A new thread has the lowest priority.
+                    for q in self._vms[i]._program.closures()[0]:
+                        if q not in visited:
+                            visited.add(q)
+                            threads.append((q, idx))
+            if budget is not None:
+                budget.charge(sum(len(threads) for threads, _ in active.values()), idx)
+            for i, (threads, _) in list(active.items()):
+                vm = self._vms[i]
+                code = vm._program.code
+                closures = vm._program.closures()
+                next_threads: list = []
+                next_visited: set = set()
+                for pc, origin in threads:
+                    op, a, _ = code[pc]
+                    if op == MATCH:
+                        if not end or idx == n:
+                            # Cut off all the threads of lower priority.
+                            pending -= i not in found
+                            found[i] = (origin, idx)
+                            break
+                    elif idx < n and vm._consumes(op, a, inputSeq, idx):
+                        for q in closures[pc + 1]:
+                            if q not in next_visited:
+                                next_visited.add(q)
+                                next_threads.append((q, origin))
+                if not next_threads:
+                    del active[i]
+                    continue
+                keys = self._parkingKeys(i, next_threads)
+                if keys is None:
+                    active[i] = (next_threads, next_visited)
+                else:
+                    del active[i]
+                    parked[i] = (next_threads, keys)
+                    for k in keys:
+                        waiting.setdefault(k, set()).add(i)
+            if not active and not parked and (start or not pending):
+                break
+
+    def _parkingKeys(self, i: int, threads: list) -> frozenset | None:
+        """
+        Returns the items that would change the threads of pattern i, if every
+        other item would leave them exactly as they are, or None.
+        :meta private:
+        """
+        pcs = tuple(pc for pc, _ in threads)
+        key = (i, pcs)
+        if key in self._parking:
+            info = self._parking[key]
+        else:
+            info = self._parking[key] = _parkingInfo(self._vms[i]._program, pcs)
+        if info is None:
+            return None
+        keys, parents = info
+        # Each thread must have the same start as the thread that it would be
+        # replaced by.
+        for j, parent in enumerate(parents):
+            if threads[j][1] != threads[parent][1]:
+                return None
+        return keys
+
+    def _seeds(self, inputSeq: Sequence[T], idx: int) -> Iterable[int]:
+        """
+        Returns the compiled patterns that can start matching at idx.
+        :meta private:
+        """
+        if idx == len(inputSeq):
+            return self._nullable
+        try:
+            keyed = self._index.get(inputSeq[idx], ())
+        except TypeError:
+            # An unhashable item cannot be equal to an item in the index.
+            keyed = ()
+        return (*keyed, *self._always) if keyed else self._always
+
+
+def _hashable(items: tuple) -> bool:
+    try:
+        hash(items)
+        return True
+    except TypeError:
+        return False
+
+
+def _firstItemIndex(vms: dict[int, PikeVM]) -> tuple[dict, list[int], list[int]]:
+    """
+    Returns a dictionary from each item to the patterns that can start with
+    it, the patterns that can start with any item, and the patterns that can
+    match the empty sequence. The latter two can start at any position.
+    :meta private:
+    """
+    index: dict = {}
+    always: list[int] = []
+    nullable: list[int] = []
+    for i, vm in vms.items():
+        program = vm._program
+        firsts: set = set()
+        anything = False
+        for pc in program.closures()[0]:
+            op, a, _ = program.code[pc]
+            if op == ITEM and _hashable((a,)):
+                firsts.add(a)
+            elif op == ONEOF:
+                firsts.update(a)
+            else:
+                anything = True
+            if op == MATCH:
+                nullable.append(i)
+        if anything:
+            always.append(i)
+        else:
+            for x in firsts:
+                index.setdefault(x, []).append(i)
+    return index, always, nullable
+
+
+def _parkingInfo(program: Program, pcs: tuple[int, ...]) -> tuple[frozenset, list[int]] | None:
+    """
+    If the threads at pcs only test items by equality or accept any item, and
+    any item that is not tested for would lead back to exactly the same pcs,
+    returns the items that are tested for and, for each pc, the index of the
+    thread that it would come from. Otherwise returns None.
+    :meta private:
+    """
+    code = program.code
+    closures = program.closures()
+    keys: set = set()
+    nexts: list[int] = []
+    parents: list[int] = []
+    visited: set = set()
+    for j, pc in enumerate(pcs):
+        op, a, _ = code[pc]
+        if op == ITEM:
+            if not _hashable((a,)):
+                return None
+            keys.add(a)
+        elif op == ONEOF:
+            keys.update(a)
+        elif op == ANY:
+            for q in closures[pc + 1]:
+                if q not in visited:
+                    visited.add(q)
+                    nexts.append(q)
+                    parents.append(j)
+        else:
+            return None
+    if tuple(nexts) != pcs:
+        return None
+    return frozenset(keys), parents
+
+
+def _backtrackSpan(pattern, inputSeq: Sequence, start, end, budget: Budget | None=None) -> tuple[int, int] | None:
+    """
+    Returns the start and end of the match that the pattern's own `matches`
+    method finds, or None.
+    :meta private:
+    """
+    n = len(inputSeq)
+    for lo in pattern._startPositions(inputSeq, start, end):
+        for hi, _ in pattern._backtrack(inputSeq, lo, DiscardTrail(), budget):
+            if not end or hi == n:
+                return lo, hi
+    return None
+
+
+class _AhoCorasick:
+    """
+    An Aho-Corasick automaton that finds every occurrence of a set of
+    literal sequences of items in a single pass.
+    :meta private:
+    """
+
+    def __init__(self, literals: dict[int, tuple]):
+        self._goto: list[dict] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        for i, literal in literals.items():
+            s = 0
+            for x in literal:
+                t = self._goto[s].get(x)
+                if t is None:
+                    t = len(self._goto)
+                    self._goto[s][x] = t
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                s = t
+            self._out[s].append(i)
+        # Breadth first, so that the failure state of the parent is known.
+        queue = list(self._goto[0].values())
+        for s in queue:
+            for x, t in self._goto[s].items():
+                queue.append(t)
+                f = self._fail[s]
+                while f and x not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[t] = self._goto[f].get(x, 0)
+                self._out[t] = self._out[t] + self._out[self._fail[t]]
+
+    def __bool__(self):
+        return len(self._goto) > 1
+
+    def search(self, inputSeq: Sequence):
+        """
+        Returns a generator of the pairs (end, i) for each occurrence of the
+        literal i, in increasing order of end.
+        """
+        if not self:
+            return
+        goto, fail, out = self._goto, self._fail, self._out
+        s = 0
+        for idx, x in enumerate(itemsOf(inputSeq)):
+            try:
+                while s and x not in goto[s]:
+                    s = fail[s]
+                s = goto[s].get(x, 0)
+            except TypeError:
+                s = 0
+                continue
+            for i in out[s]:
+                yield idx + 1, i
@@ -0,0 +1,421 @@
+from collections import deque
+from typing import Generic, Iterator, Sequence, TypeVar
+from types import SimpleNamespace
+
+from .program import Program, CompileError, compileProgram
+from .program import ITEM, ONEOF, ANY, IFITEM, IFNEXT, IFPREV, SPLIT, JMP, MARK, PROGRESS, OPEN, CLOSE, MATCH
+from .program import CPUSH, CLOOP, CSTEP, CPOP, IFAT
+from .trail import Trail, DiscardTrail, StartCaptureTrail
+from .scan import scanMatches
+from .backtrack import nextCount
+from .budget import Budget, makeBudget
+
+T = TypeVar("T")
+
+
+class PikeVM(Generic[T]):
+    """
+    A compiled pattern that is matched by simulating all of the alternatives
+    in lock-step (a Pike VM) rather than by backtracking. The time taken is
+    bounded by the length of the pattern times the length of the input.
+
+    The result of `matches` is the same as for the original pattern. The
+    method `findAllMatches` returns the matches in the same order as the
+    original pattern but only returns one match for each distinct start and
+    end position, namely the first that the original pattern would return.
+    """
+
+    def __init__(self, pattern):
+        program: Program = compileProgram(pattern)
+        if program.guarded:
+            raise CompileError('Match groups with a suchthat guard cannot be compiled')
+        self._pattern = pattern
+        self._program = program
+
+    def pattern(self):
+        """Returns the original, uncompiled pattern."""
+        return self._pattern
+
+    def _follow(self, threads: list, visited: set, pc: int, idx: int, trail: Trail, groups, counters, origin: int):
+        """
+        Adds the thread that started at origin and is now at pc, plus all of
+        the threads that it can reach without consuming any input, to the
+        list of threads in priority order. Threads that are at the same pc
+        are the same thread, unless they are inside counted repeats, when
+        they must have the same counts too.
+        :meta private:
+        """
+        code = self._program.code
+        stack = [(pc, trail, groups, counters)]
+        while stack:
+            pc, trail, groups, counters = stack.pop()
+            key = pc if counters is None else (pc, counters)
+            if key in visited:
+                continue
+            visited.add(key)
+            op, a, b = code[pc]
+            if op == SPLIT:
+                stack.append((b, trail, groups, counters))
+                stack.append((a, trail, groups, counters))
+            elif op == JMP:
+                stack.append((a, trail, groups, counters))
+            elif op == MARK or op == PROGRESS:
+                # Empty iterations are pruned by visited, just like the
+                # backtracker prunes repetitions that consume nothing.
+                stack.append((pc + 1, trail, groups, counters))
+            elif op == OPEN:
+                stack.append((pc + 1, trail, (idx, groups), counters))
+            elif op == CLOSE:
+                stack.append((pc + 1, trail.add(a[0], groups[0], idx, a[1]), groups[1], counters))
+            elif op == CPUSH or op == CLOOP or op == CSTEP or op == CPOP:
+                _count(stack, op, a, b, pc, idx, trail, groups, counters)
+            else:
+                threads.append((pc, trail, groups, counters, origin))
+
+    def _consumes(self, op: int, a, inputSeq: Sequence[T], idx: int) -> bool:
+        """:meta private:"""
+        if op == ITEM:
+            return inputSeq[idx] == a
+        elif op == ONEOF:
+            return inputSeq[idx] in a
+        elif op == ANY:
+            return True
+        elif op == IFITEM:
+            return bool(a(inputSeq[idx]))
+        elif op == IFNEXT:
+            return idx + 1 < len(inputSeq) and bool(a(inputSeq[idx], inputSeq[idx + 1]))
+        elif op == IFPREV:
+            return idx > 0 and bool(a(inputSeq[idx], inputSeq[idx - 1]))
+        elif op == IFAT:
+            return bool(a(inputSeq, idx))
+        return False
+
+    def matches(self, inputSeq: Sequence[T], namespace: bool=True, start=True, end=True, history=None, spans=False, maxSteps: int | None=None, deadline: float | None=None) -> bool | SimpleNamespace:
+        """
+        Returns truthy if the pattern matches the inputSeq, exactly as the
+        `matches` method of the original pattern does. Each thread at each
+        position counts as one step towards maxSteps.
+        """
+        found = self._run(inputSeq, namespace, start, end, makeBudget(maxSteps, deadline))
+        if found is None:
+            return False
+        return found.namespace(inputSeq, history=history, spans=spans)
+
+    def _run(self, inputSeq: Sequence[T], namespace: bool, start, end, budget: Budget | None=None) -> Trail | None:
+        """
+        Returns the trail of the match that `matches` finds, or None.
+        :meta private:
+        """
+        found = self._search(inputSeq, namespace, start, end, budget=budget)
+        return None if found is None else found[2]
+
+    def _search(self, inputSeq: Sequence[T], namespace: bool, start, end, pos: int=0, longest=False, budget: Budget | None=None) -> tuple[int, int, Trail] | None:
+        """
+        Returns the start, end and trail of the match that `matches` finds
+        when the search begins at pos, or None. If longest is True then the
+        match is instead the longest of those that start at the leftmost
+        position where there is a match, or the first of them if there is a
+        tie.
+        :meta private:
+        """
+        code = self._program.code
+        n = len(inputSeq)
+        trail0: Trail = StartCaptureTrail() if namespace else DiscardTrail()
+        threads: list = []
+        visited: set = set()
+        self._follow(threads, visited, 0, pos, trail0, None, None, pos)
+        found: tuple[int, int, Trail] | None = None
+        for idx in range(pos, n + 1):
+            if not start and found is None and idx > pos:
+                # An unanchored search is a new thread of the lowest priority.
+                self._follow(threads, visited, 0, idx, trail0, None, None, idx)
+            if not threads:
+                break
+            if budget is not None:
+                budget.charge(len(threads), idx)
+            next_threads: list = []
+            next_visited: set = set()
+            for pc, trail, groups, counters, origin in threads:
+                if found is not None and origin > found[0]:
+                    # The threads are in order of their start, so none of the
+                    # rest can start as far left as the match.
+                    break
+                op, a, _ = code[pc]
+                if op == MATCH:
+                    if not end or idx == n:
+                        if not longest:
+                            # Cut off all the threads of lower priority.
+                            found = origin, idx, trail
+                            break
+                        if found is None or origin < found[0] or idx > found[1]:
+                            found = origin, idx, trail
+                elif idx < n and self._consumes(op, a, inputSeq, idx):
+                    self._follow(next_threads, next_visited, pc + 1, idx + 1, trail, groups, counters, origin)
+            threads, visited = next_threads, next_visited
+        return found
+
+    def _matchEnds(self, inputSeq: Sequence[T], pos: int=0, budget: Budget | None=None) -> Iterator[int]:
+        """
+        Returns a generator of the positions, in increasing order, at which
+        the matches that start at pos end. It stops as soon as no thread is
+        left, so it only looks as far as a match could reach.
+        :meta private:
+        """
+        code = self._program.code
+        n = len(inputSeq)
+        threads: list = []
+        self._follow(threads, set(), 0, pos, DiscardTrail(), None, None, pos)
+        for idx in range(pos, n + 1):
+            if not threads:
+                return
+            if budget is not None:
+                budget.charge(len(threads), idx)
+            next_threads: list = []
+            next_visited: set = set()
+            matched = False
+            for pc, trail, groups, counters, origin in threads:
+                op, a, _ = code[pc]
+                if op == MATCH:
+                    matched = True
+                elif idx < n and self._consumes(op, a, inputSeq, idx):
+                    self._follow(next_threads, next_visited, pc + 1, idx + 1, trail, groups, counters, origin)
+            if matched:
+                yield idx
+            threads = next_threads
+
+    def scan(self, inputSeq: Sequence[T], namespace: bool=True, longest=False, spans=False, maxSteps: int | None=None, deadline: float | None=None) -> Iterator[tuple[int, int, bool | SimpleNamespace]]:
+        """
+        Returns a generator of the non-overlapping matches of the pattern in
+        the inputSeq, exactly as the `scan` method of the original pattern.
+        """
+        budget = makeBudget(maxSteps, deadline)
+        return scanMatches(lambda pos: self._search(inputSeq, namespace, False, False, pos, longest, budget), inputSeq, spans)
+
+    def findAllMatches(self, inputSeq: Sequence[T], namespace: bool=True, start=True, end=True, spans=False, maxSteps: int | None=None, deadline: float | None=None) -> Iterator[bool | SimpleNamespace]:
+        """
+        Returns a generator that will find the matches of the pattern in the
+        inputSeq, in the same order as the original pattern, returning only
+        one match for each distinct start and end position.
+        """
+        budget = makeBudget(maxSteps, deadline)
+        search = PikeSearch(self, inputSeq, namespace=namespace, start=start, end=end, spans=spans, budget=budget)
+        for _ in range(len(inputSeq)):
+            if search.isFinished():
+                return
+            yield from search.step()
+        yield from search.finish()
+
+
+class PikeSearch(Generic[T]):
+    """
+    A single left-to-right search for the matches of a compiled pattern,
+    which is advanced one position at a time. When the search is unanchored
+    every start position is tracked at the same time. The matches are found
+    in the same order as the `findAllMatches` method of the original pattern,
+    but with only one match for each distinct start and end position.
+
+    The list of live threads is ordered by start position and then by
+    priority, and is interleaved with runs of completed matches. A run is
+    held back until there is no live thread of higher priority.
+
+    If maxStarts is given then only the threads of the first maxStarts live
+    start positions are kept apart. The threads of later start positions
+    are merged into any thread of an earlier one at the same instruction,
+    just as a leftmost search does, so there are at most about maxStarts
+    times as many threads as instructions, but the matches that only the
+    merged threads would have found are lost.
+    """
+
+    def __init__(self, vm: PikeVM[T], inputSeq: Sequence[T], namespace: bool=True, start=True, end=True, spans=False, budget: Budget | None=None, maxStarts: int | None=None):
+        if maxStarts is not None and maxStarts < 1:
+            raise ValueError('The maxStarts must be at least 1')
+        self._code = vm._program.code
+        self._consumes = vm._consumes
+        self._inputSeq = inputSeq
+        self._trail0: Trail = StartCaptureTrail() if namespace else DiscardTrail()
+        self._start = start
+        self._end = end
+        self._spans = spans
+        self._idx = 0
+        self._steps = 0
+        self._budget = budget
+        self._maxStarts = maxStarts
+        self._entries: list = []
+        self._follow(self._entries, set(), set(), 0, 0, self._trail0, None, None, 0, False)
+
+    def position(self) -> int:
+        """Returns the position of the next item to be examined."""
+        return self._idx
+
+    def steps(self) -> int:
+        """Returns the number of thread steps that have been taken."""
+        return self._steps
+
+    def threads(self) -> int:
+        """Returns the number of live threads."""
+        return sum(1 for e in self._entries if type(e) is not deque)
+
+    def earliestStart(self) -> int:
+        """
+        Returns the earliest start position of a live thread, or the current
+        position if there are none.
+        """
+        for e in self._entries:
+            if type(e) is not deque:
+                return e[4]
+        return self._idx
+
+    def isFinished(self) -> bool:
+        """Returns True if no more matches can be found."""
+        return self._start and not self._entries
+
+    def _follow(self, entries: list, visited: set, occupied: set, pc: int, idx: int, trail: Trail, groups, counters, origin: int, merge: bool):
+        """
+        Adds the thread that started at origin and is now at pc, plus all of
+        the threads that it can reach without consuming any input, to the
+        entries in priority order. The occupied set holds the places that
+        any thread has reached; if merge is True then the thread is dropped
+        at those places, in favour of the thread of an earlier start.
+        :meta private:
+        """
+        code = self._code
+        stack = [(pc, trail, groups, counters)]
+        while stack:
+            pc, trail, groups, counters = stack.pop()
+            place = pc if counters is None else (pc, counters)
+            if merge and place in occupied:
+                continue
+            key = (origin, place)
+            if key in visited:
+                continue
+            visited.add(key)
+            occupied.add(place)
+            op, a, b = code[pc]
+            if op == SPLIT:
+                stack.append((b, trail, groups, counters))
+                stack.append((a, trail, groups, counters))
+            elif op == JMP:
+                stack.append((a, trail, groups, counters))
+            elif op == MARK or op == PROGRESS:
+                stack.append((pc + 1, trail, groups, counters))
+            elif op == OPEN:
+                stack.append((pc + 1, trail, (idx, groups), counters))
+            elif op == CLOSE:
+                stack.append((pc + 1, trail.add(a[0], groups[0], idx, a[1]), groups[1], counters))
+            elif op == CPUSH or op == CLOOP or op == CSTEP or op == CPOP:
+                _count(stack, op, a, b, pc, idx, trail, groups, counters)
+            elif op == MATCH and not self._end:
+                _appendResults(entries, deque((trail.namespace(self._inputSeq, spans=self._spans),)))
+            else:
+                entries.append((pc, trail, groups, counters, origin))
+
+    def _ready(self) -> list:
+        """
+        Removes and returns the matches that no live thread can precede.
+        :meta private:
+        """
+        entries = self._entries
+        if entries and type(entries[0]) is deque:
+            return list(entries.pop(0))
+        return []
+
+    def step(self) -> list:
+        """
+        Examines the item at the current position and returns the matches
+        that have been decided. For IfNext the following item must be
+        available, if there is one.
+        """
+        code = self._code
+        idx = self._idx
+        inputSeq = self._inputSeq
+        next_entries: list = []
+        next_visited: set = set()
+        occupied: set = set()
+        # Each instruction only has to test the item once, however many
+        # threads are at it.
+        tested: dict[int, bool] = {}
+        maxStarts = self._maxStarts
+        starts = 0
+        last = -1
+        merge = False
+        self._steps += len(self._entries)
+        if self._budget is not None:
+            self._budget.charge(len(self._entries), idx)
+        for e in self._entries:
+            if type(e) is deque:
+                _appendResults(next_entries, e)
+                continue
+            pc, trail, groups, counters, origin = e
+            if maxStarts is not None and origin != last:
+                last = origin
+                starts += 1
+                merge = starts > maxStarts
+            op, a, _ = code[pc]
+            if op == MATCH:
+                continue
+            ok = tested.get(pc)
+            if ok is None:
+                ok = tested[pc] = self._consumes(op, a, inputSeq, idx)
+            if ok:
+                self._follow(next_entries, next_visited, occupied, pc + 1, idx + 1, trail, groups, counters, origin, merge)
+        self._idx = idx = idx + 1
+        if not self._start:
+            # An unanchored search is a new thread of the lowest priority.
+            self._follow(next_entries, next_visited, occupied, 0, idx, self._trail0, None, None, idx, maxStarts is not None and starts >= maxStarts)
+        self._entries = next_entries
+        return self._ready()
+
+    def finish(self) -> list:
+        """
+        Ends the search at the current position, which is the end of the
+        input, and returns the remaining matches.
+        """
+        results: list = []
+        for e in self._entries:
+            if type(e) is deque:
+                results.extend(e)
+            elif self._code[e[0]][0] == MATCH:
+                results.append(e[1].namespace(self._inputSeq, spans=self._spans))
+        self._entries = []
+        return results
+
+
+def _count(stack: list, op: int, a, b, pc: int, idx: int, trail: Trail, groups, counters):
+    """
+    Pushes the threads that follow from one of the instructions of a counted
+    repeat onto the stack, in the same way as the backtracker. The counters
+    hold the count of each counted repeat that the thread is inside and the
+    position where its current iteration started.
+    :meta private:
+    """
+    if op == CPUSH:
+        stack.append((pc + 1, trail, groups, (0, counters)))
+    elif op == CPOP:
+        stack.append((pc + 1, trail, groups, counters[1]))
+    elif op == CLOOP:
+        count = counters[0]
+        if count >= a[0]:
+            stack.append((b, trail, groups, counters))
+        if count < a[0] or a[1] is None or count < a[1]:
+            stack.append((pc + 1, trail, groups, (idx, counters)))
+    else:
+        begin, (count, outer) = counters
+        if count < a[0] or idx > begin:
+            stack.append((b, trail, groups, (nextCount(count, a), outer)))
+
+
+def _appendResults(entries: list, results: deque):
+    """
+    Appends a run of results to the entries, merging the smaller of two
+    adjacent runs into the larger.
+    :meta private:
+    """
+    if entries and type(entries[-1]) is deque:
+        last = entries[-1]
+        if len(last) >= len(results):
+            last.extend(results)
+        else:
+            results.extendleft(reversed(last))
+            entries[-1] = results
+    else:
+        entries.append(results)
@@ -0,0 +1,82 @@
+import threading
+from typing import Callable
+
+
+class PredicateCache:
+    """
+    Remembers the result of each IfItem and IfNext predicate at each position
+    of the input, so that during one call of `matches` or `findAllMatches`
+    with the option cachePredicates each predicate is called at most once per
+    position. It counts the number of times that a result was found in the
+    cache (hits) and had to be worked out (misses).
+
+    The results are forgotten, and the counts reset, at the start of each
+    call that uses the cache.
+    """
+
+    def __init__(self):
+        self._results: dict[tuple[int, int], bool] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self):
+        return len(self._results)
+
+    def hits(self) -> int:
+        """Returns the number of predicate calls that were avoided."""
+        return self._hits
+
+    def misses(self) -> int:
+        """Returns the number of predicate calls that were made."""
+        return self._misses
+
+    def clear(self):
+        """Forgets all the results and resets the counts."""
+        self._results.clear()
+        self._hits = 0
+        self._misses = 0
+
+    def lookup(self, node, idx: int, test: Callable[[], bool]) -> bool:
+        """
+        Returns the result of the predicate of node at idx, calling test to
+        work it out if it is not already known.
+        :meta private:
+        """
+        key = (id(node), idx)
+        result = self._results.get(key)
+        if result is None:
+            self._misses += 1
+            result = self._results[key] = test()
+        else:
+            self._hits += 1
+        return result
+
+
+class CacheSlot(threading.local):
+    """
+    Holds the PredicateCache that the cached predicates of a pattern look
+    their results up in. The pattern with the cached predicates is made once
+    and shared, so each call of `matches` or `findAllMatches` puts its own
+    cache in the slot while it runs. The slot holds a separate cache for
+    each thread.
+    :meta private:
+    """
+
+    def __init__(self):
+        self.cache: PredicateCache | None = None
+
+    def hold(self, cache: PredicateCache | None) -> PredicateCache | None:
+        """
+        Puts cache in the slot and returns the cache that was there before,
+        which is put back when the call is done.
+        """
+        previous = self.cache
+        self.cache = cache
+        return previous
+
+    def lookup(self, node, idx: int, test: Callable[[], bool]) -> bool:
+        """Looks the result up in the cache of the current call."""
+        cache = self.cache
+        if cache is None:
+            raise ValueError('A pattern with cached predicates was matched without a PredicateCache')
+        return cache.lookup(node, idx, test)
@@ -0,0 +1,63 @@
+import importlib
+from typing import Callable
+
+_REGISTRY: dict[str, Callable] = {}
+
+
+def registerPredicate(name: str, predicateFunction: Callable) -> 'NamedPredicate':
+    """
+    Registers the predicateFunction under name and returns a NamedPredicate
+    that calls it. Unlike a lambda, the NamedPredicate can be pickled, so a
+    pattern that uses it can be sent to another process. It is pickled by
+    name, so the other process must register the same name too, which
+    happens automatically if the registration is done when the module that
+    contains it is imported.
+    """
+    old = _REGISTRY.get(name)
+    if old is not None and old is not predicateFunction:
+        raise ValueError(f'A different predicate is already registered as {name!r}')
+    _REGISTRY[name] = predicateFunction
+    return NamedPredicate(name, getattr(predicateFunction, '__module__', None))
+
+
+class NamedPredicate:
+    """
+    A picklable reference to a predicate that was registered with
+    `registerPredicate`. It is called just like the predicate itself.
+    """
+
+    def __init__(self, name: str, module: str | None = None):
+        self._name = name
+        self._module = module
+        self._function: Callable | None = None
+
+    def name(self) -> str:
+        return self._name
+
+    def __call__(self, *args):
+        f = self._function
+        if f is None:
+            f = self._function = self._lookup()
+        return f(*args)
+
+    def _lookup(self) -> Callable:
+        """:meta private:"""
+        f = _REGISTRY.get(self._name)
+        if f is None and self._module is not None:
+            # Importing the module that registered the predicate registers it
+            # in this process too.
+            importlib.import_module(self._module)
+            f = _REGISTRY.get(self._name)
+        if f is None:
+            raise LookupError(f'No predicate is registered as {self._name!r}')
+        return f
+
+    def __getstate__(self):
+        return (self._name, self._module)
+
+    def __setstate__(self, state):
+        self._name, self._module = state
+        self._function = None
+
+    def __repr__(self):
+        return f'NamedPredicate({self._name!r})'
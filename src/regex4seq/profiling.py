@@ -0,0 +1,116 @@
+from typing import Any, Callable, Iterator
+
+
+class NodeStats:
+    """
+    The counts for one node of a profiled pattern: the number of times that
+    matching it was started (entries), the number of matches it found
+    (results), the number of those matches that were rejected by the
+    pattern around it, which then asked for another (backtracks), the
+    number of calls of its predicate or suchthat function, and the time in
+    seconds spent matching it, including its sub-patterns. The stats of the
+    sub-patterns are in children, in the same order as the pattern's.
+    """
+    __slots__ = ('node', 'children', 'entries', 'results', 'backtracks', 'predicateCalls', 'suchthatCalls', 'seconds')
+
+    def __init__(self, node):
+        self.node = node
+        self.children: list[NodeStats] = []
+        self.entries = 0
+        self.results = 0
+        self.backtracks = 0
+        self.predicateCalls = 0
+        self.suchthatCalls = 0
+        self.seconds = 0.0
+
+    def walk(self, depth: int = 0) -> Iterator[tuple[int, 'NodeStats']]:
+        """
+        Returns a generator of this node and all the nodes below it, in
+        depth-first order, each with its depth.
+        """
+        stack = [(depth, self)]
+        while stack:
+            d, stats = stack.pop()
+            yield d, stats
+            stack.extend((d + 1, c) for c in reversed(stats.children))
+
+    def selfSeconds(self) -> float:
+        """
+        Returns the time spent matching this node, not counting the time
+        spent in its sub-patterns.
+        """
+        return max(0.0, self.seconds - sum(c.seconds for c in self.children))
+
+
+class ProfileStats:
+    """
+    Collects the counts for each node of the patterns that are matched with
+    the option profile, such as `pattern.matches(inputSeq, profile=stats)`.
+    A sub-pattern that is used in several places is counted separately in
+    each place. The counts add up over all the calls that use the same
+    ProfileStats, until it is cleared.
+
+    Profiling rewrites the pattern so that every node is measured, and the
+    rewritten pattern is always matched by the backtracker, never by the
+    other compiled engines, so it is slower than matching without it.
+    """
+
+    def __init__(self):
+        self._patterns: dict[int, tuple[Any, NodeStats, Any]] = {}
+
+    def clear(self):
+        """Forgets all the counts."""
+        self._patterns.clear()
+
+    def root(self, pattern) -> NodeStats | None:
+        """
+        Returns the stats of the top node of the pattern, or None if the
+        pattern has not been profiled.
+        """
+        entry = self._patterns.get(id(pattern))
+        return entry[1] if entry is not None else None
+
+    def render(self, pattern=None) -> str:
+        """
+        Returns the tree of the pattern, or of every profiled pattern if
+        pattern is None, with each node annotated with its counts. The time
+        is given both for the node and its sub-patterns (total) and for the
+        node alone (self).
+        """
+        header = f'{"node":<40} {"entries":>9} {"results":>9} {"backtracks":>10} {"predicates":>10} {"suchthat":>9} {"total ms":>10} {"self ms":>10}'
+        lines = [header]
+        roots = [self.root(pattern)] if pattern is not None else [e[1] for e in self._patterns.values()]
+        for root in roots:
+            if root is None:
+                continue
+            for depth, s in root.walk():
+                label = '  ' * depth + s.node._label()
+                if len(label) > 40:
+                    label = label[:37] + '...'
+                lines.append(f'{label:<40} {s.entries:>9} {s.results:>9} {s.backtracks:>10} {s.predicateCalls:>10} {s.suchthatCalls:>9} {s.seconds * 1000:>10.3f} {s.selfSeconds() * 1000:>10.3f}')
+        return '\n'.join(lines)
+
+    def _profiled(self, pattern, build: Callable[[NodeStats], Any]) -> Any:
+        """
+        Returns the rewritten version of the pattern, calling build with the
+        stats of its top node to make it the first time.
+        :meta private:
+        """
+        entry = self._patterns.get(id(pattern))
+        if entry is None:
+            root = NodeStats(pattern)
+            # The pattern is kept so that its id cannot be reused.
+            entry = self._patterns[id(pattern)] = (pattern, root, build(root))
+        return entry[2]
+
+
+def countCalls(f: Callable, stats: NodeStats, counter: str) -> Callable:
+    """
+    Returns a function that calls f and adds one to the named counter of the
+    stats each time.
+    :meta private:
+    """
+    def counted(*args):
+        setattr(stats, counter, getattr(stats, counter) + 1)
+        return f(*args)
+    return counted
@@ -0,0 +1,135 @@
+from typing import Any
+
+# Opcodes of the instruction set that patterns are lowered into. Each
+# instruction is a tuple (opcode, a, b) whose operands depend on the opcode.
+ITEM = 0        # consume an item equal to a
+ONEOF = 1       # consume an item that is in the set a
+ANY = 2         # consume any item
+IFITEM = 3      # consume an item x such that a(x)
+IFNEXT = 4      # consume an item x, with y next, such that a(x, y)
+SPLIT = 5       # continue at a, or failing that at b
+JMP = 6         # continue at a
+MARK = 7        # remember the position at the start of a repeat
+PROGRESS = 8    # fail unless the repeat consumed something since MARK
+OPEN = 9        # remember the position at the start of a match group
+CLOSE = 10      # capture from OPEN as the name a, a[1] is extract, b is suchthat
+MATCH = 11      # the pattern has matched
+FAIL = 12       # the pattern cannot match
+CPUSH = 13      # start counting the iterations of a counted repeat
+CLOOP = 14      # a is (min, max): iterate, or continue at b, as the count allows
+CSTEP = 15      # count an iteration and continue at b, a is (min, max)
+CPOP = 16       # stop counting
+IFPREV = 17     # consume an item x, with y before it, such that a(x, y)
+IFAT = 18       # consume the item at position i of the input s such that a(s, i)
+PENTER = 19     # start profiling the node with stats a, skipping its PLEAVE
+PLEAVE = 20     # the node with stats a has no more matches
+PEXIT = 21      # the node with stats a has matched, skipping its PRESUME
+PRESUME = 22    # the match of the node with stats a was rejected
+
+CONSUMERS = frozenset((ITEM, ONEOF, ANY, IFITEM, IFNEXT, IFPREV, IFAT))
+
+
+class CompileError(ValueError):
+    """
+    Raised when a pattern uses a construct that a compiled matching engine
+    cannot handle. The pattern can still be matched with its own `matches`
+    and `findAllMatches` methods.
+    """
+
+
+class Program:
+    """
+    A flat instruction program produced by lowering a pattern tree. The
+    instructions are shared by the compiled matching engines.
+    """
+
+    def __init__(self, code: list[tuple[int, Any, Any]], guarded: bool, counted: bool=False):
+        self.code = code
+        self.guarded = guarded
+        self.counted = counted
+        self._closures: list[tuple[int, ...]] | None = None
+
+    def __len__(self):
+        return len(self.code)
+
+    def closures(self) -> list[tuple[int, ...]]:
+        """
+        Returns, for each instruction, the instructions that consume an item,
+        or match, that can be reached from it without consuming any input.
+        Match groups, the checks that repetitions make progress and the
+        limits of counted repeats are ignored, so the closures may include
+        instructions that cannot actually be reached. They are listed in
+        priority order and are remembered.
+        """
+        if self._closures is None:
+            code = self.code
+            closures = []
+            for pc in range(len(code)):
+                found = []
+                visited = set()
+                stack = [pc]
+                while stack:
+                    p = stack.pop()
+                    if p in visited:
+                        continue
+                    visited.add(p)
+                    op, a, b = code[p]
+                    if op == SPLIT:
+                        stack.append(b)
+                        stack.append(a)
+                    elif op == CLOOP:
+                        stack.append(b)
+                        stack.append(p + 1)
+                    elif op == JMP or op == CSTEP:
+                        stack.append(a if op == JMP else b)
+                    elif op == MARK or op == PROGRESS or op == OPEN or op == CLOSE or op == CPUSH or op == CPOP:
+                        stack.append(p + 1)
+                    elif op == PENTER or op == PEXIT:
+                        stack.append(p + 2)
+                    elif op != FAIL and op != PLEAVE and op != PRESUME:
+                        found.append(p)
+                closures.append(tuple(found))
+            self._closures = closures
+        return self._closures
+
+
+class ProgramBuilder:
+    """
+    Accumulates the instructions emitted by the `_emit` methods of the
+    pattern nodes.
+    """
+
+    def __init__(self):
+        self._code: list[tuple[int, Any, Any]] = []
+        self._guarded = False
+        self._counted = False
+
+    def here(self) -> int:
+        return len(self._code)
+
+    def emit(self, op: int, a: Any = None, b: Any = None) -> int:
+        self._code.append((op, a, b))
+        return len(self._code) - 1
+
+    def patch(self, pc: int, a: Any = None, b: Any = None):
+        op, a0, b0 = self._code[pc]
+        self._code[pc] = (op, a0 if a is None else a, b0 if b is None else b)
+
+    def guard(self):
+        """Records that the program contains suchthat guards."""
+        self._guarded = True
+
+    def count(self):
+        """Records that the program contains counted repeats."""
+        self._counted = True
+
+    def build(self) -> Program:
+        self.emit(MATCH)
+        return Program(self._code, self._guarded, self._counted)
+
+
+def compileProgram(pattern) -> Program:
+    """Lowers a pattern tree into a Program."""
+    builder = ProgramBuilder()
+    pattern._emit(builder)
+    return builder.build()
@@ -0,0 +1,190 @@
+import mmap
+import struct
+from collections.abc import Sequence
+from typing import Any, Iterator
+
+# The struct formats that memoryview can cast to, for which indexing the
+# records is done in C.
+_CASTABLE = frozenset('bBhHiIlLqQnNfd?')
+
+# The formats whose values compare equal exactly when they are packed into
+# the same bytes, so that literals can be found in the raw buffer.
+_INTEGRAL = frozenset('bBhHiIlLqQnN')
+
+
+class RecordArray(Sequence):
+    """
+    A read-only sequence of the fixed-width binary records in a buffer, such
+    as bytes, a memoryview or an mmap, which are decoded with a struct format
+    only when they are read. Each item is the field of the record given by
+    field, or if field is None, the record itself: a single value if the
+    format has only one, otherwise a tuple. The first offset bytes of the
+    buffer are skipped, and so is a partial record at the end.
+
+    Slicing with a step of 1 returns another RecordArray over the same
+    buffer, so the captures of a match do not copy the records. Files can
+    be matched without loading them into memory with `RecordArray.open`.
+    """
+    __slots__ = ('_buffer', '_struct', '_field', '_single', '_raw', '_fast', '_base', '_count', '_file')
+
+    def __init__(self, buffer, format: str, field: int | None=None, offset: int=0, count: int | None=None):
+        layout = struct.Struct(format)
+        raw = memoryview(buffer).cast('B')
+        size = layout.size
+        if size == 0:
+            raise ValueError('The format of a record cannot be empty')
+        available = max(0, (len(raw) - offset) // size)
+        if count is None:
+            count = available
+        elif not 0 <= count <= available:
+            raise ValueError(f'The buffer holds {available} records, not {count}')
+        width = len(layout.unpack(bytes(size)))
+        if field is not None and not -width <= field < width:
+            raise IndexError(f'The records only have {width} fields')
+        self._buffer = buffer
+        self._struct = layout
+        self._field = field
+        self._single = width == 1
+        self._base = offset
+        self._count = count
+        self._raw = raw[offset:offset + count * size]
+        self._fast = self._cast(format)
+        self._file: Any = None
+
+    @classmethod
+    def open(cls, path, format: str, field: int | None=None, offset: int=0) -> 'RecordArray':
+        """
+        Returns a RecordArray over the records of the file at path, which is
+        mapped into memory read-only rather than read. It should be closed,
+        or used in a with statement, when it is no longer needed.
+        """
+        f = open(path, 'rb')
+        try:
+            buffer: Any = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file cannot be mapped.
+            buffer = b''
+        records = cls(buffer, format, field=field, offset=offset)
+        records._file = f
+        return records
+
+    def close(self):
+        """
+        Releases the buffer and, if it was opened with `RecordArray.open`,
+        closes the file. The records cannot be read afterwards, but slices
+        and captures that are still in use can: they keep the memory that
+        they share mapped until the last of them is gone.
+        """
+        try:
+            for view in (self._fast, self._raw):
+                if view is not None:
+                    view.release()
+            if self._file is not None and isinstance(self._buffer, mmap.mmap):
+                try:
+                    self._buffer.close()
+                except BufferError:
+                    # The mapping is still exported to slices or captures,
+                    # and is unmapped when they are garbage collected.
+                    pass
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> 'RecordArray':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _cast(self, format: str) -> memoryview | None:
+        """
+        Returns the records as a memoryview of the values, if each record is
+        one value in the native layout, or else None.
+        :meta private:
+        """
+        code = format[1:] if format[:1] == '@' else format
+        if code in _CASTABLE and self._field in (None, 0, -1):
+            return self._raw.cast(code)  # type: ignore[call-overload]
+        return None
+
+    def select(self, field: int | None) -> 'RecordArray':
+        """
+        Returns the same records with each item being the given field, or
+        the whole record if field is None.
+        """
+        r = RecordArray(self._raw, self._struct.format, field=field)
+        r._buffer = self._buffer
+        r._base = self._base
+        return r
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            lo, hi, step = i.indices(self._count)
+            if step != 1:
+                return [self[k] for k in range(lo, hi, step)]
+            size = self._struct.size
+            hi = max(lo, hi)
+            r = RecordArray(self._raw[lo * size:hi * size], self._struct.format, field=self._field)
+            r._buffer = self._buffer
+            r._base = self._base + lo * size
+            return r
+        if self._fast is not None:
+            return self._fast[i]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('RecordArray index out of range')
+        return self._pick(self._struct.unpack_from(self._raw, i * self._struct.size))
+
+    def _pick(self, values: tuple) -> Any:
+        """:meta private:"""
+        if self._field is not None:
+            return values[self._field]
+        return values[0] if self._single else values
+
+    def __iter__(self) -> Iterator:
+        if self._fast is not None:
+            return iter(self._fast)
+        return map(self._pick, self._struct.iter_unpack(self._raw))
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or len(other) != len(self):
+            return NotImplemented if not isinstance(other, Sequence) else False
+        return all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self):
+        return f'RecordArray({self._struct.format!r}, {self._count} records)'
+
+    def _literalPositions(self, literal: tuple) -> Iterator[int] | None:
+        """
+        Returns a generator of the positions at which the literal occurs,
+        found by searching the raw buffer for the packed literal, or None if
+        that cannot be done.
+        :meta private:
+        """
+        code = self._struct.format.lstrip('@=<>!')
+        if not (self._single and code in _INTEGRAL and hasattr(self._buffer, 'find')):
+            return None
+        try:
+            needle = b''.join(self._struct.pack(x) for x in literal)
+        except struct.error:
+            return None
+        return self._findAll(needle)
+
+    def _findAll(self, needle: bytes) -> Iterator[int]:
+        """:meta private:"""
+        size = self._struct.size
+        base = self._base
+        stop = base + self._count * size
+        p = self._buffer.find(needle, base, stop)
+        while p >= 0:
+            k, misaligned = divmod(p - base, size)
+            if not misaligned:
+                yield k
+            p = self._buffer.find(needle, p + 1, stop)
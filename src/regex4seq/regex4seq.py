@@ -1,8 +1,30 @@
 from abc import ABC, abstractmethod
-from typing import Callable, Iterator, Sequence, Annotated, TypeVar, Generic
+import time
+from concurrent.futures import Executor
+from numbers import Integral
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Sequence, Annotated, TypeVar, Generic
 from types import SimpleNamespace
 
 from .trail import Trail, DiscardTrail, StartCaptureTrail
+from .program import Program, ProgramBuilder, CompileError, compileProgram
+from .program import ITEM, ONEOF, ANY as ANY_OP, IFITEM, IFNEXT, IFPREV, SPLIT, JMP, MARK, PROGRESS, OPEN, CLOSE, FAIL as FAIL_OP
+from .program import CPUSH, CLOOP, CSTEP, CPOP, IFAT, PENTER, PLEAVE, PEXIT, PRESUME
+from .pikevm import PikeVM
+from .backtrack import backtrack
+from .analysis import Analysis, EMPTY, IMPOSSIBLE, ANY_ITEM, ANY_ITEMS, itemsAnalysis
+from .scan import BacktrackScanner, scanMatches
+from .lazydfa import LazyDFA
+from .startscan import StartScanner
+from .memo import Memo, MemoFull, addEnds
+from .literal import literalPositions
+from .stream import afindAllMatches
+from .predcache import PredicateCache, CacheSlot
+from .profiling import ProfileStats, NodeStats, countCalls
+from .span import isArray, ReversedView
+from .vectorized import vectorize, equalityMask, scalarMask, scalarPredicate
+from .batch import matchMany, searchParallel
+from .cache import INTERNED, COMPILED
+from .budget import Budget, limitsOf, makeBudget
 
 T = TypeVar("T")
 
@@ -11,8 +33,13 @@ class RegEx4Seq(ABC, Generic[T]):
     RegEx4Seq is a regular expression pattern that matches against a sequence
     of items.
     """
+    __slots__ = ('_cachedProgram', '_cachedAnalysis', '_cachedHash')
 
-    def matches(self, inputSeq: Sequence[T], namespace: bool=True, start=True, end=True, history=None) -> bool | SimpleNamespace:
+    _cachedProgram: Program | None
+    _cachedAnalysis: Analysis
+    _cachedHash: int
+
+    def matches(self, inputSeq: Sequence[T], namespace: bool=True, start=True, end=True, history=None, memo=False, memoLimit=100000, cachePredicates: 'bool | PredicateCache'=False, spans=False, profile: ProfileStats | None=None, maxSteps: int | None=None, deadline: float | None=None) -> bool | SimpleNamespace:
         """
         Returns truthy if the pattern matches the inputSeq. If namespace is
         set to True, then a namespace object is returned that contains the
@@ -21,25 +48,453 @@ class RegEx4Seq(ABC, Generic[T]):
         If start is truthy then the pattern is anchored at the start. If end
         is truthy then the pattern is anchored at the end. If both start and
         end are truthy then the pattern must match the entire inputSeq.
+
+        If memo is truthy then the positions that each part of the pattern
+        can reach from each position are remembered, so that they are only
+        worked out once. This requires namespace to be False. At most
+        memoLimit end positions are remembered in all; if more are needed the
+        memo is dropped and the search is done without it.
+
+        If cachePredicates is truthy then the result of each IfItem and IfNext
+        predicate at each position is remembered, so that each predicate is
+        called at most once per item. Passing a PredicateCache, rather than
+        True, allows the number of hits and misses to be inspected afterwards.
+
+        If spans is truthy then each binding is a Span, which holds the start
+        and end positions of the capture and only works out the captured 
+        value, without copying the input, when its value attribute is read.
+
+        If profile is a ProfileStats then the number of times that each node
+        of the pattern is tried, the matches that it finds, the backtracks,
+        the predicate calls and the time spent are added to it. Its method
+        render shows the pattern tree annotated with those counts.
+
+        If maxSteps is given then the match is abandoned, by raising
+        MatchBudgetExceeded, once it has taken more than that many steps,
+        where a step is roughly one backtrack. If deadline is given then it is
+        abandoned in the same way once the clock of `time.monotonic` passes
+        the deadline. The exception says how far the match got.
         """
+        if profile is not None:
+            profiled = self._withProfile(profile)
+            return profiled.matches(inputSeq, namespace=namespace, start=start, end=end, history=history, memo=memo, memoLimit=memoLimit, cachePredicates=cachePredicates, spans=spans, maxSteps=maxSteps, deadline=deadline)
+        if cachePredicates or isinstance(cachePredicates, PredicateCache):
+            cached, slot = self._withPredicateCache()
+            previous = slot.hold(self._clearedCache(cachePredicates))
+            try:
+                return cached.matches(inputSeq, namespace=namespace, start=start, end=end, history=history, memo=memo, memoLimit=memoLimit, spans=spans, maxSteps=maxSteps, deadline=deadline)
+            finally:
+                slot.hold(previous)
+        budget = makeBudget(maxSteps, deadline)
+        if isArray(inputSeq) and self._usesVectors():
+            v = vectorize(self, inputSeq)
+            if v is not None:
+                return v.matches(namespace=namespace, start=start, end=end, history=history, spans=spans, budget=budget)
+        if memo:
+            m = self._memo(namespace, memoLimit, budget)
+            n = len(inputSeq)
+            try:
+                for start_idx in self._startPositions(inputSeq, start, end):
+                    ends = m.reach(self, inputSeq, start_idx)
+                    if (n in ends) if end else ends:
+                        return True
+                return False
+            except MemoFull:
+                pass
+            # The memo is full, so it is dropped and the search is done again
+            # without it, by the compiled engine if the pattern allows.
+            del m
+            program = self._program()
+            if program is not None and not program.guarded:
+                return self.compile().matches(inputSeq, namespace=False, start=start, end=end, **limitsOf(budget))
+        if not start and end:
+            found = self._matchFromEnd(inputSeq, namespace, history, spans, budget)
+            if found is not None:
+                return found
         ns = StartCaptureTrail() if namespace else DiscardTrail()
-        for start_idx in range(0, 1 if start else len(inputSeq) + 1):
-            for idx, t in self._gobble(inputSeq, start_idx, ns):
+        for start_idx in self._startPositions(inputSeq, start, end):
+            for idx, t in self._backtrack(inputSeq, start_idx, ns, budget):
                 if not(end) or idx == len(inputSeq):
-                    return t.namespace(inputSeq, history=history)
+                    return t.namespace(inputSeq, history=history, spans=spans)
+        return False
+
+    def _matchFromEnd(self, inputSeq: Sequence[T], namespace: bool, history, spans, budget: Budget | None) -> bool | SimpleNamespace | None:
+        """
+        Returns the result of `matches` for start=False and end=True, found by
+        matching the reversed pattern leftwards from the end of the inputSeq,
+        or None if the pattern cannot be reversed and compiled. The reversed
+        pattern gives up as soon as no match can reach any further left, so
+        only the suffix of the inputSeq that a match could cover is looked at.
+        For a namespace, the pattern is then matched forwards from the
+        leftmost start, which is where `matches` would have found it. Finding
+        that start means reading as far left as a match can reach, so it is
+        only done when the length of a match is bounded.
+        :meta private:
+        """
+        if namespace and self.maxLength() is None:
+            return None
+        vm = COMPILED.get(('reverse', self), self._reversedVM)
+        if vm is None:
+            return None
+        ends = vm._matchEnds(ReversedView(inputSeq), 0, budget)
+        if not namespace:
+            return next(ends, None) is not None
+        furthest = None
+        for furthest in ends:
+            pass
+        if furthest is None:
+            return False
+        n = len(inputSeq)
+        for idx, t in self._backtrack(inputSeq, n - furthest, StartCaptureTrail(), budget):
+            if idx == n:
+                return t.namespace(inputSeq, history=history, spans=spans)
         return False
 
-    def findAllMatches(self, inputSeq: Sequence[T], namespace: bool=True, start=True, end=True) -> Iterator[bool | SimpleNamespace]:
+    def _reversedVM(self) -> PikeVM | None:
+        """
+        Returns the PikeVM of the reversed pattern, without its captures, or
+        None if the pattern cannot be reversed and compiled.
+        :meta private:
+        """
+        program = self._program()
+        if program is None or program.guarded:
+            return None
+        try:
+            return PikeVM(self._reversed(False))
+        except ValueError:
+            return None
+
+    def findAllMatches(self, inputSeq: Sequence[T], namespace: bool=True, start=True, end=True, memo=False, memoLimit=100000, cachePredicates: 'bool | PredicateCache'=False, spans=False, profile: ProfileStats | None=None, maxSteps: int | None=None, deadline: float | None=None) -> Iterator[bool | SimpleNamespace]:
         """
         Returns a generator that will find all matches of the pattern in the
         inputSeq. Each match is returned as a namespace object that contains
         the bindings that were captured during the match.
+
+        The options memo, memoLimit, cachePredicates, spans, profile,
+        maxSteps and deadline are the same as for `matches`. The steps are
+        counted over all the matches that are generated.
         """
+        if profile is not None:
+            profiled = self._withProfile(profile)
+            yield from profiled.findAllMatches(inputSeq, namespace=namespace, start=start, end=end, memo=memo, memoLimit=memoLimit, cachePredicates=cachePredicates, spans=spans, maxSteps=maxSteps, deadline=deadline)
+            return
+        if cachePredicates or isinstance(cachePredicates, PredicateCache):
+            cached, slot = self._withPredicateCache()
+            cache = self._clearedCache(cachePredicates)
+            results = cached.findAllMatches(inputSeq, namespace=namespace, start=start, end=end, memo=memo, memoLimit=memoLimit, spans=spans, maxSteps=maxSteps, deadline=deadline)
+            while True:
+                # The cache is only in the slot while this generator runs, as
+                # other calls may use the same pattern in between.
+                previous = slot.hold(cache)
+                try:
+                    result = next(results, None)
+                finally:
+                    slot.hold(previous)
+                if result is None:
+                    return
+                yield result
+        budget = makeBudget(maxSteps, deadline)
+        if isArray(inputSeq) and self._usesVectors():
+            v = vectorize(self, inputSeq)
+            if v is not None:
+                yield from v.findAllMatches(namespace=namespace, start=start, end=end, memo=memo, memoLimit=memoLimit, spans=spans, budget=budget)
+                return
+        if memo:
+            m: Memo | None = self._memo(namespace, memoLimit, budget)
+            n = len(inputSeq)
+            for start_idx in self._startPositions(inputSeq, start, end):
+                count = None
+                if m is not None:
+                    try:
+                        ends = m.reach(self, inputSeq, start_idx)
+                        count = ends.get(n, 0) if end else sum(ends.values())
+                    except MemoFull:
+                        # The memo is dropped, and this and the remaining
+                        # start positions are searched by the backtracker.
+                        m = None
+                if count is not None:
+                    for _ in range(count):
+                        yield True
+                else:
+                    for idx, _ in self._backtrack(inputSeq, start_idx, DiscardTrail(), budget):
+                        if not end or idx == n:
+                            yield True
+            return
         ns = StartCaptureTrail() if namespace else DiscardTrail()
-        for start_idx in range(0, 1 if start else len(inputSeq) + 1):
-            for idx, t in self._gobble(inputSeq, start_idx, ns):
+        for start_idx in self._startPositions(inputSeq, start, end):
+            for idx, t in self._backtrack(inputSeq, start_idx, ns, budget):
                 if not(end) or idx == len(inputSeq):
-                    yield t.namespace(inputSeq)
+                    yield t.namespace(inputSeq, spans=spans)
+
+    def scan(self, inputSeq: Sequence[T], namespace: bool=True, longest=False, spans=False, maxSteps: int | None=None, deadline: float | None=None) -> Iterator[tuple[int, int, bool | SimpleNamespace]]:
+        """
+        Returns a generator of the non-overlapping matches of the pattern in
+        the inputSeq, like `re.finditer`. Each match is returned as a tuple
+        of its start position, its end position and the namespace object, or
+        True if namespace is False.
+
+        The first match is the one that `matches` finds with start=False and
+        end=False, which is the one that starts furthest left. The search
+        then carries on from where that match ended, or from one item later
+        if the match was empty. If longest is True then the longest of the
+        matches that start furthest left is taken instead. The options spans,
+        maxSteps and deadline are the same as for `matches`, with the steps
+        counted over the whole scan.
+
+        Patterns that can be compiled are searched in time proportional to
+        the length of the pattern times the length of the input. Otherwise
+        the backtracker is used and, when longest is True, it tries every
+        way of matching at the leftmost start position.
+        """
+        return scanMatches(self._finder(inputSeq, namespace, longest, makeBudget(maxSteps, deadline)), inputSeq, spans)
+
+    def _finder(self, inputSeq: Sequence[T], namespace: bool, longest: bool, budget: Budget | None=None) -> Callable[[int], tuple[int, int, Trail] | None]:
+        """
+        Returns the function that `scan` uses to find the match that a
+        search from a given position finds. The positions must not go back.
+        :meta private:
+        """
+        program = self._program()
+        if program is not None and not program.guarded:
+            vm: PikeVM[T] = PikeVM(self)
+            return lambda pos: vm._search(inputSeq, namespace, False, False, pos, longest, budget)
+        return BacktrackScanner(self, inputSeq, namespace, longest, budget).find
+
+    def afindAllMatches(self, items: AsyncIterable[T], namespace: bool=True, start=True, end=True, stepBudget: int | None=None, maxStarts: int | None=100, maxSteps: int | None=None, deadline: float | None=None) -> AsyncIterator[bool | SimpleNamespace]:
+        """
+        Returns an asynchronous generator that finds the matches of the
+        pattern in the asynchronous iterable items as they arrive, for use
+        with `async for`. It works like a `StreamMatcher`, so its matches
+        differ from those of `findAllMatches` in the same ways. They are the
+        matches of the compiled pattern, which finds only one match for each
+        distinct start and end position rather than one for each way of
+        matching. Patterns with a suchthat guard cannot be compiled and raise
+        CompileError. Only maxStarts live start positions are followed
+        separately, and maxStarts=None follows all of them.
+
+        If stepBudget is given then control is handed back to the event loop
+        every time that many matching steps have been taken, so that a heavy
+        pattern does not starve other tasks. The options maxSteps and deadline
+        are the same as for a `StreamMatcher`: they limit the steps over the
+        whole stream, and MatchBudgetExceeded is raised when they run out.
+        """
+        if stepBudget is not None and stepBudget < 1:
+            raise ValueError('The stepBudget must be at least 1')
+        if maxSteps is not None and maxSteps < 0:
+            raise ValueError('The maxSteps cannot be negative')
+        return afindAllMatches(self.compile(), items, namespace=namespace, start=start, end=end, stepBudget=stepBudget, maxStarts=maxStarts, maxSteps=maxSteps, deadline=deadline)
+
+    def matchMany(self, sequences: Iterable[Sequence[T]], workers: int | None=None, chunksize: int | None=None, executor: Executor | None=None, namespace: bool=True, start=True, end=True, maxSteps: int | None=None, deadline: float | None=None) -> list[bool | SimpleNamespace]:
+        """
+        Returns the list of the results of `matches` for each of the sequences,
+        in the same order, where the matching is shared out between a pool of
+        worker processes. The arguments namespace, start, end, maxSteps and
+        deadline are the same as for `matches`, so maxSteps limits the match
+        of each sequence separately. MatchBudgetExceeded is raised if any of
+        them goes over its limits.
+
+        The number of processes defaults to the number of CPUs and can be set
+        with workers. Alternatively an existing executor, such as a
+        ProcessPoolExecutor, can be supplied and will not be shut down. The
+        sequences are sent to the workers in chunks of chunksize.
+
+        The pattern is pickled to send it to the workers and each worker only
+        unpickles it once. Predicates that are lambdas cannot be pickled and
+        must be registered with `registerPredicate` instead.
+        """
+        return matchMany(self, sequences, workers=workers, chunksize=chunksize, executor=executor, namespace=namespace, start=start, end=end, maxSteps=maxSteps, deadline=deadline)
+
+    def searchParallel(self, inputSeq: Sequence[T], workers: int | None=None, chunksize: int | None=None, executor: Executor | None=None, namespace: bool=True, longest=False, spans=False, maxSteps: int | None=None, deadline: float | None=None) -> list[tuple[int, int, bool | SimpleNamespace]]:
+        """
+        Returns the list of the matches that `scan` finds in the inputSeq,
+        in the same order, where the search of one long inputSeq is shared
+        out between a pool of worker processes. The inputSeq is split into
+        chunks of chunksize items, each of which is sent to a worker along
+        with the items after it that a match starting in the chunk may
+        reach, so that the matches that cross from one chunk into the next
+        are found. The arguments namespace, longest and spans are the same as
+        for `scan`, and workers and executor are the same as for
+        `matchMany`.
+
+        The captures are worked out in this process once the matches have
+        been found. A pattern whose maxLength is None cannot be split up in
+        this way and is scanned in this process instead.
+
+        The options maxSteps and deadline are the same as for `scan`, except
+        that maxSteps limits the search of each chunk separately, and
+        separately again the work of joining up the matches and capturing
+        them in this process.
+        """
+        return searchParallel(self, inputSeq, workers=workers, chunksize=chunksize, executor=executor, namespace=namespace, longest=longest, spans=spans, maxSteps=maxSteps, deadline=deadline)
+
+    def _withPredicateCache(self) -> 'tuple[RegEx4Seq[T], CacheSlot]':
+        """
+        Returns a copy of the pattern whose predicates look their results up
+        in the cache held by the returned slot. The copy is made, and so
+        compiled, once per pattern.
+        :meta private:
+        """
+        return COMPILED.get(('cachePredicates', self), self._predicateCachingTree)
+
+    def _predicateCachingTree(self) -> 'tuple[RegEx4Seq[T], CacheSlot]':
+        """:meta private:"""
+        slot = CacheSlot()
+        return self._transform(lambda node: node._cachingPredicate(slot)), slot
+
+    @staticmethod
+    def _clearedCache(cachePredicates: 'bool | PredicateCache') -> PredicateCache:
+        """
+        Returns the cache for a call with the option cachePredicates, cleared.
+        :meta private:
+        """
+        cache = cachePredicates if isinstance(cachePredicates, PredicateCache) else PredicateCache()
+        cache.clear()
+        return cache
+
+    def _withProfile(self, stats: ProfileStats) -> 'RegEx4Seq[T]':
+        """
+        Returns a copy of the pattern in which every node is wrapped so that
+        it counts into stats. The copy is made once per pattern and stats.
+        :meta private:
+        """
+        return stats._profiled(self, self._profiledTree)
+
+    def _profiledTree(self, stats: NodeStats) -> 'RegEx4Seq[T]':
+        """:meta private:"""
+        children = self._children()
+        stats.children = [NodeStats(c) for c in children]
+        rebuilt = tuple(c._profiledTree(cs) for c, cs in zip(children, stats.children))
+        return Profiled(self._profiledNode(stats, rebuilt), stats)
+
+    def _profiledNode(self, stats: NodeStats, children: tuple['RegEx4Seq[T]', ...]) -> 'RegEx4Seq[T]':
+        """
+        Returns a copy of this node with the given sub-patterns whose
+        predicate or suchthat function, if any, counts its calls into stats.
+        :meta private:
+        """
+        return self._rebuild(children) if children else self
+
+    def _label(self) -> str:
+        """
+        Returns a short description of this node, not including its
+        sub-patterns, for rendering the pattern tree.
+        :meta private:
+        """
+        return type(self).__name__
+
+    def _memo(self, namespace: bool, memoLimit: int, budget: Budget | None=None) -> Memo:
+        """:meta private:"""
+        if namespace:
+            raise ValueError('Memoized matching requires namespace=False')
+        return Memo(memoLimit, budget)
+
+    def _startPositions(self, inputSeq: Sequence[T], start, end) -> Iterable[int]:
+        """
+        Returns the start positions that the backtracker has to try. An
+        unanchored search makes a single left-to-right pass over the inputSeq
+        that rules out every start position from which the pattern cannot
+        match, so the backtracker is only run where it can succeed. The pass
+        skips straight to the places where the literal prefix of the pattern
+        occurs.
+        :meta private:
+        """
+        analysis = self._analysis()
+        if start:
+            return (0,) if analysis.canStartAt(inputSeq, 0, end) else ()
+        # A match must start with the literal prefix, if there is one, so
+        # only the places where the prefix occurs need to be considered.
+        prefix, _ = self._literalPrefix()
+        seeds = literalPositions(inputSeq, prefix) if prefix else None
+        # Then the positions that the length of the input, or the items that
+        # a match can start with, rule out are skipped.
+        seeds = analysis.startPositions(inputSeq, end, seeds)
+        program = self._program()
+        if program is None:
+            return range(0, len(inputSeq) + 1) if seeds is None else seeds
+        return StartScanner(program, inputSeq, end).candidates(seeds)
+
+    def _analysis(self) -> Analysis:
+        """
+        Returns what can be worked out about the matches of this pattern
+        without looking at the input. It is remembered.
+        :meta private:
+        """
+        try:
+            return self._cachedAnalysis
+        except AttributeError:
+            self._cachedAnalysis = self._analyse()
+            return self._cachedAnalysis
+
+    def _analyse(self) -> Analysis:
+        """
+        Works out the analysis of this pattern from those of its sub-patterns.
+        It is implemented for each of the subclasses of RegEx4Seq.
+        :meta private:
+        """
+        return ANY_ITEMS
+
+    def minLength(self) -> int:
+        """Returns the least number of items that a match can consume."""
+        return self._analysis().minLength
+
+    def maxLength(self) -> int | None:
+        """
+        Returns the greatest number of items that a match can consume, or None
+        if there is no limit.
+        """
+        return self._analysis().maxLength
+
+    def isNullable(self) -> bool:
+        """Returns True if the pattern can match the empty sequence."""
+        return self._analysis().nullable
+
+    def firstItems(self) -> frozenset | None:
+        """
+        Returns the set of items that a match that is not empty can start
+        with, or None if that is not known, for example because the first
+        item is tested with IfItem.
+        """
+        return self._analysis().first
+
+    def _program(self) -> Program | None:
+        """
+        Returns the instruction program for this pattern, or None if the
+        pattern cannot be compiled. The program is remembered.
+        :meta private:
+        """
+        try:
+            return self._cachedProgram
+        except AttributeError:
+            try:
+                program: Program | None = compileProgram(self)
+            except CompileError:
+                program = None
+            self._cachedProgram = program
+            return program
+
+    def _backtrack(self, inputSeq: Sequence[T], idx: int, trail: Trail, budget: Budget | None=None) -> Iterator[tuple[int, Trail]]:
+        """
+        Returns a generator of the same results as `_gobble`. If the pattern
+        can be compiled, the program is run by a backtracking VM with an
+        explicit stack, which does not nest a generator for every item that
+        a repeat consumes and so works on inputs of any length. The steps
+        that are taken are counted against the budget, if there is one.
+        :meta private:
+        """
+        program = self._program()
+        if program is None:
+            if budget is not None:
+                return budget.tree(self, self._withBudget)._gobble(inputSeq, idx, trail)
+            return self._gobble(inputSeq, idx, trail)
+        return backtrack(program, inputSeq, idx, trail, budget)
+
+    def _withBudget(self, budget: Budget) -> 'RegEx4Seq[T]':
+        """
+        Returns a copy of the pattern in which trying any node counts as a
+        step against the budget.
+        :meta private:
+        """
+        return self._transform(lambda node: Budgeted(node, budget))
 
     @abstractmethod
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
@@ -53,6 +508,247 @@ class RegEx4Seq(ABC, Generic[T]):
         :meta private:
         """
 
+    def _emit(self, code: ProgramBuilder):
+        """
+        Lowers the pattern into instructions for the compiled matching
+        engines. It is implemented for each of the subclasses of RegEx4Seq.
+        :meta private:
+        """
+        raise CompileError(f'{type(self).__name__} patterns cannot be compiled')
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """
+        Returns a dictionary that maps each position where a match starting
+        at idx can end to the number of ways of getting there. It is the
+        memoized counterpart of `_gobble`; the sub-patterns are reached via
+        memo. This fallback simply counts the results of `_gobble`.
+        :meta private:
+        """
+        ends: dict[int, int] = {}
+        for r, _ in self._gobble(inputSeq, idx, DiscardTrail()):
+            ends[r] = ends.get(r, 0) + 1
+        return ends
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """
+        Returns the sequence of items that every match must start with,
+        together with a flag that is True if a match consists of exactly
+        those items and nothing else.
+        :meta private:
+        """
+        return (), False
+
+    def _children(self) -> tuple['RegEx4Seq[T]', ...]:
+        """
+        Returns the sub-patterns of this pattern, for walking the pattern tree.
+        :meta private:
+        """
+        return ()
+
+    def _fields(self) -> tuple:
+        """
+        Returns the attributes of this node, other than its sub-patterns, that
+        decide what it matches. With the type of the node and the sub-patterns
+        they make up the structure that equality and hashing compare.
+        :meta private:
+        """
+        return ()
+
+    def __eq__(self, other):
+        """
+        Patterns are equal if they have the same structure: the same kinds of
+        node with equal items, and the very same predicate functions, put
+        together in the same way.
+        """
+        if self is other:
+            return True
+        if not isinstance(other, RegEx4Seq):
+            return NotImplemented
+        return type(self) is type(other) and self._fields() == other._fields() and self._children() == other._children()
+
+    def __hash__(self):
+        """
+        Returns a hash of the structure of the pattern, so that patterns can
+        be used as dictionary keys. It is remembered. A pattern with an item
+        that cannot be hashed raises TypeError.
+        """
+        try:
+            return self._cachedHash
+        except AttributeError:
+            self._cachedHash = hash((type(self), self._fields(), self._children()))
+            return self._cachedHash
+
+    def __getstate__(self):
+        """:meta private:"""
+        # The hash is left out because the hashes of strings differ from one
+        # process to the next.
+        state = {}
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if name != '_cachedHash' and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return None, state
+
+    def intern(self) -> 'RegEx4Seq[T]':
+        """
+        Returns the canonical copy of this pattern, which is shared by all the
+        structurally equal patterns that have been interned, as are each of its
+        sub-patterns. Whatever is worked out about the canonical copy, such as
+        its compiled program, is therefore only worked out once however often
+        the pattern is rebuilt. The copies are kept in a process-wide cache
+        whose size is set by `setCacheSize`.
+        """
+        return self._transform(lambda node: INTERNED.get(node, lambda: node))
+
+    def _rebuild(self, children: tuple['RegEx4Seq[T]', ...]) -> 'RegEx4Seq[T]':
+        """
+        Returns a new pattern like this one but with the sub-patterns replaced
+        by children, in the same order as `_children`.
+        :meta private:
+        """
+        return self
+
+    def _transform(self, f: Callable[['RegEx4Seq[T]'], 'RegEx4Seq[T]']) -> 'RegEx4Seq[T]':
+        """
+        Returns the pattern that results from applying f to every node of the
+        pattern tree, from the leaves upwards. Parts of the tree that are left
+        unchanged are shared with the original.
+        :meta private:
+        """
+        children = self._children()
+        if children:
+            rebuilt = tuple(c._transform(f) for c in children)
+            if any(a is not b for a, b in zip(children, rebuilt)):
+                return f(self._rebuild(rebuilt))
+        return f(self)
+
+    def _itemTest(self) -> Callable | None:
+        """
+        For a pattern that matches one item by testing it, returns a function
+        that takes a NumPy array and returns the boolean mask of the items that
+        pass the test. Returns None for other patterns.
+        :meta private:
+        """
+        return None
+
+    def _usesVectors(self) -> bool:
+        """
+        Returns True if the pattern contains a vectorized predicate.
+        :meta private:
+        """
+        return any(c._usesVectors() for c in self._children())
+
+    def _cachingPredicate(self, slot: CacheSlot) -> 'RegEx4Seq[T]':
+        """
+        Returns a version of this node whose predicate results are looked up
+        in the cache held by the slot. Only IfItem, IfNext and IfPrevious have
+        predicates.
+        :meta private:
+        """
+        return self
+
+    def reverse(self) -> 'RegEx4Seq[T]':
+        """
+        Returns the pattern that matches the items of a sequence read from
+        right to left exactly when this pattern matches them read from left
+        to right, so that `p.reverse().matches(s[::-1])` is truthy exactly
+        when `p.matches(s)` is. The captures of the reversed pattern hold the
+        same items in reverse order. A match group with a suchthat or extract
+        function cannot be reversed, since those are given positions in the
+        sequence, and raises ValueError.
+        """
+        return self._reversed(True)
+
+    def _reversed(self, groups: bool) -> 'RegEx4Seq[T]':
+        """
+        Returns the reverse of this node, built from the reverses of its
+        sub-patterns. If groups is False then the match groups are left out.
+        :meta private:
+        """
+        children = self._children()
+        if not children:
+            return self
+        return self._rebuild(tuple(c._reversed(groups) for c in children))
+
+    def _simplify(self) -> 'RegEx4Seq[T]':
+        """
+        Returns a simpler pattern that is equivalent to this node, assuming
+        that its sub-patterns have already been simplified. It is the step
+        that `optimize` applies to every node.
+        :meta private:
+        """
+        return self
+
+    def optimize(self, report=False) -> 'RegEx4Seq[T] | tuple[RegEx4Seq[T], SimpleNamespace]':
+        """
+        Returns an equivalent pattern that is quicker to match, by rewriting
+        the whole pattern tree. Chains of `then` and `otherwise` are
+        flattened, runs of items are combined into a single node, prefixes
+        that alternatives have in common are factored out, alternatives that
+        test a single item by equality are merged into a OneOf, and
+        redundant nesting of `optional` and `repeat` is removed.
+
+        The result of `matches` is unchanged. The method `findAllMatches`
+        finds the same matches in the same order, but a match that could
+        previously be found in several redundant ways may be found fewer
+        times.
+
+        The result is kept in the same process-wide cache as that of
+        `compile`.
+
+        If report is True then the result is a tuple of the optimized pattern
+        and a namespace object whose attributes before and after are the
+        number of nodes in the original and optimized patterns.
+        """
+        optimized = COMPILED.get(('optimize', self), lambda: self._transform(lambda node: node._simplify()))
+        if report:
+            return optimized, SimpleNamespace(before=self.countNodes(), after=optimized.countNodes())
+        return optimized
+
+    def countNodes(self) -> int:
+        """
+        Returns the number of nodes in the pattern tree, counting a sub-pattern
+        that is used in more than one place each time it is used.
+        """
+        count = 0
+        stack: list[RegEx4Seq[T]] = [self]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node._children())
+        return count
+
+    def compile(self, engine: str='pike', maxTransitions: int=10000) -> 'PikeVM[T] | LazyDFA[T]':
+        """
+        Returns an equivalent pattern that is matched by a compiled engine
+        rather than by backtracking.
+
+        The default engine, 'pike', is matched in time proportional to the
+        length of the pattern times the length of the input. It raises
+        CompileError if the pattern uses a construct that cannot be compiled,
+        such as a match group with a suchthat guard, in which case the
+        original pattern should be used instead.
+
+        The engine 'dfa' builds a DFA on demand, caching up to maxTransitions
+        transitions. It is intended for patterns that only test items by
+        equality and automatically falls back to the original pattern for
+        patterns that use IfItem, IfNext or suchthat guards.
+
+        The result is kept in a process-wide cache, keyed by the structure of
+        the pattern, so compiling an equal pattern again returns the same
+        object.
+        """
+        return COMPILED.get(('compile', engine, maxTransitions, self), lambda: self._compile(engine, maxTransitions))
+
+    def _compile(self, engine: str, maxTransitions: int) -> 'PikeVM[T] | LazyDFA[T]':
+        """:meta private:"""
+        if engine == 'pike':
+            return PikeVM(self)
+        elif engine == 'dfa':
+            return LazyDFA(self, maxTransitions=maxTransitions)
+        else:
+            raise ValueError(f'Unknown engine: {engine}')
+
     def then(self, Q: 'RegEx4Seq[T]'):
         """
         Given a pattern Q, returns a new pattern that matches the original P
@@ -71,12 +767,22 @@ class RegEx4Seq(ABC, Generic[T]):
             return self.optional()
         return Otherwise(self, Q)
 
-    def repeat(self):
+    def repeat(self, min: int=0, max: int | None=None):
         """
         Returns a new pattern that matches zero or more occurences of the
         original pattern P. Analogous to P* in regular expressions.
+
+        If min or max are given, the new pattern matches between min and max
+        occurrences, where max=None means there is no limit. Analogous to
+        P{min,max} in regular expressions. The occurrences are counted rather
+        than written out, so a large max costs no more than a small one. As
+        for P*, an occurrence beyond the first min must consume at least one
+        item. The counts must be integers, and ValueError is raised if they
+        are not or if min is negative or more than max.
         """
-        return Repeat(self)
+        if min == 0 and max is None and _isCount(min):
+            return Repeat(self)
+        return CountedRepeat(self, min, max)
 
     def optional(self):
         """
@@ -155,11 +861,28 @@ class RegEx4Seq(ABC, Generic[T]):
 
 class Empty(RegEx4Seq, Generic[T]):
     """Represents a pattern that matches no items. Rougly equivalent to regular expressions '()'"""
+    __slots__ = ()
 
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         yield idx, trail
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        pass
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return EMPTY
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {idx: 1}
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        return (), True
+
     def then(self, Q: RegEx4Seq[T]):
         """Includes an optimization to avoid creating a nested Empty."""
         return Q
@@ -168,7 +891,7 @@ class Empty(RegEx4Seq, Generic[T]):
         """Includes an optimization to avoid creating a nested Empty."""
         return Q.optional()
 
-    def repeat(self):
+    def repeat(self, min: int=0, max: int | None=None):
         """Includes an optimization to avoid creating a nested Empty."""
         return self
 
@@ -178,11 +901,24 @@ class Empty(RegEx4Seq, Generic[T]):
 
 class Fail(RegEx4Seq, Generic[T]):
     """Represents a pattern that never matches. Roughly equivalent to regular expressions '[]' or '$^'"""
+    __slots__ = ()
 
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         yield from ()
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        code.emit(FAIL_OP)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return IMPOSSIBLE
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {}
+
     def then(self, Q: RegEx4Seq[T]):
         """Includes an optimization to avoid creating a nested Fail."""
         return self
@@ -191,9 +927,11 @@ class Fail(RegEx4Seq, Generic[T]):
         """Includes an optimization to avoid creating a nested Fail."""
         return Q
 
-    def repeat(self):
+    def repeat(self, min: int=0, max: int | None=None):
         """Includes an optimization to avoid creating a nested Fail."""
-        return self
+        if min == 0 and max is None:
+            return self
+        return super().repeat(min=min, max=max)
 
     def optional(self):
         """Includes an optimization to avoid creating a nested Fail."""
@@ -205,16 +943,47 @@ class Item(RegEx4Seq, Generic[T]):
     Wraps an item to create a pattern that matches against that item using
     normal equals. If you want to use a different predicate, use IfItem.
     """
+    __slots__ = ('_item',)
 
     def __init__(self, item: T):
         self._item: T = item
 
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        # The type is included so that, for example, Item(1) and Item(True)
+        # stay distinct.
+        return (type(self._item), self._item)
+
+    def _label(self) -> str:
+        """:meta private:"""
+        return f'Item({self._item!r})'
+
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         if idx < len(inputSeq):
             if inputSeq[idx] == self._item:
                 yield idx + 1, trail
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        code.emit(ITEM, self._item)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return itemsAnalysis((self._item,))
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {idx + 1: 1} if idx < len(inputSeq) and inputSeq[idx] == self._item else {}
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        return (self._item,), True
+
+    def _itemTest(self) -> Callable:
+        """:meta private:"""
+        return lambda arr: equalityMask(arr, (self._item,))
+
     def otherwise(self, Q: RegEx4Seq[T]):
         """Same as otherwise but includes an optimization to avoid creating a nested Item."""
         if isinstance(Q, Item):
@@ -225,21 +994,118 @@ class Item(RegEx4Seq, Generic[T]):
             return super().otherwise(Q)
 
 
+class Literal(RegEx4Seq, Generic[T]):
+    """
+    A pattern that matches a fixed run of items using normal equals. It is
+    produced by `optimize` from a chain of Items and behaves just like it,
+    but is matched with a single comparison loop.
+    :meta private:
+    """
+    __slots__ = ('_items', '_parts')
+
+    def __init__(self, *items: T):
+        self._items: tuple[T, ...] = items
+        # The parts are kept so that rewrites of the pattern tree, such as
+        # vectorizing, can see the individual Items.
+        self._parts: tuple[RegEx4Seq[T], ...] = tuple(Item(x) for x in items)
+
+    def _label(self) -> str:
+        """:meta private:"""
+        return f'Literal({", ".join(map(repr, self._items))})'
+
+    def _children(self) -> tuple[RegEx4Seq[T], ...]:
+        """:meta private:"""
+        return self._parts
+
+    def _rebuild(self, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        items = [c._item for c in children if type(c) is Item]
+        if len(items) == len(children):
+            return Literal(*items)
+        return _thenAll(list(children))
+
+    def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
+        """:meta private:"""
+        if self._at(inputSeq, idx):
+            yield idx + len(self._items), trail
+
+    def _at(self, inputSeq: Sequence[T], idx: int) -> bool:
+        """:meta private:"""
+        if idx + len(self._items) > len(inputSeq):
+            return False
+        for j, x in enumerate(self._items):
+            if not inputSeq[idx + j] == x:
+                return False
+        return True
+
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        for x in self._items:
+            code.emit(ITEM, x)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return Analysis(len(self._items), len(self._items), False, itemsAnalysis(self._items[:1]).first)
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {idx + len(self._items): 1} if self._at(inputSeq, idx) else {}
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        return self._items, True
+
+    def _reversed(self, groups: bool) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return Literal(*reversed(self._items))
+
+
 class OneOf(RegEx4Seq, Generic[T]):
     """
     This is a pattern that matches against any one of the supplied items using
     equals. Very roughly equivalent to '[abc]' in regular expressions.
     """
+    __slots__ = ('_items',)
 
     def __init__(self, *items: T):
         self._items = set(items)
 
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        return (frozenset((type(x), x) for x in self._items),)
+
+    def _label(self) -> str:
+        """:meta private:"""
+        return f'OneOf({", ".join(map(repr, self._items))})'
+
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         if idx < len(inputSeq):
             if inputSeq[idx] in self._items:
                 yield idx + 1, trail
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        code.emit(ONEOF, self._items)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return itemsAnalysis(self._items)
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {idx + 1: 1} if idx < len(inputSeq) and inputSeq[idx] in self._items else {}
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        if len(self._items) == 1:
+            return tuple(self._items), True
+        return (), False
+
+    def _itemTest(self) -> Callable:
+        """:meta private:"""
+        return lambda arr: equalityMask(arr, tuple(self._items))
+
     def otherwise(self, Q: RegEx4Seq[T]):
         """Same as otherwise but includes an optimization to avoid creating a nested OneOf."""
         if isinstance(Q, Item):
@@ -256,27 +1122,142 @@ class IfNext(RegEx4Seq, Generic[T]):
     predicate function. The predicate function is given two items and returns
     a value which is treated as boolean.
     """
+    __slots__ = ('_pf',)
 
     def __init__(self, predicateFunction: Callable[[T, T], bool]):
         self._pf: Callable[[T, T], bool] = predicateFunction
 
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        return (self._pf,)
+
+    def _label(self) -> str:
+        """:meta private:"""
+        return f'IfNext({_functionName(self._pf)})'
+
+    def _profiledNode(self, stats: NodeStats, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return IfNext(countCalls(self._pf, stats, 'predicateCalls'))
+
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         if idx + 1 < len(inputSeq):
             if self._pf(inputSeq[idx], inputSeq[idx + 1]):
                 yield idx + 1, trail
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        code.emit(IFNEXT, self._pf)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return ANY_ITEM
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {idx + 1: 1} if idx + 1 < len(inputSeq) and self._pf(inputSeq[idx], inputSeq[idx + 1]) else {}
+
+    def _cachingPredicate(self, slot: CacheSlot) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return CachedPredicate(self, slot)
+
+    def _reversed(self, groups: bool) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return IfPrevious(self._pf)
+
+
+class IfPrevious(RegEx4Seq, Generic[T]):
+    """
+    A pattern that matches an item that satisfies the predicate function
+    together with the item before it, which is given the item and then the
+    item before it. It is the reverse of IfNext, and there is no match at
+    the start of the sequence.
+    :meta private:
+    """
+    __slots__ = ('_pf',)
+
+    def __init__(self, predicateFunction: Callable[[T, T], bool]):
+        self._pf: Callable[[T, T], bool] = predicateFunction
+
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        return (self._pf,)
+
+    def _label(self) -> str:
+        """:meta private:"""
+        return f'IfPrevious({_functionName(self._pf)})'
+
+    def _profiledNode(self, stats: NodeStats, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return IfPrevious(countCalls(self._pf, stats, 'predicateCalls'))
+
+    def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
+        """:meta private:"""
+        if 0 < idx < len(inputSeq):
+            if self._pf(inputSeq[idx], inputSeq[idx - 1]):
+                yield idx + 1, trail
+
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        code.emit(IFPREV, self._pf)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return ANY_ITEM
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {idx + 1: 1} if 0 < idx < len(inputSeq) and self._pf(inputSeq[idx], inputSeq[idx - 1]) else {}
+
+    def _cachingPredicate(self, slot: CacheSlot) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return CachedPredicate(self, slot)
+
+    def _reversed(self, groups: bool) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return IfNext(self._pf)
+
 
 # Predicate is any function that given an inputSeq returns a bool.
 class IfItem(RegEx4Seq, Generic[T]):
     """
     Wraps a predicate function to create a pattern that matches against any item
     that satisfies the predicate.
+
+    Alternatively, or as well, a vectorized predicate can be given as vec. This
+    is a function that takes a whole NumPy array and returns a boolean array
+    that says which items satisfy the predicate, for example 
+    `IfItem(vec=lambda arr: arr > 0)`. When the input is a NumPy array, it is 
+    called just once per match.
     """
+    __slots__ = ('_pf', '_vec')
     __test__ = False # Ignore this class in pytest.
 
-    def __init__(self, predicateFunction: Callable[[T], bool]):
+    def __init__(self, predicateFunction: Callable[[T], bool] | None=None, vec: Callable | None=None):
+        if predicateFunction is None:
+            if vec is None:
+                raise ValueError('IfItem needs a predicateFunction or a vec function')
+            predicateFunction = scalarPredicate(vec)
         self._pf = predicateFunction
+        self._vec = vec
+
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        # A predicate that was made from vec is new each time, so vec stands
+        # in for it.
+        derived = self._vec is not None and getattr(self._pf, '__wrapped__', None) is self._vec
+        return (None if derived else self._pf, self._vec)
+
+    def _label(self) -> str:
+        """:meta private:"""
+        return f'IfItem({_functionName(self._vec if self._vec is not None else self._pf)})'
+
+    def _profiledNode(self, stats: NodeStats, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        # The vectorized predicate is kept so that a NumPy array is still
+        # tested in one call, which is counted as one predicate call.
+        vec = countCalls(self._vec, stats, 'predicateCalls') if self._vec is not None else None
+        return IfItem(countCalls(self._pf, stats, 'predicateCalls'), vec=vec)
 
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
@@ -284,21 +1265,62 @@ class IfItem(RegEx4Seq, Generic[T]):
             if self._pf(inputSeq[idx]):
                 yield idx + 1, trail
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        code.emit(IFITEM, self._pf)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return ANY_ITEM
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {idx + 1: 1} if idx < len(inputSeq) and self._pf(inputSeq[idx]) else {}
+
+    def _itemTest(self) -> Callable:
+        """:meta private:"""
+        if self._vec is not None:
+            return self._vec
+        return lambda arr: scalarMask(arr, self._pf)
+
+    def _usesVectors(self) -> bool:
+        """:meta private:"""
+        return self._vec is not None
+
+    def _cachingPredicate(self, slot: CacheSlot) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return CachedPredicate(self, slot)
+
 
 class AnyItem(RegEx4Seq, Generic[T]):
     """
     This is a pattern that matches unconditionally against any one item from a 
     sequence. Roughly equivalent to '.' in regular expressions.
     """
+    __slots__ = ()
 
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         if idx < len(inputSeq):
             yield idx + 1, trail
 
-    def repeat(self):
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        code.emit(ANY_OP)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return ANY_ITEM
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {idx + 1: 1} if idx < len(inputSeq) else {}
+
+    def repeat(self, min: int=0, max: int | None=None):
         """Includes an optimization to use ManyItems rather than Repeat."""
-        return ManyItems()
+        if min == 0 and max is None:
+            return ManyItems()
+        return super().repeat(min=min, max=max)
 
 
 class ManyItems(RegEx4Seq, Generic[T]):
@@ -306,15 +1328,33 @@ class ManyItems(RegEx4Seq, Generic[T]):
     This is a pattern that matches unconditionally against any number of items 
     from a sequence. Roughly equivalent to '.*' in regular expressions.
     """
+    __slots__ = ()
 
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         for i in range( len(inputSeq), idx - 1, -1): #range(idx, len(inputSeq) + 1):
             yield i, trail
 
-    def repeat(self):
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        loop = code.emit(SPLIT)
+        code.emit(ANY_OP)
+        code.emit(JMP, loop)
+        code.patch(loop, a=loop + 1, b=code.here())
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return ANY_ITEMS
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return dict.fromkeys(range(len(inputSeq), idx - 1, -1), 1)
+
+    def repeat(self, min: int=0, max: int | None=None):
         """Includes an optimization to avoid creating a nested ManyItems."""
-        return self
+        if min == 0 and max is None:
+            return self
+        return super().repeat(min=min, max=max)
 
     def optional(self):
         """Includes an optimization to avoid creating a nested ManyItems."""
@@ -326,10 +1366,19 @@ class Optional(RegEx4Seq, Generic[T]):
     This is a pattern that matches zero or one occurences of the original
     pattern.
     """
+    __slots__ = ('_original',)
 
     def __init__(self, original: RegEx4Seq[T]):
         self._original: RegEx4Seq = original
 
+    def _children(self) -> tuple[RegEx4Seq[T], ...]:
+        """:meta private:"""
+        return (self._original,)
+
+    def _rebuild(self, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return Optional(*children)
+
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         # Either we consume some inputSeq.
@@ -337,26 +1386,94 @@ class Optional(RegEx4Seq, Generic[T]):
         # Or we don't.
         yield idx, trail
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        split = code.emit(SPLIT)
+        self._original._emit(code)
+        code.patch(split, a=split + 1, b=code.here())
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return self._original._analysis().optional()
+
+    def _simplify(self) -> RegEx4Seq[T]:
+        """:meta private:"""
+        # These already match the empty sequence, after their other matches.
+        if isinstance(self._original, (Optional, Repeat, ManyItems, Empty)):
+            return self._original
+        if isinstance(self._original, Fail):
+            return NONE
+        return self
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        ends = dict(memo.reach(self._original, inputSeq, idx))
+        ends[idx] = ends.get(idx, 0) + 1
+        return ends
+
     def optional(self):
         """Includes an optimization to avoid creating a nested Optional."""
         return self
 
-    def repeat(self):
+    def repeat(self, min: int=0, max: int | None=None):
         """Includes an optimization to avoid creating a nested Optional."""
-        return self._original.repeat()
+        if min == 0 and max is None:
+            return self._original.repeat()
+        return super().repeat(min=min, max=max)
 
 
 class Then(RegEx4Seq, Generic[T]):
+    __slots__ = ('_lhs', '_rhs')
 
     def __init__(self, lhs: RegEx4Seq[T], rhs: RegEx4Seq[T]):
         self._lhs: RegEx4Seq = lhs
         self._rhs: RegEx4Seq = rhs
 
+    def _children(self) -> tuple[RegEx4Seq[T], ...]:
+        """:meta private:"""
+        return (self._lhs, self._rhs)
+
+    def _rebuild(self, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return Then(*children)
+
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         for idx1, t in self._lhs._gobble(inputSeq, idx, trail):
             yield from self._rhs._gobble(inputSeq, idx1, t)
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        self._lhs._emit(code)
+        self._rhs._emit(code)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return self._lhs._analysis().then(self._rhs._analysis())
+
+    def _simplify(self) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return _thenAll(list(_chain(self, Then)))
+
+    def _reversed(self, groups: bool) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return Then(self._rhs._reversed(groups), self._lhs._reversed(groups))
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        ends: dict[int, int] = {}
+        for idx1, c in memo.reach(self._lhs, inputSeq, idx).items():
+            addEnds(ends, memo.reach(self._rhs, inputSeq, idx1), c)
+        return ends
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        lhs, complete = self._lhs._literalPrefix()
+        if not complete:
+            return lhs, False
+        rhs, complete = self._rhs._literalPrefix()
+        return lhs + rhs, complete
+
 
 class Otherwise(RegEx4Seq, Generic[T]):
     """
@@ -366,23 +1483,75 @@ class Otherwise(RegEx4Seq, Generic[T]):
     a|b   that will match 1 character which is either 'a' or 'b'
     abc|d that will match 3 characters (abc) or 1 character (d)
     """
+    __slots__ = ('_lhs', '_rhs')
 
     def __init__(self, P: RegEx4Seq[T], Q: RegEx4Seq[T]):
         self._lhs = P
         self._rhs = Q
 
+    def _children(self) -> tuple[RegEx4Seq[T], ...]:
+        """:meta private:"""
+        return (self._lhs, self._rhs)
+
+    def _rebuild(self, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return Otherwise(*children)
+
     def _gobble(self, inputSeq: Sequence[T], idx, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         yield from self._lhs._gobble(inputSeq, idx, trail)
         yield from self._rhs._gobble(inputSeq, idx, trail)
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        split = code.emit(SPLIT)
+        self._lhs._emit(code)
+        jump = code.emit(JMP)
+        code.patch(split, a=split + 1, b=code.here())
+        self._rhs._emit(code)
+        code.patch(jump, a=code.here())
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return self._lhs._analysis().otherwise(self._rhs._analysis())
+
+    def _simplify(self) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return _otherwiseAll(list(_chain(self, Otherwise)))
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        ends = dict(memo.reach(self._lhs, inputSeq, idx))
+        addEnds(ends, memo.reach(self._rhs, inputSeq, idx))
+        return ends
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        # Both alternatives have to start with the common part of their
+        # prefixes.
+        lhs, lcomplete = self._lhs._literalPrefix()
+        rhs, rcomplete = self._rhs._literalPrefix()
+        k = 0
+        while k < len(lhs) and k < len(rhs) and lhs[k] == rhs[k]:
+            k += 1
+        return lhs[:k], lcomplete and rcomplete and len(lhs) == len(rhs) == k
+
 
 
 class Repeat(RegEx4Seq, Generic[T]):
+    __slots__ = ('_original',)
 
     def __init__(self, original: RegEx4Seq[T]):
         self._original: RegEx4Seq[T] = original
 
+    def _children(self) -> tuple[RegEx4Seq[T], ...]:
+        """:meta private:"""
+        return (self._original,)
+
+    def _rebuild(self, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return Repeat(*children)
+
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         # Is there a non-zero repetition of original pattern?
@@ -394,8 +1563,177 @@ class Repeat(RegEx4Seq, Generic[T]):
 
         yield idx, trail
 
-    def repeat(self):
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        loop = code.emit(SPLIT)
+        code.emit(MARK)
+        self._original._emit(code)
+        code.emit(PROGRESS)
+        code.emit(JMP, loop)
+        code.patch(loop, a=loop + 1, b=code.here())
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return self._original._analysis().repeat()
+
+    def _simplify(self) -> RegEx4Seq[T]:
+        """:meta private:"""
+        original = self._original
+        # The repeat already skips iterations that match the empty sequence.
+        while isinstance(original, Optional):
+            original = original._original
+        if isinstance(original, (Repeat, ManyItems, Empty)):
+            return original
+        if isinstance(original, AnyItem):
+            return MANY
+        if isinstance(original, Fail):
+            return NONE
+        return self if original is self._original else Repeat(original)
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        # Rather than recursing once per iteration, find every position that
+        # the iterations can reach and work backwards from the last of them,
+        # as the result at each position only depends on later positions.
+        positions = {idx}
+        todo = [idx]
+        while todo:
+            i = todo.pop()
+            for r in memo.reach(self._original, inputSeq, i):
+                if r > i and r not in positions and memo.get(self, r) is None:
+                    positions.add(r)
+                    todo.append(r)
+        local: dict[int, dict[int, int]] = {}
+        for i in sorted(positions, reverse=True):
+            ends: dict[int, int] = {}
+            for r, c in memo.reach(self._original, inputSeq, i).items():
+                if r > i:
+                    later = local.get(r)
+                    addEnds(ends, later if later is not None else memo.reach(self, inputSeq, r), c)
+            ends[i] = ends.get(i, 0) + 1
+            local[i] = ends
+            memo.put(self, i, ends)
+        return local[idx]
+
+    def repeat(self, min: int=0, max: int | None=None):
         """Includes an optimization to avoid creating a nested Repeat."""
+        if min == 0 and max is None:
+            return self
+        return super().repeat(min=min, max=max)
+
+
+class CountedRepeat(RegEx4Seq, Generic[T]):
+    """
+    Matches between min and max occurrences of the original pattern, where
+    max=None means there is no limit. The first min occurrences may match the
+    empty sequence but the rest, as for Repeat, must consume at least one
+    item. The occurrences are counted rather than written out. Analogous to
+    P{min,max} in regular expressions.
+    """
+    __slots__ = ('_original', '_min', '_max')
+
+    def __init__(self, original: RegEx4Seq[T], min: int=0, max: int | None=None):
+        if not _isCount(min) or not (max is None or _isCount(max)):
+            raise ValueError(f'The counts for a repeat must be integers, or None for max: min={min!r}, max={max!r}')
+        if min < 0 or max is not None and max < min:
+            raise ValueError(f'Invalid counts for a repeat: min={min}, max={max}')
+        self._original: RegEx4Seq[T] = original
+        self._min = int(min)
+        self._max = None if max is None else int(max)
+
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        return (self._min, self._max)
+
+    def _label(self) -> str:
+        """:meta private:"""
+        return f'CountedRepeat({self._min}, {self._max})'
+
+    def _children(self) -> tuple[RegEx4Seq[T], ...]:
+        """:meta private:"""
+        return (self._original,)
+
+    def _rebuild(self, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return CountedRepeat(children[0], self._min, self._max)
+
+    def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
+        """:meta private:"""
+        yield from self._iterate(inputSeq, idx, trail, 0)
+
+    def _iterate(self, inputSeq: Sequence[T], idx: int, trail: Trail, count: int) -> Iterator[tuple[int, Trail]]:
+        """:meta private:"""
+        if count < self._min:
+            for r, t in self._original._gobble(inputSeq, idx, trail):
+                yield from self._iterate(inputSeq, r, t, count + 1)
+            return
+        if self._max is None or count < self._max:
+            for r, t in self._original._gobble(inputSeq, idx, trail):
+                if r > idx:
+                    yield from self._iterate(inputSeq, r, t, count + 1)
+        yield idx, trail
+
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        code.count()
+        code.emit(CPUSH)
+        loop = code.emit(CLOOP, (self._min, self._max))
+        self._original._emit(code)
+        code.emit(CSTEP, (self._min, self._max), loop)
+        code.patch(loop, b=code.here())
+        code.emit(CPOP)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        a = self._original._analysis()
+        if a.isImpossible():
+            return EMPTY if self._min == 0 else IMPOSSIBLE
+        if a.maxLength == 0:
+            maxLength: int | None = 0
+        elif a.maxLength is None or self._max is None:
+            maxLength = None
+        else:
+            maxLength = self._max * a.maxLength
+        return Analysis(self._min * a.minLength, maxLength, self._min == 0 or a.nullable, a.first)
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        # The ways of reaching each position are counted one occurrence at a
+        # time, so the work is proportional to max rather than exponential.
+        layer = {idx: 1}
+        for _ in range(self._min):
+            following: dict[int, int] = {}
+            for i, c in layer.items():
+                addEnds(following, memo.reach(self._original, inputSeq, i), c)
+            layer = following
+        ends = dict(layer)
+        count = self._min
+        while layer and (self._max is None or count < self._max):
+            following = {}
+            for i, c in layer.items():
+                addEnds(following, {r: k for r, k in memo.reach(self._original, inputSeq, i).items() if r > i}, c)
+            addEnds(ends, following)
+            layer = following
+            count += 1
+        return ends
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        if self._min == 0:
+            return (), self._max == 0
+        prefix, complete = self._original._literalPrefix()
+        if not complete:
+            return prefix, False
+        return prefix * self._min, self._min == self._max
+
+    def _simplify(self) -> RegEx4Seq[T]:
+        """:meta private:"""
+        if self._max == 0 or isinstance(self._original, Empty):
+            return NONE
+        if self._min == 1 and self._max == 1:
+            return self._original
+        if self._min == 0 and self._max is None:
+            return Repeat(self._original)._simplify()
         return self
 
 
@@ -405,6 +1743,7 @@ class MatchGroup(RegEx4Seq, Generic[T]):
     the input sequence. The captured subsequence can be retrieved by using the
     matching attribute from the namespace object returned by the match method.
     """
+    __slots__ = ('_name', '_original', '_extract', '_suchthat')
 
     def __init__(self, name, original: RegEx4Seq[T], suchthat=None, extract=None):
         self._name = name
@@ -412,12 +1751,232 @@ class MatchGroup(RegEx4Seq, Generic[T]):
         self._extract = extract
         self._suchthat = suchthat
 
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        return (self._name, self._extract, self._suchthat)
+
+    def _label(self) -> str:
+        """:meta private:"""
+        return f'MatchGroup({self._name!r})'
+
+    def _profiledNode(self, stats: NodeStats, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        suchthat = countCalls(self._suchthat, stats, 'suchthatCalls') if self._suchthat is not None else None
+        return MatchGroup(self._name, children[0], suchthat=suchthat, extract=self._extract)
+
+    def _children(self) -> tuple[RegEx4Seq[T], ...]:
+        """:meta private:"""
+        return (self._original,)
+
+    def _rebuild(self, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return MatchGroup(self._name, children[0], suchthat=self._suchthat, extract=self._extract)
+
     def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
         """:meta private:"""
         for r, t in self._original._gobble(inputSeq, idx, trail):
             if self._suchthat is None or self._suchthat(inputSeq, idx, r):
                 yield r, t.add(self._name, idx, r, self._extract)
 
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        if self._suchthat is not None:
+            code.guard()
+        code.emit(OPEN)
+        self._original._emit(code)
+        code.emit(CLOSE, (self._name, self._extract), self._suchthat)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return self._original._analysis()
+
+    def _simplify(self) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return self._original if isinstance(self._original, Fail) else self
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        ends = memo.reach(self._original, inputSeq, idx)
+        if self._suchthat is None:
+            return ends
+        return {r: c for r, c in ends.items() if self._suchthat(inputSeq, idx, r)}
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        prefix, complete = self._original._literalPrefix()
+        return prefix, complete and self._suchthat is None
+
+    def _reversed(self, groups: bool) -> RegEx4Seq[T]:
+        """:meta private:"""
+        if self._suchthat is not None:
+            raise ValueError(f'The match group {self._name!r} has a suchthat function and cannot be reversed')
+        if not groups:
+            return self._original._reversed(groups)
+        if self._extract is not None:
+            raise ValueError(f'The match group {self._name!r} has an extract function and cannot be reversed')
+        return MatchGroup(self._name, self._original._reversed(groups))
+
+class CachedPredicate(RegEx4Seq, Generic[T]):
+    """
+    Wraps an IfItem or IfNext so that the result of its predicate at each
+    position is looked up in the PredicateCache of the current call, which
+    is held by the slot. It is compiled into an instruction that is given
+    the input and the position of the item, so that the compiled engines can
+    look the result up too.
+    :meta private:
+    """
+    __slots__ = ('_original', '_slot')
+
+    def __init__(self, original: RegEx4Seq[T], slot: CacheSlot):
+        self._original = original
+        self._slot = slot
+
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        return (self._original, self._slot)
+
+    def _test(self, inputSeq: Sequence[T], idx: int) -> bool:
+        """:meta private:"""
+        if idx >= len(inputSeq):
+            return False
+        return self._slot.lookup(self._original, idx, lambda: any(True for _ in self._original._gobble(inputSeq, idx, DiscardTrail())))
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return ANY_ITEM
+
+    def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
+        """:meta private:"""
+        if self._test(inputSeq, idx):
+            yield idx + 1, trail
+
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        code.emit(IFAT, self._test)
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        return {idx + 1: 1} if self._test(inputSeq, idx) else {}
+
+    def _reversed(self, groups: bool) -> RegEx4Seq[T]:
+        """:meta private:"""
+        raise ValueError('A pattern that is being matched with cachePredicates cannot be reversed')
+
+
+class Profiled(RegEx4Seq, Generic[T]):
+    """
+    Wraps a node of a pattern that is being profiled, counting into stats
+    how often it is tried, the matches that it finds, the matches that are
+    rejected by the pattern around it and the time that it takes. It is
+    compiled into instructions around those of the node that only the
+    backtracking VM runs.
+    :meta private:
+    """
+    __slots__ = ('_original', '_stats')
+
+    def __init__(self, original: RegEx4Seq[T], stats: NodeStats):
+        self._original = original
+        self._stats = stats
+
+    def _children(self) -> tuple[RegEx4Seq[T], ...]:
+        """:meta private:"""
+        return (self._original,)
+
+    def _rebuild(self, children: tuple[RegEx4Seq[T], ...]) -> RegEx4Seq[T]:
+        """:meta private:"""
+        return Profiled(children[0], self._stats)
+
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        return (self._stats,)
+
+    def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
+        """:meta private:"""
+        stats = self._stats
+        stats.entries += 1
+        clock = time.perf_counter
+        results = self._original._gobble(inputSeq, idx, trail)
+        while True:
+            t0 = clock()
+            try:
+                result = next(results)
+            except StopIteration:
+                stats.seconds += clock() - t0
+                return
+            stats.seconds += clock() - t0
+            stats.results += 1
+            yield result
+            # Being resumed means that the match was rejected.
+            stats.backtracks += 1
+
+    def _emit(self, code: ProgramBuilder):
+        """:meta private:"""
+        # The other compiled engines would skip the counting, so the program
+        # is kept to the backtracker in the same way as one with guards.
+        code.guard()
+        code.emit(PENTER, self._stats)
+        code.emit(PLEAVE, self._stats)
+        self._original._emit(code)
+        code.emit(PEXIT, self._stats)
+        code.emit(PRESUME, self._stats)
+
+    def _reach(self, inputSeq: Sequence[T], idx: int, memo: Memo) -> dict[int, int]:
+        """:meta private:"""
+        stats = self._stats
+        stats.entries += 1
+        t0 = time.perf_counter()
+        ends = memo.reach(self._original, inputSeq, idx)
+        stats.seconds += time.perf_counter() - t0
+        stats.results += len(ends)
+        return ends
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return self._original._analysis()
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        return self._original._literalPrefix()
+
+    def _reversed(self, groups: bool) -> RegEx4Seq[T]:
+        """:meta private:"""
+        raise ValueError('A pattern that is being matched with profile cannot be reversed')
+
+
+class Budgeted(RegEx4Seq, Generic[T]):
+    """
+    Wraps a node of a pattern that cannot be compiled so that each time it
+    is tried counts as a step against a budget.
+    :meta private:
+    """
+    __slots__ = ('_original', '_budget')
+
+    def __init__(self, original: RegEx4Seq[T], budget: Budget):
+        self._original = original
+        self._budget = budget
+
+    def _fields(self) -> tuple:
+        """:meta private:"""
+        return (self._original, self._budget)
+
+    def _gobble(self, inputSeq: Sequence[T], idx: int, trail: Trail) -> Iterator[tuple[int, Trail]]:
+        """:meta private:"""
+        self._budget.charge(1, idx)
+        return self._original._gobble(inputSeq, idx, trail)
+
+    def _analyse(self) -> Analysis:
+        """:meta private:"""
+        return self._original._analysis()
+
+    def _literalPrefix(self) -> tuple[tuple, bool]:
+        """:meta private:"""
+        return self._original._literalPrefix()
+
+    def _reversed(self, groups: bool) -> RegEx4Seq[T]:
+        """:meta private:"""
+        raise ValueError('A pattern that is being matched with maxSteps or deadline cannot be reversed')
+
+
 NONE: Annotated[Empty, """This is a singleton that matches the empty sequence."""] = Empty()
 """This is a singleton that matches the empty sequence."""
 
@@ -444,3 +2003,201 @@ def IfItems(*args: Callable[[T], bool]):
     each satisfy the corresponding predicate.
     """
     return Empty().thenIfItems(*args)
+
+
+def _chain(pattern: RegEx4Seq[T], kind: type) -> Iterator[RegEx4Seq[T]]:
+    """
+    Returns a generator of the operands of a chain of Then or Otherwise
+    nodes, however it is nested, in order.
+    :meta private:
+    """
+    stack = [pattern]
+    while stack:
+        node = stack.pop()
+        if type(node) is kind and isinstance(node, (Then, Otherwise)):
+            stack.append(node._rhs)
+            stack.append(node._lhs)
+        else:
+            yield node
+
+
+def _thenAll(parts: list[RegEx4Seq[T]]) -> RegEx4Seq[T]:
+    """
+    Returns the simplified pattern that matches the parts one after another,
+    as a chain of Then nodes that is nested to the right.
+    :meta private:
+    """
+    merged: list[RegEx4Seq[T]] = []
+    run: list = []
+    for part in parts:
+        if isinstance(part, Fail):
+            return part
+        if isinstance(part, (Item, Literal)):
+            run.extend(part._literalPrefix()[0])
+            continue
+        if run:
+            merged.append(Item(run[0]) if len(run) == 1 else Literal(*run))
+            run = []
+        if not isinstance(part, Empty):
+            merged.append(part)
+    if run:
+        merged.append(Item(run[0]) if len(run) == 1 else Literal(*run))
+    if not merged:
+        return NONE
+    result = merged[-1]
+    for part in reversed(merged[:-1]):
+        result = Then(part, result)
+    return result
+
+
+def _otherwiseAll(alternatives: list[RegEx4Seq[T]]) -> RegEx4Seq[T]:
+    """
+    Returns the simplified pattern that matches any of the alternatives, in
+    order of preference, as a chain of Otherwise nodes nested to the right.
+    Only neighbouring alternatives are combined, so that the order in which
+    the matches are found does not change.
+    :meta private:
+    """
+    alternatives = _groupByFirstItem([a for a in alternatives if not isinstance(a, Fail)])
+    factored: list[RegEx4Seq[T]] = []
+    i = 0
+    while i < len(alternatives):
+        units = _units(alternatives[i])
+        j = i + 1
+        while j < len(alternatives) and units and _sameItemTest(units[0], _units(alternatives[j])[:1]):
+            j += 1
+        if j - i == 1:
+            factored.append(alternatives[i])
+        else:
+            # The common prefix consumes one item at a time in just one way,
+            # so matching it first does not change the order of the matches.
+            group = [_units(a) for a in alternatives[i:j]]
+            k = 1
+            while all(k < len(g) and _sameItemTest(group[0][k], g[k:k + 1]) for g in group):
+                k += 1
+            rests = _otherwiseAll([_thenAll(g[k:]) for g in group])
+            factored.append(_thenAll(group[0][:k] + [rests]))
+        i = j
+    merged: list[RegEx4Seq[T]] = []
+    for a in factored:
+        if merged and _isEquality(a) and _isEquality(merged[-1]):
+            merged[-1] = _oneOf(merged[-1], a)
+        else:
+            merged.append(a)
+    if not merged:
+        return FAIL
+    result = merged[-1]
+    for a in reversed(merged[:-1]):
+        result = Otherwise(a, result)
+    return result
+
+
+def _groupByFirstItem(alternatives: list[RegEx4Seq[T]]) -> list[RegEx4Seq[T]]:
+    """
+    Returns the alternatives with each run of neighbours that start with an
+    Item regrouped, keeping their order, so that those that start with the
+    same item are next to each other. Alternatives that start with different
+    items can never both match at the same position, so this does not change
+    the matches or the order in which they are found.
+    :meta private:
+    """
+    result: list[RegEx4Seq[T]] = []
+    groups: dict = {}
+    for a in alternatives:
+        units = _units(a)
+        key = units[0] if units and type(units[0]) is Item and _isEquality(units[0]) else None
+        if key is None:
+            for group in groups.values():
+                result.extend(group)
+            groups = {}
+            result.append(a)
+        else:
+            groups.setdefault(key._item, []).append(a)
+    for group in groups.values():
+        result.extend(group)
+    return result
+
+
+def _units(pattern: RegEx4Seq[T]) -> list[RegEx4Seq[T]]:
+    """
+    Returns the operands of a chain of Then nodes, with each run of items
+    split into separate Items.
+    :meta private:
+    """
+    units: list[RegEx4Seq[T]] = []
+    for part in _chain(pattern, Then):
+        if isinstance(part, Literal):
+            units.extend(part._parts)
+        elif not isinstance(part, Empty):
+            units.append(part)
+    return units
+
+
+def _isCount(n) -> bool:
+    """
+    Returns True if n is an integer, such as an int or a NumPy integer but
+    not a bool, for counting the occurrences of a repeat.
+    :meta private:
+    """
+    return isinstance(n, Integral) and not isinstance(n, bool)
+
+
+def _functionName(f: Callable) -> str:
+    """:meta private:"""
+    return getattr(f, '__qualname__', None) or getattr(f, '__name__', None) or repr(f)
+
+
+def _sameItemTest(p: RegEx4Seq[T], others: list[RegEx4Seq[T]]) -> bool:
+    """
+    Returns True if others is a list of one pattern that consumes exactly one
+    item in exactly the same way as p, which must itself consume one item.
+    :meta private:
+    """
+    if len(others) != 1 or type(others[0]) is not type(p):
+        return False
+    q = others[0]
+    if isinstance(p, Item) and isinstance(q, Item):
+        try:
+            return type(p._item) is type(q._item) and bool(p._item == q._item)
+        except (TypeError, ValueError):
+            return False
+    if isinstance(p, OneOf) and isinstance(q, OneOf):
+        return p._items == q._items
+    if isinstance(p, IfItem) and isinstance(q, IfItem):
+        return p._pf is q._pf and p._vec is q._vec
+    if isinstance(p, IfNext) and isinstance(q, IfNext):
+        return p._pf is q._pf
+    return isinstance(p, AnyItem)
+
+
+def _isEquality(pattern: RegEx4Seq[T]) -> bool:
+    """
+    Returns True if the pattern is an Item or OneOf that can be merged into
+    a OneOf.
+    :meta private:
+    """
+    if isinstance(pattern, OneOf):
+        return True
+    if isinstance(pattern, Item):
+        try:
+            hash(pattern._item)
+            return True
+        except TypeError:
+            return False
+    return False
+
+
+def _oneOf(p: RegEx4Seq[T], q: RegEx4Seq[T]) -> RegEx4Seq[T]:
+    """
+    Returns a OneOf that matches the items that either of the Items or
+    OneOfs p and q matches.
+    :meta private:
+    """
+    return OneOf(*_equalityItems(p), *_equalityItems(q))
+
+
+def _equalityItems(pattern: RegEx4Seq[T]) -> set:
+    """:meta private:"""
+    if isinstance(pattern, OneOf):
+        return pattern._items
+    return {pattern._item} if isinstance(pattern, Item) else set()
@@ -0,0 +1,58 @@
+from typing import Callable, Iterator, Sequence
+from types import SimpleNamespace
+
+from .trail import Trail, DiscardTrail, StartCaptureTrail
+from .budget import Budget
+
+
+def scanMatches(find: Callable[[int], tuple[int, int, Trail] | None], inputSeq: Sequence, spans, pos: int=0) -> Iterator[tuple[int, int, bool | SimpleNamespace]]:
+    """
+    Returns a generator of the non-overlapping matches in the inputSeq, where
+    find(pos) returns the start, end and trail of the match that is found by
+    a search that begins at pos, or None. The first search begins at pos and
+    each later one where the last match ended, or one item later if that
+    match was empty.
+    :meta private:
+    """
+    n = len(inputSeq)
+    while pos <= n:
+        found = find(pos)
+        if found is None:
+            return
+        lo, hi, trail = found
+        yield lo, hi, trail.namespace(inputSeq, spans=spans)
+        pos = hi if hi > lo else hi + 1
+
+
+class BacktrackScanner:
+    """
+    Finds the same matches as `PikeVM._search` with the backtracker, for the
+    patterns that cannot be compiled. The start positions are worked out in
+    a single pass that is shared by all of the searches, and so is the
+    budget, if there is one.
+    :meta private:
+    """
+
+    def __init__(self, pattern, inputSeq: Sequence, namespace: bool, longest: bool, budget: Budget | None=None):
+        self._pattern = pattern
+        self._inputSeq = inputSeq
+        self._trail0: Trail = StartCaptureTrail() if namespace else DiscardTrail()
+        self._longest = longest
+        self._budget = budget
+        self._candidates = iter(pattern._startPositions(inputSeq, False, False))
+        self._next: int | None = next(self._candidates, None)
+
+    def find(self, pos: int) -> tuple[int, int, Trail] | None:
+        while self._next is not None:
+            lo = self._next
+            if lo >= pos:
+                best: tuple[int, int, Trail] | None = None
+                for hi, t in self._pattern._backtrack(self._inputSeq, lo, self._trail0, self._budget):
+                    if not self._longest:
+                        return lo, hi, t
+                    if best is None or hi > best[1]:
+                        best = lo, hi, t
+                if best is not None:
+                    return best
+            self._next = next(self._candidates, None)
+        return None
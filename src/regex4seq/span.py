@@ -0,0 +1,163 @@
+import mmap
+import sys
+from collections.abc import Sequence
+from typing import Any, Callable, Iterable, Iterator
+
+from .records import RecordArray
+
+
+class Span:
+    """
+    The start and end positions of a capture, returned instead of the
+    captured items when matching with spans=True. The captured value is only
+    worked out when the value attribute is read: it is the result of the
+    extract function, if the match group has one, or else a view of the
+    input that does not copy it. Buffers such as bytes are viewed through a
+    memoryview, NumPy arrays and RecordArrays are sliced (which gives a
+    view) and other sequences are wrapped in a SequenceView.
+
+    A Span compares equal to the tuple (start, end) and can be unpacked like
+    one.
+    """
+    __slots__ = ('start', 'end', '_inputSeq', '_extract')
+
+    def __init__(self, inputSeq: Sequence, start: int, end: int, extract: Callable | None = None):
+        self.start = start
+        self.end = end
+        self._inputSeq = inputSeq
+        self._extract = extract
+
+    @property
+    def value(self) -> Any:
+        """The captured value, which is worked out each time it is read."""
+        if self._extract:
+            return self._extract(self._inputSeq, self.start, self.end)
+        return view(self._inputSeq, self.start, self.end)
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self) -> Iterator[int]:
+        yield self.start
+        yield self.end
+
+    def __getitem__(self, i):
+        return (self.start, self.end)[i]
+
+    def __eq__(self, other):
+        if isinstance(other, (Span, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.start, self.end))
+
+    def __repr__(self):
+        return f'Span({self.start}, {self.end})'
+
+
+class SequenceView(Sequence):
+    """
+    A read-only view of the items of a sequence between start and stop that
+    does not copy them. It compares equal to any sequence with the same items.
+    """
+    __slots__ = ('_seq', '_start', '_stop')
+
+    def __init__(self, seq: Sequence, start: int, stop: int):
+        self._seq = seq
+        self._start = start
+        self._stop = stop
+
+    def __len__(self):
+        return self._stop - self._start
+
+    def __getitem__(self, i):
+        r = range(self._start, self._stop)[i]
+        if isinstance(r, range):
+            if r.step == 1:
+                return SequenceView(self._seq, r.start, max(r.start, r.stop))
+            return [self._seq[k] for k in r]
+        return self._seq[r]
+
+    def __iter__(self):
+        seq = self._seq
+        for k in range(self._start, self._stop):
+            yield seq[k]
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or len(other) != len(self):
+            return NotImplemented if not isinstance(other, Sequence) else False
+        return all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self):
+        return f'SequenceView({list(self)!r})'
+
+
+class ReversedView(Sequence):
+    """
+    A read-only view of the items of a sequence in reverse order, which does
+    not copy them.
+    :meta private:
+    """
+    __slots__ = ('_seq', '_last')
+
+    def __init__(self, seq: Sequence):
+        self._seq = seq
+        self._last = len(seq) - 1
+
+    def __len__(self):
+        return self._last + 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(self._last + 1))]
+        if i < 0:
+            i += self._last + 1
+        if not 0 <= i <= self._last:
+            raise IndexError('ReversedView index out of range')
+        return self._seq[self._last - i]
+
+
+def view(inputSeq: Sequence, start: int, end: int) -> Any:
+    """
+    Returns a view of the items of inputSeq between start and end that does
+    not copy them.
+    :meta private:
+    """
+    if isArray(inputSeq) or isinstance(inputSeq, RecordArray):
+        return inputSeq[start:end]
+    if not isinstance(inputSeq, str):
+        try:
+            return memoryview(inputSeq)[start:end]   # type: ignore[arg-type]
+        except TypeError:
+            pass
+    return SequenceView(inputSeq, start, end)
+
+
+def itemsOf(inputSeq: Iterable) -> Iterable:
+    """
+    Returns an iterable of the items of inputSeq, which are the same as
+    indexing it gives. Iterating over an mmap gives bytes of length 1 where
+    indexing gives integers, so it is iterated through a memoryview.
+    :meta private:
+    """
+    if isinstance(inputSeq, mmap.mmap):
+        return _mmapItems(inputSeq)
+    return inputSeq
+
+
+def _mmapItems(inputSeq: mmap.mmap) -> Iterator[int]:
+    with memoryview(inputSeq) as items:
+        yield from items
+
+
+def isArray(inputSeq) -> bool:
+    """
+    Returns True if inputSeq is a one-dimensional NumPy array. NumPy is not
+    imported by this check, since an array cannot exist unless it has been.
+    :meta private:
+    """
+    np = sys.modules.get('numpy')
+    return np is not None and isinstance(inputSeq, np.ndarray) and inputSeq.ndim == 1
@@ -0,0 +1,103 @@
+from typing import Iterator, Sequence
+
+from .program import Program
+from .program import ITEM, ONEOF, ANY, IFITEM, IFNEXT, IFPREV, IFAT
+
+
+class StartScanner:
+    """
+    Finds the start positions at which a pattern can match in a single
+    left-to-right pass over the input. Every start position is tracked at the
+    same time, as if the pattern had an implicit leading MANY: each
+    instruction of the program carries a bitmask of the start positions whose
+    threads have reached it.
+
+    Match groups are ignored, including their suchthat guards, so the
+    scanner may report a start position at which a guard would reject the
+    match. The backtracker must be run from each reported start position to
+    confirm the match and find its bindings.
+    :meta private:
+    """
+
+    def __init__(self, program: Program, inputSeq: Sequence, end: bool):
+        self._code = program.code
+        self._inputSeq = inputSeq
+        self._end = end
+        self._closures = program.closures()
+
+    def candidates(self, seeds: Iterator[int] | None = None) -> Iterator[int]:
+        """
+        Returns a generator of the start positions from which the pattern
+        can match, in increasing order. Each position is generated as soon as
+        it is known, so the scan can be abandoned early. If seeds is given, 
+        only the start positions it generates, in increasing order, are
+        considered and the scan skips over the input between them.
+        """
+        code = self._code
+        inputSeq = self._inputSeq
+        n = len(inputSeq)
+        match_pc = len(code) - 1
+        # Bit k of a mask stands for the start position base + k.
+        base = 0
+        matched = 0
+        masks: dict[int, int] = {}
+        closures = self._closures
+        next_seed = 0 if seeds is None else next(seeds, None)
+        idx = 0
+        while idx <= n:
+            if not masks and seeds is not None:
+                # Every start position so far has been decided, so skip to
+                # the next one.
+                if next_seed is None:
+                    return
+                base = idx = next_seed
+            if idx == next_seed:
+                bit = 1 << (idx - base)
+                for q in closures[0]:
+                    masks[q] = masks.get(q, 0) | bit
+                next_seed = idx + 1 if seeds is None else next(seeds, None)
+            if not self._end or idx == n:
+                matched |= masks.get(match_pc, 0)
+            next_masks: dict[int, int] = {}
+            live = 0
+            if idx < n:
+                item = inputSeq[idx]
+                for pc, mask in masks.items():
+                    op, a, _ = code[pc]
+                    if op == ITEM:
+                        ok = item == a
+                    elif op == ONEOF:
+                        ok = item in a
+                    elif op == ANY:
+                        ok = True
+                    elif op == IFITEM:
+                        ok = a(item)
+                    elif op == IFNEXT:
+                        ok = idx + 1 < n and a(item, inputSeq[idx + 1])
+                    elif op == IFPREV:
+                        ok = idx > 0 and a(item, inputSeq[idx - 1])
+                    elif op == IFAT:
+                        ok = a(inputSeq, idx)
+                    else:
+                        continue
+                    if ok:
+                        for q in closures[pc + 1]:
+                            next_masks[q] = next_masks.get(q, 0) | mask
+                for mask in next_masks.values():
+                    live |= mask
+            masks = next_masks
+            # Report or discard every start position that is now decided.
+            first = base
+            while base <= idx:
+                if matched & 1:
+                    yield base
+                elif live & 1:
+                    break
+                matched >>= 1
+                live >>= 1
+                base += 1
+            if base > first:
+                shift = base - first
+                masks = {pc: mask >> shift for pc, mask in masks.items() if mask >> shift}
+            idx += 1
+
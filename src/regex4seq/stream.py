@@ -0,0 +1,180 @@
+import asyncio
+from typing import AsyncIterable, AsyncIterator, Generic, Iterable, Iterator, Sequence, TypeVar
+from types import SimpleNamespace
+
+from .program import OPEN
+from .pikevm import PikeVM, PikeSearch
+from .budget import makeBudget
+from .span import itemsOf
+
+T = TypeVar("T")
+
+
+class StreamMatcher(Generic[T]):
+    """
+    Finds the matches of a pattern in a sequence of items that is pushed to
+    it one item at a time, such as the events arriving from a socket or a
+    log. The matches are the same, and in the same order, as those found by
+    the `findAllMatches` method of the compiled pattern, and each one is
+    returned as soon as it is decided.
+
+    An unanchored search has to follow the matches from every start
+    position that is still live, so the work for each item, and the
+    threads that are kept, grow with the number of them. At most maxStarts
+    of them are followed separately, which bounds the threads to about
+    maxStarts times the length of the compiled pattern. The threads of any
+    later start positions are merged into those of earlier ones, as in an
+    ordinary leftmost search, and then the matches that only those later
+    start positions would find are not returned. With maxStarts=None every
+    start position is followed, so the matches are always exactly those of
+    `findAllMatches`, but there is no bound.
+
+    Only the items that the captures of the live threads may still need are
+    kept, so the window of items stays bounded unless a live thread of a
+    pattern with match groups stays alive indefinitely. By default the
+    search is unanchored at both ends. Patterns that cannot be compiled
+    raise CompileError.
+
+    The options maxSteps and deadline are the same as for `matches`, with
+    the thread steps counted over the whole stream, so `feed` or `close`
+    raises MatchBudgetExceeded once the stream has taken more than maxSteps
+    steps or the deadline has passed. The matcher cannot be used after that.
+    """
+
+    def __init__(self, pattern, namespace: bool=True, start=False, end=False, maxStarts: int | None=100, maxSteps: int | None=None, deadline: float | None=None):
+        vm: PikeVM[T] = pattern if isinstance(pattern, PikeVM) else PikeVM(pattern)
+        self._window: _Window[T] = _Window()
+        self._search: PikeSearch[T] = PikeSearch(vm, self._window, namespace=namespace, start=start, end=end, budget=makeBudget(maxSteps, deadline), maxStarts=maxStarts)
+        self._captures = namespace and any(op == OPEN for op, _, _ in vm._program.code)
+        self._waiting = False
+        self._closed = False
+
+    def feed(self, item: T) -> list[bool | SimpleNamespace]:
+        """
+        Pushes the next item and returns the list of matches that have been
+        decided. An item is examined when its successor arrives, or when the
+        stream is closed, because IfNext looks one item ahead.
+        """
+        if self._closed:
+            raise ValueError('Cannot feed a closed StreamMatcher')
+        self._window.append(item)
+        if not self._waiting:
+            self._waiting = True
+            return []
+        results = self._search.step()
+        # The item before the current one is kept for IfPrevious.
+        if self._captures:
+            self._window.discardBefore(min(self._search.earliestStart(), self._search.position() - 1))
+        else:
+            self._window.discardBefore(self._search.position() - 1)
+        return results
+
+    def feedAll(self, items: Iterable[T]) -> Iterator[bool | SimpleNamespace]:
+        """
+        Pushes each of the items in turn and returns a generator of the
+        matches as they are decided. The stream is not closed.
+        """
+        for item in itemsOf(items):
+            yield from self.feed(item)
+
+    def close(self) -> list[bool | SimpleNamespace]:
+        """
+        Marks the end of the stream and returns the remaining matches. No
+        more items may be fed afterwards.
+        """
+        if self._closed:
+            return []
+        self._closed = True
+        results = self._search.step() if self._waiting else []
+        results.extend(self._search.finish())
+        self._window.discardBefore(len(self._window))
+        return results
+
+    def isFinished(self) -> bool:
+        """
+        Returns True if no more matches can be found, however many items are
+        fed. This can only happen when the search is anchored at the start.
+        """
+        return self._closed or self._search.isFinished()
+
+    def steps(self) -> int:
+        """Returns the number of thread steps that have been taken so far."""
+        return self._search.steps()
+
+    def threads(self) -> int:
+        """Returns the number of threads that are currently live."""
+        return self._search.threads()
+
+    def position(self) -> int:
+        """Returns the number of items that have been fed."""
+        return len(self._window)
+
+    def windowSize(self) -> int:
+        """Returns the number of items that are currently being kept."""
+        return self._window.size()
+
+
+async def afindAllMatches(pattern, items: AsyncIterable[T], namespace: bool=True, start=True, end=True, stepBudget: int | None=None, maxStarts: int | None=100, maxSteps: int | None=None, deadline: float | None=None) -> AsyncIterator[bool | SimpleNamespace]:
+    """
+    Returns an asynchronous generator of the matches of the pattern in the
+    asynchronous iterable items, advancing as each item arrives, with a
+    StreamMatcher. If stepBudget is given, control is handed back to the
+    event loop whenever that many thread steps have been taken since it last
+    was.
+    :meta private:
+    """
+    stream: StreamMatcher[T] = StreamMatcher(pattern, namespace=namespace, start=start, end=end, maxStarts=maxStarts, maxSteps=maxSteps, deadline=deadline)
+    budget = stream.steps() + stepBudget if stepBudget is not None else None
+    async for item in items:
+        for result in stream.feed(item):
+            yield result
+        if stream.isFinished():
+            return
+        if stepBudget is not None and budget is not None and stream.steps() >= budget:
+            await asyncio.sleep(0)
+            budget = stream.steps() + stepBudget
+    for result in stream.close():
+        yield result
+
+
+class _Window(Sequence[T]):
+    """
+    The items of a stream that are still being kept, indexed by their
+    position in the whole stream. The length is the number of items fed.
+    :meta private:
+    """
+
+    def __init__(self):
+        self._items: list[T] = []
+        self._head = 0
+        self._offset = 0
+
+    def __len__(self):
+        return self._offset + len(self._items)
+
+    def size(self) -> int:
+        return len(self._items) - self._head
+
+    def append(self, item: T):
+        self._items.append(item)
+
+    def discardBefore(self, pos: int):
+        self._head = max(self._head, min(pos - self._offset, len(self._items)))
+        if self._head > 64 and self._head * 2 > len(self._items):
+            del self._items[:self._head]
+            self._offset += self._head
+            self._head = 0
+
+    def _index(self, i: int) -> int:
+        if i < self._offset + self._head or i >= len(self):
+            raise IndexError(f'Item {i} is no longer in the window of the stream')
+        return i - self._offset
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            lo, hi, _ = i.indices(len(self))
+            if hi <= lo:
+                return []
+            k = self._index(lo)
+            return self._items[k:k + hi - lo]
+        return self._items[self._index(i)]
@@ -2,13 +2,16 @@ from abc import ABC, abstractmethod
 from types import SimpleNamespace
 from collections import deque
 
+from .span import Span
+
 class Trail(ABC):
+    __slots__ = ()
 
     @abstractmethod
     def add(self, name, lo, hi, call):
         """Add a capture to the trail"""
 
-    def namespace(self, inputSeq, history=None) -> bool | SimpleNamespace:
+    def namespace(self, inputSeq, history=None, spans=False) -> bool | SimpleNamespace:
         return True
 
     def isCapture(self) -> bool:
@@ -16,12 +19,14 @@ class Trail(ABC):
 
 
 class DiscardTrail(Trail):
+    __slots__ = ()
 
     def add(self, name, lo, hi, call):
         return self
 
 
 class CaptureTrail(Trail):
+    __slots__ = ('_name', '_lo', '_hi', '_trail', '_call')
 
     def __init__(self, name, lo, hi, call, trail):
         self._name = name
@@ -36,12 +41,14 @@ class CaptureTrail(Trail):
     def add(self, name, lo, hi, call) -> 'CaptureTrail':
         return CaptureTrail(name, lo, hi, call, self)
 
-    def namespace(self, inputSeq, history=None) -> bool | SimpleNamespace:
+    def namespace(self, inputSeq, history=None, spans=False) -> bool | SimpleNamespace:
         ns = SimpleNamespace()
         t = self
         while t.isCapture():
-            if self._call:
-                value = self._call(inputSeq, t._lo, t._hi)
+            if spans:
+                value = Span(inputSeq, t._lo, t._hi, t._call)
+            elif t._call:
+                value = t._call(inputSeq, t._lo, t._hi)
             else:
                 value = inputSeq[t._lo:t._hi]
             setattr(ns, t._name, value)
@@ -49,13 +56,14 @@ class CaptureTrail(Trail):
                 name = history[t._name]
                 if not hasattr(ns, name):
                     setattr(ns, name, deque())
-                q = getattr(ns, name, [])
+                q = getattr(ns, name)
                 q.appendleft(value)
                 setattr(ns, name, q)
             t = t._trail
         return ns
 
 class StartCaptureTrail(Trail):
+    __slots__ = ()
 
     def add(self, name, lo, hi, call):
         return CaptureTrail(name, lo, hi, call, self)
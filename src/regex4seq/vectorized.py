@@ -0,0 +1,172 @@
+from typing import Callable, Iterator, Sequence
+from types import SimpleNamespace
+
+from .program import IFNEXT, IFPREV, IFAT, CLOSE
+from .pikevm import PikeVM
+from .lazydfa import LazyDFA
+from .trail import Trail, StartCaptureTrail
+from .budget import Budget, limitsOf
+from .span import isArray
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError('Vectorized predicates require NumPy to be installed') from e
+    return numpy
+
+
+def scalarPredicate(vec: Callable) -> Callable:
+    """
+    Returns a predicate that applies the vectorized predicate vec to a single
+    item, for inputs that are not NumPy arrays.
+    :meta private:
+    """
+    def predicate(x) -> bool:
+        np = _numpy()
+        return bool(np.asarray(vec(np.asarray([x])), dtype=bool).reshape(-1)[0])
+    predicate.__wrapped__ = vec  # type: ignore[attr-defined]
+    return predicate
+
+
+def equalityMask(arr, items: tuple):
+    """:meta private:"""
+    np = _numpy()
+    mask = np.zeros(len(arr), dtype=bool)
+    for x in items:
+        mask |= _asMask(np, arr == x, arr)
+    return mask
+
+
+def scalarMask(arr, predicateFunction: Callable):
+    """:meta private:"""
+    np = _numpy()
+    return np.fromiter((bool(predicateFunction(x)) for x in arr), dtype=bool, count=len(arr))
+
+
+def _asMask(np, result, arr):
+    mask = np.asarray(result, dtype=bool)
+    if mask.shape != arr.shape:
+        try:
+            mask = np.broadcast_to(mask, arr.shape)
+        except ValueError:
+            raise ValueError(f'A vectorized predicate returned shape {mask.shape} for an array of shape {arr.shape}') from None
+    return mask
+
+
+class Vectorized:
+    """
+    A pattern that has been rewritten to match the class ids of the items of
+    a particular NumPy array. Every test of a single item in the pattern is
+    evaluated once over the whole array, giving one boolean mask per test.
+    The distinct combinations of masks are the classes and each test becomes
+    a OneOf over the ids of the classes that pass it. The bindings refer to
+    the positions of the items, so they are taken from the original array.
+    :meta private:
+    """
+
+    def __init__(self, pattern, arr, ids: list[int]):
+        self._pattern = pattern
+        self._arr = arr
+        self._ids = ids
+
+    def matches(self, namespace: bool, start, end, history, spans, budget: Budget | None=None) -> bool | SimpleNamespace:
+        if not namespace:
+            dfa: LazyDFA[int] = self._pattern.compile(engine='dfa')
+            return dfa._matches(self._ids, False, start, end, None, False, budget)
+        found = self._bounds(start, end, budget)
+        if found is None:
+            return False
+        return found.namespace(self._arr, history=history, spans=spans)
+
+    def _bounds(self, start, end, budget: Budget | None) -> Trail | None:
+        """
+        Returns the trail of the match that `matches` finds, or None. The
+        DFA of the reversed pattern is run leftwards over the class ids to
+        find where the leftmost match starts, and the Pike VM, which is what
+        finds the captures, is only run from there.
+        :meta private:
+        """
+        ids = self._ids
+        if self._pattern._program().guarded:
+            # A profiled pattern is kept to the backtracker.
+            return self._backtrackBounds(start, end, budget)
+        vm: PikeVM[int] = self._pattern.compile()
+        try:
+            rdfa: LazyDFA[int] = self._pattern._reversed(False).compile(engine='dfa')
+        except ValueError:
+            return vm._run(ids, True, start, end, budget)
+        if not rdfa.isSupported():
+            return vm._run(ids, True, start, end, budget)
+        # The reversed pattern is anchored at the end of the ids when the
+        # match has to end there.
+        furthest = rdfa._lastAccept(reversed(ids), end, budget)
+        if furthest is None or start and furthest < len(ids):
+            return None
+        found = vm._search(ids, True, True, end, len(ids) - furthest, budget=budget)
+        return None if found is None else found[2]
+
+    def _backtrackBounds(self, start, end, budget: Budget | None) -> Trail | None:
+        """:meta private:"""
+        ids = self._ids
+        n = len(ids)
+        for lo in self._pattern._startPositions(ids, start, end):
+            for hi, t in self._pattern._backtrack(ids, lo, StartCaptureTrail(), budget):
+                if not end or hi == n:
+                    return t
+        return None
+
+    def findAllMatches(self, namespace: bool, start, end, memo, memoLimit, spans, budget: Budget | None=None) -> Iterator[bool | SimpleNamespace]:
+        if not namespace:
+            yield from self._pattern.findAllMatches(self._ids, namespace=False, start=start, end=end, memo=memo, memoLimit=memoLimit, **limitsOf(budget))
+            return
+        ids = self._ids
+        n = len(ids)
+        trail0 = StartCaptureTrail()
+        for lo in self._pattern._startPositions(ids, start, end):
+            for hi, t in self._pattern._backtrack(ids, lo, trail0, budget):
+                if not end or hi == n:
+                    yield t.namespace(self._arr, spans=spans)
+
+
+def vectorize(pattern, arr: Sequence) -> Vectorized | None:
+    """
+    Returns the pattern rewritten to match the class ids of the items of the
+    NumPy array arr, or None if that cannot be done because the pattern uses
+    IfNext, IfPrevious or a suchthat guard, which look at the items
+    themselves.
+    :meta private:
+    """
+    program = pattern._program()
+    # A profiled program is guarded too but its counting does not look at
+    # the items, so only the guards of match groups rule it out.
+    if program is None or any(op == IFNEXT or op == IFPREV or op == IFAT or op == CLOSE and b is not None for op, _, b in program.code):
+        return None
+    np = _numpy()
+    tests: dict[int, Callable] = {}
+    stack = [pattern]
+    while stack:
+        node = stack.pop()
+        if id(node) not in tests:
+            test = node._itemTest()
+            if test is not None:
+                tests[id(node)] = test
+            stack.extend(node._children())
+    keys = list(tests)
+    if not keys:
+        return None
+    masks = np.stack([_asMask(np, tests[k](arr), arr) for k in keys], axis=1)
+    if len(keys) <= 64:
+        # Packing each row of masks into an integer is much quicker to sort.
+        codes = masks.astype(np.uint64) @ (np.uint64(1) << np.arange(len(keys), dtype=np.uint64))
+        uniq, ids = np.unique(codes, return_inverse=True)
+        classes = (uniq[:, None] >> np.arange(len(keys), dtype=np.uint64)) & np.uint64(1) == 1
+    else:
+        classes, ids = np.unique(masks, axis=0, return_inverse=True)
+    members = {k: tuple(c for c in range(len(classes)) if classes[c, j]) for j, k in enumerate(keys)}
+
+    # Imported here because the pattern classes import this module.
+    from .regex4seq import OneOf
+    rewritten = pattern._transform(lambda node: OneOf(*members[id(node)]) if id(node) in members else node)
+    return Vectorized(rewritten, arr, ids.reshape(-1).tolist())
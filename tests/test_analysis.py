@@ -0,0 +1,69 @@
+from regex4seq import NONE, ANY, MANY, FAIL, Item, IfItem, OneOf, Items
+
+def test_lengths():
+    # Arrange
+    p = Items('a', 'b') & (Item('c') | Items('d', 'e', 'f')) & ANY.optional()
+
+    # Act/Assert
+    assert p.minLength() == 3
+    assert p.maxLength() == 6
+    assert not p.isNullable()
+    assert (p & MANY).maxLength() is None
+    assert Item('a').repeat().minLength() == 0
+
+def test_nullable():
+    # Act/Assert
+    assert NONE.isNullable()
+    assert MANY.isNullable()
+    assert (Item('a').optional() & Item('b').repeat()).isNullable()
+    assert not (Item('a').optional() & Item('b')).isNullable()
+    assert not FAIL.isNullable()
+
+def test_first_items():
+    # Arrange
+    p = Item('a').optional() & OneOf('b', 'c') & Item('d')
+
+    # Act/Assert
+    assert p.firstItems() == {'a', 'b', 'c'}
+    assert (Item('a') | IfItem(str.isdigit)).firstItems() is None
+    assert (FAIL | Item('a')).firstItems() == {'a'}
+    assert Item(['unhashable']).firstItems() is None
+
+def test_anchored_match_rejected_without_backtracking():
+    # Arrange
+    calls = []
+    def pf(x):
+        calls.append(x)
+        return True
+    p = Item('a') & IfItem(pf).repeat() & Items('b', 'c')
+
+    # Act/Assert
+    assert not p.matches('xyzbc')
+    assert not p.matches('a')
+    assert calls == []
+
+def test_unanchored_search_skips_impossible_starts():
+    # Arrange
+    calls = []
+    def even(s, lo, hi):
+        calls.append(lo)
+        return (hi - lo) % 2 == 0
+    p = OneOf('x', 'y') & MANY.var('m', suchthat=even) & Item(';')
+
+    # Act
+    found = [ns.m for ns in p.findAllMatches('abxcd;efy;', start=False, end=False)]
+
+    # Assert
+    assert found == ['cd;efy', 'cd', '']
+    assert set(calls) <= {3, 9}
+
+def test_end_anchored_search_skips_long_remainders():
+    # Arrange
+    p = (ANY & Item('z')).var('m')
+
+    # Act
+    ns = p.matches('azbzcz', start=False, end=True)
+
+    # Assert
+    assert ns.m == 'cz'
+    assert list(p._startPositions('azbzcz', False, True)) == [4]
@@ -0,0 +1,115 @@
+import asyncio
+
+import pytest
+
+from regex4seq import ANY, MANY, Item, IfItem, CompileError
+
+async def agen(items, log=None):
+    for x in items:
+        if log is not None:
+            log.append(x)
+        yield x
+
+async def collect(aiter):
+    return [x async for x in aiter]
+
+def test_afindAllMatches_same_as_compiled():
+    # Arrange
+    p = (Item('a') & MANY.var('x') & Item('b')) | ANY.var('x')
+    seq = list("abcabxb")
+    for start in (True, False):
+        for end in (True, False):
+
+            # Act
+            found = asyncio.run(collect(p.afindAllMatches(agen(seq), start=start, end=end)))
+
+            # Assert
+            assert found == list(p.compile().findAllMatches(seq, start=start, end=end))
+
+def test_afindAllMatches_yields_as_items_arrive():
+    # Arrange
+    p = Item('x') & ANY.var('y')
+    log: list = []
+
+    async def first():
+        async for ns in p.afindAllMatches(agen(['a', 'x', 'b', 'c', 'd'], log), start=False, end=False):
+            return ns
+
+    # Act
+    ns = asyncio.run(first())
+
+    # Assert
+    assert ns.y == ['b']
+    assert log == ['a', 'x', 'b', 'c']
+
+def test_afindAllMatches_step_budget_yields_to_loop():
+    # Arrange
+    p = (IfItem(lambda x: x == 'a') | Item('a')).repeat() & Item('b')
+    ticks: list = []
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0)
+
+    async def main():
+        t = asyncio.create_task(ticker())
+        found = [ns async for ns in p.afindAllMatches(_plain('a' * 200), start=False, end=False, stepBudget=50)]
+        t.cancel()
+        return found
+
+    # Act
+    found = asyncio.run(main())
+
+    # Assert
+    assert found == []
+    assert len(ticks) > 10
+
+class _plain:
+    # An async iterator that never awaits, so only the step budget can yield.
+    def __init__(self, items):
+        self._it = iter(items)
+    def __aiter__(self):
+        return self
+    async def __anext__(self):
+        try:
+            return next(self._it)
+        except StopIteration:
+            raise StopAsyncIteration
+
+def test_afindAllMatches_checks_budget():
+    # Act/Assert
+    with pytest.raises(ValueError):
+        Item(1).afindAllMatches(agen([1]), stepBudget=0)
+
+def test_afindAllMatches_guard_not_compiled():
+    # Arrange
+    p = ANY.var('x', suchthat=lambda s, lo, hi: True)
+
+    # Act/Assert
+    with pytest.raises(CompileError):
+        p.afindAllMatches(agen([1]))
+
+def test_afindAllMatches_one_match_per_start_and_end():
+    # Arrange - there are two ways of matching 'aa' but one start and end.
+    p = (Item('a') | IfItem(lambda x: x == 'a')).repeat()
+
+    # Act
+    found = asyncio.run(collect(p.afindAllMatches(agen('aa'), namespace=False)))
+
+    # Assert
+    assert found == [True]
+    assert len(list(p.findAllMatches('aa', namespace=False))) == 4
+
+def test_afindAllMatches_max_starts():
+    # Arrange
+    p = Item('a') & MANY & Item('b')
+    seq = 'a' * 20 + 'b'
+
+    # Act
+    capped = asyncio.run(collect(p.afindAllMatches(agen(seq), namespace=False, start=False, end=False, maxStarts=5)))
+    found = asyncio.run(collect(p.afindAllMatches(agen(seq), namespace=False, start=False, end=False, maxStarts=None)))
+
+    # Assert
+    assert len(found) == 20
+    assert 0 < len(capped) < 20
@@ -0,0 +1,58 @@
+from regex4seq import ANY, MANY, Item, IfItem, OneOf
+from regex4seq.trail import StartCaptureTrail
+
+def test_long_repeat_does_not_overflow():
+    # Arrange
+    p = IfItem(lambda x: x >= 0).repeat().var('x') & Item(-1)
+    s = list(range(200000)) + [-1]
+
+    # Act
+    ns = p.matches(s)
+
+    # Assert
+    assert len(ns.x) == 200000
+
+def test_long_unanchored_search():
+    # Arrange
+    p = (Item('a') & ANY).repeat() & Item('b')
+    s = 'ax' * 50000 + 'b'
+
+    # Act
+    ns = p.matches(s, start=False)
+
+    # Assert
+    assert ns
+
+def test_same_results_as_recursive_backtracker():
+    # Arrange
+    p = (OneOf('a', 'b').var('x') | MANY.var('y')).repeat() & ANY.optional()
+    s = 'abba'
+
+    # Act
+    expected = [(i, t.namespace(s)) for i, t in p._gobble(s, 0, StartCaptureTrail())]
+    actual = [(i, t.namespace(s)) for i, t in p._backtrack(s, 0, StartCaptureTrail())]
+
+    # Assert
+    assert actual == expected
+
+def test_suchthat_and_extract():
+    # Arrange
+    even = lambda s, lo, hi: (hi - lo) % 2 == 0
+    span = lambda s, lo, hi: (lo, hi)
+    p = MANY.var('x', suchthat=even, extract=span) & MANY.var('y', extract=span)
+
+    # Act
+    results = [(ns.x, ns.y) for ns in p.findAllMatches('abcde')]
+
+    # Assert
+    assert results == [((0, 4), (4, 5)), ((0, 2), (2, 5)), ((0, 0), (0, 5))]
+
+def test_cached_predicates_still_backtrack():
+    # Arrange
+    p = IfItem(lambda x: x > 0).repeat().var('x')
+
+    # Act
+    ns = p.matches([1, 2, 3], cachePredicates=True)
+
+    # Assert
+    assert ns.x == [1, 2, 3]
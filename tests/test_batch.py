@@ -0,0 +1,154 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from regex4seq import ANY, MANY, Item, IfItem, IfNext, registerPredicate, NamedPredicate, MatchBudgetExceeded
+
+IS_EVEN = registerPredicate('test_batch.is_even', lambda x: x % 2 == 0)
+ASCENDING = registerPredicate('test_batch.ascending', lambda x, y: x < y)
+
+def test_named_predicate_pickles_by_name():
+    # Arrange
+    p = IfItem(IS_EVEN).repeat() & IfNext(ASCENDING) & ANY
+
+    # Act
+    q = pickle.loads(pickle.dumps(p))
+
+    # Assert
+    assert q.matches([2, 4, 5, 7])
+    assert not q.matches([3])
+
+def test_register_predicate_conflict():
+    # Act/Assert
+    with pytest.raises(ValueError):
+        registerPredicate('test_batch.is_even', lambda x: True)
+
+def test_named_predicate_unknown():
+    # Arrange
+    f = NamedPredicate('test_batch.unknown')
+
+    # Act/Assert
+    with pytest.raises(LookupError):
+        f(1)
+
+def test_matchMany_in_input_order():
+    # Arrange
+    p = IfItem(IS_EVEN).repeat().var('evens') & ANY.var('rest')
+    seqs = [[i] * (i % 3) + [i] for i in range(40)]
+
+    # Act
+    results = p.matchMany(seqs, workers=2, chunksize=3)
+
+    # Assert
+    assert results == [p.matches(s) for s in seqs]
+
+def test_matchMany_with_executor():
+    # Arrange
+    p = IfItem(IS_EVEN) & Item(1)
+    seqs = [[0, 1], [1, 1], [2, 1], [2]]
+
+    # Act
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        first = p.matchMany(seqs, executor=pool, namespace=False)
+        second = p.matchMany(seqs, executor=pool, start=False, end=False, namespace=False)
+
+    # Assert
+    assert first == [True, False, True, False]
+    assert second == [True, False, True, False]
+
+def test_matchMany_max_steps():
+    # Arrange
+    p = (Item('a').repeat() & Item('a')).repeat() & Item('b')
+    seqs = ['ab', 'a' * 30, 'aab']
+
+    # Act
+    with pytest.raises(MatchBudgetExceeded) as info:
+        p.matchMany(seqs, workers=2, chunksize=1, maxSteps=10000)
+
+    # Assert
+    assert info.value.reason == 'maxSteps'
+    assert p.matchMany([seqs[0], seqs[2]], workers=2, maxSteps=10000, namespace=False) == [True, True]
+    with pytest.raises(ValueError):
+        p.matchMany(seqs, workers=1, maxSteps=-1)
+
+def test_matchMany_lambda_not_picklable():
+    # Arrange
+    p = IfItem(lambda x: x > 0)
+
+    # Act/Assert
+    with pytest.raises(ValueError):
+        p.matchMany([[1]], workers=1)
+
+def test_searchParallel_same_as_scan():
+    # Arrange
+    p = (Item(1) & IfItem(IS_EVEN).repeat(0, 3).var('evens') & Item(1)).var('run')
+    seq = [1, 2, 1, 4, 6, 1, 1, 3, 1, 8, 8, 8, 1] * 5
+
+    # Act
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        results = [p.searchParallel(seq, executor=pool, chunksize=size) for size in (1, 4, 7, 100)]
+
+    # Assert
+    for found in results:
+        assert found == list(p.scan(seq))
+
+def test_searchParallel_options():
+    # Arrange
+    p = Item('a').repeat(1, 2).var('x') | Item('b')
+    seq = 'aaabaaab' * 3
+
+    # Act
+    longest = p.searchParallel(seq, workers=2, chunksize=3, longest=True)
+    spans = p.searchParallel(seq, workers=2, chunksize=3, spans=True)
+    plain = p.searchParallel(seq, workers=2, chunksize=3, namespace=False)
+
+    # Assert
+    assert longest == list(p.scan(seq, longest=True))
+    assert spans == list(p.scan(seq, spans=True))
+    assert plain == list(p.scan(seq, namespace=False))
+
+def test_searchParallel_if_previous_at_chunk_boundary():
+    # Arrange
+    p = IfNext(ASCENDING).reverse()
+    q = (ANY & IfNext(ASCENDING)).var('x').reverse()
+    seq = [5, 1, 7, 3, 9, 2]
+
+    # Act
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        found = [p.searchParallel(seq, executor=pool, chunksize=size, namespace=False) for size in (1, 2, 3, 4)]
+        pairs = [q.searchParallel(seq, executor=pool, chunksize=size) for size in (1, 2, 3)]
+
+    # Assert
+    assert found == [list(p.scan(seq, namespace=False))] * 4
+    assert found[0] == [(1, 2, True), (3, 4, True), (5, 6, True)]
+    assert pairs == [list(q.scan(seq))] * 3
+
+def test_searchParallel_unbounded_pattern():
+    # Arrange
+    p = Item(1) & MANY & Item(1)
+
+    # Act
+    found = p.searchParallel([0, 1, 2, 1, 1], workers=2, chunksize=1)
+
+    # Assert
+    assert found == list(p.scan([0, 1, 2, 1, 1]))
+
+def test_searchParallel_max_steps():
+    # Arrange
+    p = Item('a').repeat(0, 3) & Item('b')
+    seq = 'aab' * 100
+
+    # Act
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        with pytest.raises(MatchBudgetExceeded):
+            p.searchParallel(seq, executor=pool, chunksize=150, maxSteps=100)
+        found = p.searchParallel(seq, executor=pool, chunksize=150, maxSteps=10000)
+
+    # Assert
+    assert found == list(p.scan(seq))
+
+def test_searchParallel_bad_chunksize():
+    # Act/Assert
+    with pytest.raises(ValueError):
+        Item(1).searchParallel([1], workers=1, chunksize=0)
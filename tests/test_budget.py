@@ -0,0 +1,167 @@
+import asyncio
+import pickle
+import time
+
+import pytest
+
+from regex4seq import MANY, Item, IfItem, LazyDFA, MatchBudgetExceeded, PatternSet, PikeVM, StreamMatcher
+
+def pathological():
+    return (Item('a').repeat() & Item('a')).repeat() & Item('b')
+
+def test_max_steps_stops_a_pathological_match():
+    # Arrange
+    p = pathological()
+
+    # Act
+    with pytest.raises(MatchBudgetExceeded) as info:
+        p.matches('a' * 30, namespace=False, maxSteps=10000)
+
+    # Assert
+    assert info.value.reason == 'maxSteps'
+    assert info.value.steps > 10000
+    assert 0 <= info.value.position <= 30
+
+def test_deadline_stops_a_pathological_match():
+    # Arrange
+    p = pathological()
+
+    # Act
+    with pytest.raises(MatchBudgetExceeded) as info:
+        p.matches('a' * 30, namespace=False, deadline=time.monotonic() + 0.01)
+
+    # Assert
+    assert info.value.reason == 'deadline'
+
+def test_budget_does_not_change_results():
+    # Arrange
+    p = IfItem(lambda x: x > 0).repeat().var('x') & Item(0).var('z')
+    inputSeq = [3, 1, 4, 0, 5, 9, 0]
+
+    # Act
+    found = list(p.findAllMatches(inputSeq, start=False, end=False, maxSteps=10000, deadline=time.monotonic() + 60))
+
+    # Assert
+    assert found == list(p.findAllMatches(inputSeq, start=False, end=False))
+    assert p.matches(inputSeq, end=False, maxSteps=10000) == p.matches(inputSeq, end=False)
+
+def test_max_steps_counts_over_all_matches():
+    # Arrange
+    p = Item('a').repeat()
+
+    # Act
+    found = p.findAllMatches('a' * 100, start=False, end=False, namespace=False, maxSteps=200)
+
+    # Assert
+    with pytest.raises(MatchBudgetExceeded):
+        list(found)
+
+def test_max_steps_in_scan():
+    # Arrange
+    compiled = Item('a') & Item('b')
+    guarded = (Item('a') & Item('b')).var('x', suchthat=lambda s, lo, hi: True)
+
+    # Act
+    assert len(list(compiled.scan('ab' * 10, maxSteps=1000))) == 10
+
+    # Assert
+    with pytest.raises(MatchBudgetExceeded):
+        list(compiled.scan('ab' * 1000, maxSteps=100))
+    with pytest.raises(MatchBudgetExceeded):
+        list(guarded.scan('ab' * 1000, maxSteps=100))
+
+def test_max_steps_in_compiled_engines():
+    # Arrange
+    p = (Item('a') | Item('b')).repeat() & Item('c')
+    inputSeq = 'ab' * 1000
+
+    # Act
+    with pytest.raises(MatchBudgetExceeded):
+        PikeVM(p).matches(inputSeq, maxSteps=100)
+    with pytest.raises(MatchBudgetExceeded):
+        LazyDFA(p).matches(inputSeq, namespace=False, maxSteps=100)
+
+    # Assert
+    assert not PikeVM(p).matches(inputSeq, maxSteps=100000)
+    assert not LazyDFA(p).matches(inputSeq, namespace=False, maxSteps=100000)
+
+def test_max_steps_with_memo_and_cached_predicates():
+    # Arrange
+    p = (Item('a') | IfItem(lambda x: x == 'a')).repeat() & Item('b')
+
+    # Act
+    with pytest.raises(MatchBudgetExceeded):
+        p.matches('a' * 200, namespace=False, memo=True, maxSteps=50)
+    with pytest.raises(MatchBudgetExceeded):
+        p.matches('a' * 20, namespace=False, cachePredicates=True, maxSteps=1000)
+
+    # Assert
+    assert not p.matches('a' * 20, namespace=False, memo=True, maxSteps=1000)
+
+def test_negative_max_steps():
+    # Arrange
+    p = Item('a')
+
+    # Act and Assert
+    with pytest.raises(ValueError):
+        p.matches('a', maxSteps=-1)
+
+def test_budget_exceeded_pickles():
+    # Arrange
+    e = MatchBudgetExceeded('maxSteps', 101, 7)
+
+    # Act
+    f = pickle.loads(pickle.dumps(e))
+
+    # Assert
+    assert (f.reason, f.steps, f.position, str(f)) == (e.reason, e.steps, e.position, str(e))
+
+def test_max_steps_in_stream():
+    # Arrange
+    p = Item('a') & MANY & Item('b')
+    stream = StreamMatcher(p, maxSteps=1000)
+    roomy = StreamMatcher(p, maxSteps=100000, deadline=time.monotonic() + 60)
+    plain = StreamMatcher(p)
+
+    # Act
+    with pytest.raises(MatchBudgetExceeded) as info:
+        for x in 'a' * 1000:
+            stream.feed(x)
+
+    # Assert
+    assert info.value.reason == 'maxSteps'
+    assert 0 < info.value.position < 1000
+    assert [*roomy.feedAll('aab'), *roomy.close()] == [*plain.feedAll('aab'), *plain.close()]
+
+def test_max_steps_in_afindAllMatches():
+    # Arrange
+    p = Item('a') & MANY & Item('b')
+
+    async def run(maxSteps):
+        async def items():
+            for x in 'a' * 1000:
+                yield x
+        return [x async for x in p.afindAllMatches(items(), start=False, end=False, maxSteps=maxSteps)]
+
+    # Act
+    with pytest.raises(MatchBudgetExceeded):
+        asyncio.run(run(1000))
+
+    # Assert
+    assert asyncio.run(run(10 ** 6)) == []
+    with pytest.raises(ValueError):
+        p.afindAllMatches(None, maxSteps=-1)
+
+def test_max_steps_in_patternset():
+    # Arrange
+    compiled = PatternSet([Item('a') & MANY & Item('b')])
+    guarded = PatternSet([pathological().var('x', suchthat=lambda s, lo, hi: True)])
+
+    # Act
+    with pytest.raises(MatchBudgetExceeded):
+        compiled.matches('a' * 1000, start=False, end=False, maxSteps=1000)
+    with pytest.raises(MatchBudgetExceeded):
+        guarded.matches('a' * 30, maxSteps=10000)
+
+    # Assert
+    assert compiled.matches('a' * 10 + 'b', maxSteps=1000) == {0: (0, 11)}
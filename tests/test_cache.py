@@ -0,0 +1,78 @@
+import pickle
+
+from regex4seq import ANY, MANY, Item, IfItem, OneOf, Items, setCacheSize, clearCaches, cacheInfo
+
+def build():
+    return (Items('a', 'b').var('x') | OneOf('c', 'd')).repeat(1, 3) & MANY
+
+def test_structurally_equal_patterns():
+    # Arrange
+    p, q = build(), build()
+
+    # Assert
+    assert p is not q
+    assert p == q
+    assert hash(p) == hash(q)
+    assert p != (Items('a', 'b').var('y') | OneOf('c', 'd')).repeat(1, 3) & MANY
+    assert Item(1) != Item(True)
+    assert IfItem(lambda x: x) != IfItem(lambda x: x)
+
+def test_intern_shares_subtrees():
+    # Arrange
+    p = build().intern()
+
+    # Act
+    q = (Items('a', 'b').var('x') | ANY).intern()
+
+    # Assert
+    assert build().intern() is p
+    assert q._lhs is p._lhs._original._lhs
+
+def test_compile_and_optimize_are_cached():
+    # Arrange
+    clearCaches()
+
+    # Act
+    c1, c2 = build().compile(), build().compile()
+    o1, o2 = build().optimize(), build().optimize()
+
+    # Assert
+    assert c1 is c2
+    assert o1 is o2
+    info = cacheInfo()
+    assert (info.hits, info.misses, info.size) == (2, 2, 2)
+    assert c1.matches('abcab')
+
+def test_cache_size():
+    # Arrange
+    setCacheSize(1)
+    try:
+        # Act
+        Item('a').compile()
+        Item('b').compile()
+
+        # Assert
+        assert cacheInfo().size == 1
+        setCacheSize(0)
+        assert Item('a').compile() is not Item('a').compile()
+    finally:
+        setCacheSize(1024)
+
+def test_unhashable_items_are_not_cached():
+    # Arrange
+    p = Item([1, 2])
+
+    # Act/Assert
+    assert p.compile().matches([[1, 2]])
+    assert p.intern() is p
+
+def test_pickled_pattern_is_equal():
+    # Arrange
+    p = build()
+    hash(p)
+
+    # Act
+    q = pickle.loads(pickle.dumps(p))
+
+    # Assert
+    assert q == p and hash(q) == hash(p)
@@ -0,0 +1,104 @@
+import pytest
+
+from regex4seq import NONE, ANY, Item, OneOf
+from regex4seq.regex4seq import CountedRepeat, Repeat
+from regex4seq.trail import StartCaptureTrail
+
+def test_counted_repeat_bounds():
+    # Arrange
+    p = Item('a').repeat(2, 3)
+
+    # Act/Assert
+    assert [p.matches('a' * n) for n in range(5)] == [False, False, True, True, False]
+    assert Item('a').repeat(2).matches('a' * 7)
+    assert not Item('a').repeat(2).matches('a')
+
+def test_counted_repeat_is_greedy():
+    # Arrange
+    p = OneOf('a', 'b').repeat(1, 3).var('x') & ANY.repeat().var('y')
+
+    # Act
+    found = [(ns.x, ns.y) for ns in p.findAllMatches('abab')]
+
+    # Assert
+    assert found == [('aba', 'b'), ('ab', 'ab'), ('a', 'bab')]
+
+def test_counted_repeat_does_not_unroll():
+    # Arrange
+    p = (Item('a') & ANY).repeat(0, 1000000)
+
+    # Act
+    q = p.compile()
+
+    # Assert
+    assert p.countNodes() == 4
+    assert len(q._program.code) < 12
+    assert q.matches('ax' * 5000)
+
+def test_counted_repeat_with_nullable_body():
+    # Arrange - the mandatory occurrences may be empty, the rest may not.
+    p = Item('a').optional().repeat(3, 4)
+
+    # Act
+    ends = [i for i, _ in p._gobble('aa', 0, StartCaptureTrail())]
+
+    # Assert
+    assert ends[0] == 2 and ends[-1] == 0
+    assert ends == [i for i, _ in p._backtrack('aa', 0, StartCaptureTrail())]
+    assert p.matches('')
+    assert not p.matches('aaaaa')
+
+@pytest.mark.parametrize('engine', ['pike', 'dfa'])
+def test_compiled_counted_repeat(engine):
+    # Arrange
+    p = (Item('a') & (OneOf('b', 'c').repeat(2, 4)).var('x')).repeat(1, 2)
+    q = p.compile(engine=engine)
+
+    # Act/Assert
+    for s in ('abb', 'abcbc', 'abbabbbb', 'ab', 'abbbbb', 'abbabbabb'):
+        for start in (True, False):
+            for end in (True, False):
+                assert q.matches(s, start=start, end=end) == p.matches(s, start=start, end=end)
+        assert [*q.findAllMatches(s)] == [*p.findAllMatches(s)]
+
+def test_counted_repeat_memo():
+    # Arrange
+    p = ANY.optional().repeat(0, 200) & Item('b')
+
+    # Act/Assert
+    assert p.matches('a' * 150 + 'b', namespace=False, memo=True)
+    assert not p.matches('a' * 250 + 'b', namespace=False, memo=True)
+
+def test_counted_repeat_invalid_counts():
+    with pytest.raises(ValueError):
+        Item('a').repeat(-1)
+    with pytest.raises(ValueError):
+        Item('a').repeat(3, 2)
+
+def test_counted_repeat_counts_must_be_integers():
+    with pytest.raises(ValueError):
+        Item('a').repeat(1.5, 3)
+    with pytest.raises(ValueError):
+        Item('a').repeat(None, 3)
+    with pytest.raises(ValueError):
+        Item('a').repeat(0, 2.0)
+    with pytest.raises(ValueError):
+        Item('a').repeat(0.0)
+    assert Item('a').repeat(1, None).minLength() == 1
+
+def test_counted_repeat_analysis():
+    # Arrange
+    p = (Item('a') & ANY.optional()).repeat(2, 5)
+
+    # Assert
+    assert p.minLength() == 2
+    assert p.maxLength() == 10
+    assert not p.isNullable()
+    assert p.firstItems() == frozenset({'a'})
+
+def test_counted_repeat_optimize():
+    # Assert
+    assert isinstance(Item('a').repeat(1, 1).optimize(), Item)
+    assert Item('a').repeat(0, 0).optimize() is NONE
+    assert isinstance(Item('a').repeat(0, None).optimize(), Repeat)
+    assert isinstance(Item('a').repeat(2, 5).optimize(), CountedRepeat)
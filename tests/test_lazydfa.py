@@ -0,0 +1,111 @@
+import random
+import sys
+import threading
+
+import pytest
+
+from regex4seq import ANY, MANY, Item, IfItem, OneOf, Items
+
+def test_dfa_matches_like_original():
+    # Arrange
+    p = Item(1).optional() & Items(0, 1).repeat() & Item(0).optional()
+    d = p.compile(engine='dfa')
+
+    # Act/Assert
+    assert d.isSupported()
+    for s in ([], [1], [0, 1], [1, 0, 1, 0], [1, 0, 0], [0, 0]):
+        for start in (True, False):
+            for end in (True, False):
+                assert d.matches(s, start=start, end=end) == p.matches(s, start=start, end=end)
+
+def test_dfa_captures_come_from_original():
+    # Arrange
+    d = (MANY.var("lhs") & Item('a') & MANY.var("rhs")).compile(engine='dfa')
+
+    # Act
+    ns = d.matches(['x', 'a', 'y'])
+
+    # Assert
+    assert ns.lhs == ['x']
+    assert ns.rhs == ['y']
+    assert not d.matches(['x', 'y'])
+
+def test_dfa_falls_back_for_predicates():
+    # Arrange
+    p = IfItem(lambda x: x > 0).repeat()
+    d = p.compile(engine='dfa')
+
+    # Act/Assert
+    assert not d.isSupported()
+    assert d.matches([1, 2, 3])
+    assert not d.matches([1, -2, 3])
+
+def test_dfa_falls_back_for_suchthat():
+    # Arrange
+    d = MANY.var("x", suchthat=lambda s, lo, hi: hi - lo == 2).compile(engine='dfa')
+
+    # Act/Assert
+    assert not d.isSupported()
+    assert d.matches("abc", end=False).x == "ab"
+
+def test_dfa_bounded_cache_flushes():
+    # Arrange
+    d = (OneOf('a', 'b') & ANY).repeat().compile(engine='dfa', maxTransitions=2)
+
+    # Act/Assert
+    assert d.matches("aabbaxbz")
+    assert not d.matches("aabbaxbzc")
+    assert d.flushes() > 0
+
+def test_dfa_shared_between_threads():
+    # Arrange
+    p = (Item('a') & MANY & Item('b')) | (Item('c').repeat() & Item('d'))
+    d = p.compile(engine='dfa', maxTransitions=8)
+    rng = random.Random(1)
+    seqs = [[rng.choice('abcdxyz') for _ in range(rng.randint(1, 60))] for _ in range(100)]
+    expected = [bool(p.matches(s)) for s in seqs]
+    results: list[list[bool]] = []
+    interval = sys.getswitchinterval()
+
+    barrier = threading.Barrier(8)
+
+    def run():
+        barrier.wait()
+        results.append([bool(d.matches(s)) for _ in range(20) for s in seqs])
+
+    # Act
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=run) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    # Assert
+    assert results == [expected * 20] * 8
+    assert d.flushes() > 0
+
+def test_dfa_unhashable_items():
+    # Arrange
+    d = (Item([1]) & ANY).compile(engine='dfa')
+
+    # Act/Assert
+    assert d.matches([[1], [2]])
+    assert not d.matches([[2], [2]])
+
+def test_dfa_findAllMatches():
+    # Arrange
+    p = ((Item("a") & Item("b")) | Item("c")).var("match")
+    d = p.compile(engine='dfa')
+
+    # Act/Assert
+    assert [ns.match for ns in d.findAllMatches("cab c", start=False, end=False)] == ["c", "ab", "c"]
+    assert [*d.findAllMatches("xyz", start=False, end=False)] == []
+
+def test_compile_unknown_engine():
+    # Act/Assert
+    with pytest.raises(ValueError):
+        ANY.compile(engine='nonesuch')
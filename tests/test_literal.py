@@ -0,0 +1,44 @@
+from regex4seq import ANY, MANY, Item, OneOf, Items, IfItem
+from regex4seq.literal import literalPositions
+
+def test_literalPrefix_of_chain():
+    # Arrange
+    p = Items('a', 'b').var("x") & Item('c') & MANY & Item('d')
+
+    # Act/Assert
+    assert p._literalPrefix() == (('a', 'b', 'c'), False)
+    assert Items(1, 2, 3)._literalPrefix() == ((1, 2, 3), True)
+    assert (Items(1, 2, 3) | Items(1, 2, 4))._literalPrefix() == ((1, 2), False)
+    assert (IfItem(bool) & Item(1))._literalPrefix() == ((), False)
+
+def test_literalPositions_list():
+    # Arrange
+    seq = ['x', 'a', 'b', 'a', 'b', 'a', 'c', 'a', 'b', 'a']
+
+    # Act/Assert
+    assert [*literalPositions(seq, ('a', 'b', 'a'))] == [1, 3, 7]
+    assert [*literalPositions(seq, ('c',))] == [6]
+    assert [*literalPositions(seq, ('q', 'r'))] == []
+
+def test_literalPositions_str_and_bytes():
+    # Act/Assert
+    assert [*literalPositions("abcabc", ('b', 'c'))] == [1, 4]
+    assert [*literalPositions(b"abcabc", tuple(b"ca"))] == [2]
+
+def test_literalPositions_unhashable():
+    # Act/Assert
+    assert [*literalPositions([[1], [2], [1], [2]], ([1], [2]))] == [0, 2]
+    assert [*literalPositions([[1], 2, 3, 2, 3], (2, 3))] == [1, 3]
+
+def test_unanchored_search_uses_literal_prefix():
+    # Arrange
+    seq = ['e%d' % (i % 50) for i in range(20000)] + ['login', 'fail', 'x']
+    p = Items('login', 'fail').var("what") & ANY.var("who")
+
+    # Act
+    ns = p.matches(seq, start=False, end=False)
+
+    # Assert
+    assert ns.what == ['login', 'fail']
+    assert ns.who == ['x']
+    assert not p.matches(seq[:-1], start=False, end=True)
@@ -0,0 +1,82 @@
+import tracemalloc
+
+import pytest
+
+from regex4seq import ANY, MANY, Item, IfItem, Items
+
+def test_memo_same_as_backtracker():
+    # Arrange
+    p = Item(1).optional() & Items(0, 1).repeat() & Item(0).optional()
+
+    # Act/Assert
+    for s in ([], [1], [0, 1], [1, 0, 1, 0], [1, 0, 0], [0, 0]):
+        for start in (True, False):
+            for end in (True, False):
+                expected = p.matches(s, namespace=False, start=start, end=end)
+                assert p.matches(s, namespace=False, start=start, end=end, memo=True) == expected
+
+def test_memo_avoids_catastrophic_backtracking():
+    # Arrange - the backtracker takes exponential time on this pattern.
+    p = (Item('a') | IfItem(lambda x: x == 'a')).repeat() & Item('b')
+
+    # Act/Assert
+    assert not p.matches('a' * 500, namespace=False, memo=True)
+    assert p.matches('a' * 500 + 'b', namespace=False, memo=True)
+
+def test_memo_findAllMatches_counts_every_match():
+    # Arrange - there are 2**3 ways to match 'aaa'.
+    p = (Item('a') | IfItem(lambda x: x == 'a')).repeat()
+
+    # Act
+    found = [*p.findAllMatches('aaa', namespace=False, memo=True)]
+
+    # Assert
+    assert found == [*p.findAllMatches('aaa', namespace=False)]
+    assert len(found) == 8
+
+def test_memo_suchthat():
+    # Arrange
+    p = MANY.var("x", suchthat=lambda s, lo, hi: hi - lo == 2) & MANY
+
+    # Act/Assert
+    assert p.matches("abc", namespace=False, memo=True)
+    assert not p.matches("a", namespace=False, memo=True)
+
+def test_memo_limit():
+    # Arrange
+    p = (ANY & ANY).repeat()
+
+    # Act/Assert
+    assert p.matches('ab' * 100, namespace=False, memo=True, memoLimit=5)
+    assert not p.matches('ab' * 100 + 'c', namespace=False, memo=True, memoLimit=0)
+
+def test_memo_limit_caps_memory():
+    # Arrange - every position can reach every later one, in 2**n ways.
+    p = (Item('a') | IfItem(lambda x: x == 'a')).repeat() & Item('b')
+
+    # Act
+    tracemalloc.start()
+    try:
+        found = p.matches('a' * 2000, namespace=False, memo=True, memoLimit=1000)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Assert
+    assert found is False
+    assert peak < 2_000_000
+
+def test_memo_limit_findAllMatches():
+    # Arrange
+    p = ANY.repeat().var('x') & ANY.repeat()
+
+    # Act
+    found = [*p.findAllMatches('abcdefgh', namespace=False, start=False, end=False, memo=True, memoLimit=20)]
+
+    # Assert
+    assert len(found) == len([*p.findAllMatches('abcdefgh', namespace=False, start=False, end=False)])
+
+def test_memo_requires_no_namespace():
+    # Act/Assert
+    with pytest.raises(ValueError):
+        ANY.matches(['a'], memo=True)
@@ -0,0 +1,101 @@
+from regex4seq import NONE, ANY, MANY, FAIL, Item, IfItem, OneOf, Items
+from regex4seq.regex4seq import Then, Otherwise, Optional, Repeat, Literal
+
+def test_optimize_same_matches():
+    # Arrange
+    p = (Items('a', 'b', 'c').var('x') | Items('a', 'b', 'd').var('x') | Item('e')).repeat() & MANY.var('y')
+    q = p.optimize()
+
+    # Act/Assert
+    for s in ('', 'abc', 'abdabce', 'abx', 'eeab'):
+        for start in (True, False):
+            for end in (True, False):
+                assert q.matches(s, start=start, end=end) == p.matches(s, start=start, end=end)
+                assert [*q.findAllMatches(s, start=start, end=end)] == [*p.findAllMatches(s, start=start, end=end)]
+
+def test_optimize_combines_runs_of_items():
+    # Arrange
+    p = Items('G', 'E', 'T') & NONE & Item(' ')
+
+    # Act
+    q = p.optimize()
+
+    # Assert
+    assert isinstance(q, Literal)
+    assert q.matches('GET ')
+    assert not q.matches('GOT ')
+
+def test_optimize_factors_common_prefixes():
+    # Arrange
+    p = Items('a', 'b', 'c') | Items('x', 'y') | Items('a', 'b', 'd')
+
+    # Act
+    q = p.optimize()
+
+    # Assert
+    assert isinstance(q, Otherwise)
+    assert isinstance(q._lhs, Then)
+    assert q._lhs._lhs._literalPrefix() == (('a', 'b'), True)
+    assert isinstance(q._lhs._rhs, OneOf)
+    assert q.matches('abd')
+
+def test_optimize_keeps_order_of_overlapping_alternatives():
+    # Arrange - the second alternative must still be preferred to the third.
+    p = (Item('a') & MANY).var('x') | (ANY & Item('b')).var('x') | (Item('a') & Item('b')).var('x')
+    q = p.optimize()
+
+    # Act
+    found = [ns.x for ns in q.findAllMatches('ab')]
+
+    # Assert
+    assert found == [ns.x for ns in p.findAllMatches('ab')]
+
+def test_optimize_removes_redundant_nesting():
+    # Arrange
+    p = Repeat(Optional(Repeat(Item('a'))))
+
+    # Act
+    q = p.optimize()
+
+    # Assert
+    assert isinstance(q, Repeat)
+    assert isinstance(q._original, Item)
+    assert Optional(FAIL).optimize() is NONE
+    assert Repeat(ANY).optimize() is MANY
+
+def test_optimize_drops_failing_alternatives():
+    # Arrange
+    p = Otherwise(FAIL, Otherwise(Item('a'), FAIL)) & Then(Item('b'), NONE)
+
+    # Act
+    q = p.optimize()
+
+    # Assert
+    assert q.matches('ab')
+    assert q.countNodes() < p.countNodes()
+
+def test_optimize_report():
+    # Arrange
+    p = Then(Then(Item(1), Item(2)), Item(3)) | Then(Item(1), Item(4))
+
+    # Act
+    q, report = p.optimize(report=True)
+
+    # Assert
+    assert report.before == p.countNodes() == 9
+    assert report.after == q.countNodes()
+    assert report.after < report.before
+
+def test_optimize_shares_predicates():
+    # Arrange
+    calls = []
+    def pf(x):
+        calls.append(x)
+        return True
+    p = (IfItem(pf) & Item('a')) | (IfItem(pf) & Item('b'))
+
+    # Act
+    assert p.optimize().matches('xb')
+
+    # Assert
+    assert calls == ['x']
@@ -0,0 +1,70 @@
+from regex4seq import ANY, MANY, Item, Items, IfItem, OneOf, PatternSet
+
+def test_patternset_reports_where_each_pattern_matched():
+    # Arrange
+    ps = PatternSet([
+        Items('login', 'fail', 'fail'),
+        Item('login') & MANY & Item('logout'),
+        Items('sudo', 'rm'),
+        OneOf('fail', 'error') & ANY,
+    ])
+    seq = ['boot', 'login', 'fail', 'fail', 'ok', 'logout']
+
+    # Act
+    found = ps.matches(seq, start=False, end=False)
+
+    # Assert
+    assert found == {0: (1, 4), 1: (1, 6), 3: (2, 4)}
+
+def test_patternset_same_as_each_pattern():
+    # Arrange
+    patterns = [
+        Items('a', 'b'),
+        Item('a').repeat() & Item('b'),
+        IfItem(lambda x: x != 'a') & Item('a'),
+        ANY.var('x', suchthat=lambda s, lo, hi: s[lo] == 'c'),
+        MANY,
+    ]
+    ps = PatternSet(patterns)
+    for seq in ("", "ab", "aab", "cab", "c", "bab"):
+        for start in (True, False):
+            for end in (True, False):
+
+                # Act
+                found = ps.matches(seq, start=start, end=end)
+
+                # Assert
+                for i, p in enumerate(patterns):
+                    assert (i in found) == bool(p.matches(seq, start=start, end=end))
+
+def test_patternset_leftmost_span():
+    # Arrange
+    ps = PatternSet([Item('x') & (Item('y') | Items('y', 'y'))])
+
+    # Act
+    found = ps.matches("axyyxy", start=False, end=False)
+
+    # Assert
+    assert found == {0: (1, 3)}
+
+def test_patternset_overlapping_literals():
+    # Arrange
+    ps = PatternSet([Items(1, 2, 3), Items(2, 3), Items(3, 4), Items(9)])
+
+    # Act
+    found = ps.matches([0, 1, 2, 3, 4], start=False, end=False)
+
+    # Assert
+    assert found == {0: (1, 4), 1: (2, 4), 2: (3, 5)}
+
+def test_patternset_many_rules_one_pass():
+    # Arrange
+    ps = PatternSet([Item(i) & MANY & Item(i + 1) for i in range(500)])
+    seq = list(range(0, 1000, 2)) + [7]
+
+    # Act
+    found = ps.matches(seq, start=False, end=False)
+
+    # Assert
+    assert found == {6: (3, 501)}
+    assert len(ps) == 500
@@ -0,0 +1,102 @@
+import pytest
+
+from regex4seq import NONE, ANY, MANY, FAIL, Item, IfItem, IfNext, OneOf, Items, CompileError
+
+def test_compile_matches_like_original():
+    # Arrange
+    p = Item(1).optional() & Items(0, 1).repeat() & Item(0).optional()
+    c = p.compile()
+
+    # Act/Assert
+    for s in ([], [1], [0, 1], [1, 0, 1, 0], [1, 0, 0], [0, 0]):
+        for start in (True, False):
+            for end in (True, False):
+                assert c.matches(s, start=start, end=end) == p.matches(s, start=start, end=end)
+
+def test_compile_captures():
+    # Arrange
+    p = MANY.var("lhs") & Item('a') & MANY.var("rhs")
+    c = p.compile()
+
+    # Act
+    ns = c.matches(['x', 'a', 'y', 'a', 'z'])
+
+    # Assert
+    assert ns.lhs == ['x', 'a', 'y']
+    assert ns.rhs == ['z']
+
+def test_compile_unanchored_is_leftmost():
+    # Arrange
+    p = (Item('a') & Item('b')).var("m") | Item('c').var("m")
+    c = p.compile()
+
+    # Act
+    ns = c.matches("xxcab", start=False, end=False)
+
+    # Assert
+    assert ns.m == 'c'
+
+def test_compile_history():
+    # Arrange
+    c = ANY.var("it").repeat().compile()
+
+    # Act
+    ns = c.matches(['abc', 'def'], history=dict(it='all'))
+
+    # Assert
+    assert [*ns.all] == [['abc'], ['def']]
+
+def test_compile_IfNext():
+    # Arrange
+    c = IfNext(lambda x, y: x < y).repeat().thenAny().var("ascending").compile()
+
+    # Act
+    ns = c.matches([1, 3, 4, 8, 10, 9, 7], end=False)
+
+    # Assert
+    assert ns.ascending == [1, 3, 4, 8, 10]
+
+def test_compile_pathological_pattern_is_linear():
+    # Arrange - the backtracker takes exponential time on this pattern.
+    p = (Item('a') | IfItem(lambda x: x == 'a')).repeat() & Item('b')
+    c = p.compile()
+
+    # Act/Assert
+    assert not c.matches('a' * 2000)
+    assert c.matches('a' * 2000 + 'b')
+
+def test_compile_findAllMatches_one_per_span():
+    # Arrange
+    p = (MANY & MANY).var("m")
+    c = p.compile()
+
+    # Act
+    found = [ns.m for ns in c.findAllMatches("ab", end=False)]
+
+    # Assert
+    assert found == ["ab", "a", ""]
+
+def test_compile_findAllMatches_unanchored():
+    # Arrange
+    p = ((Item("a") & Item("b")) | Item("c")).var("match")
+
+    # Act
+    found = [ns.match for ns in p.compile().findAllMatches("cab c", start=False, end=False)]
+
+    # Assert
+    assert found == [ns.match for ns in p.findAllMatches("cab c", start=False, end=False)]
+
+def test_compile_empty_and_fail():
+    # Act/Assert
+    assert NONE.compile().matches([])
+    assert not NONE.compile().matches(['a'])
+    assert not FAIL.compile().matches([])
+    assert OneOf('a', 'b').repeat().compile().matches("abba")
+
+def test_compile_rejects_suchthat():
+    # Arrange
+    p = MANY.var("x", suchthat=lambda s, lo, hi: hi - lo == 2)
+
+    # Act/Assert
+    with pytest.raises(CompileError):
+        p.compile()
@@ -0,0 +1,108 @@
+from collections import Counter
+
+from regex4seq import ANY, MANY, Item, IfItem, IfNext, PredicateCache, cacheInfo
+
+def counting(pf, counts):
+    def f(*args):
+        counts[args] += 1
+        return pf(*args)
+    return f
+
+def test_cache_calls_predicate_once_per_position():
+    # Arrange
+    counts: Counter = Counter()
+    big = IfItem(counting(lambda x: x > 2, counts))
+    p = (big | big & ANY).repeat() & Item(0)
+    seq = [3, 4, 5, 6, 1]
+
+    # Act
+    found = p.matches(seq, start=False, end=False, cachePredicates=True)
+
+    # Assert
+    assert not found
+    assert max(counts.values()) == 1
+
+def test_cache_hits_and_misses():
+    # Arrange
+    cache = PredicateCache()
+    p = MANY & IfItem(lambda x: x == 'b') & MANY
+    seq = "aaab"
+
+    # Act
+    found = [*p.findAllMatches(seq, cachePredicates=cache)]
+
+    # Assert
+    assert len(found) == 1
+    assert cache.misses() == 4
+    assert cache.hits() == 0
+
+def test_cache_ifnext():
+    # Arrange
+    counts: Counter = Counter()
+    up = IfNext(counting(lambda x, y: x < y, counts))
+    p = (up.repeat() | up.repeat() & ANY).var('run') & Item(9)
+    cache = PredicateCache()
+
+    # Act
+    ns = p.matches([1, 2, 3, 9], cachePredicates=cache)
+
+    # Assert
+    assert ns.run == [1, 2, 3]
+    assert max(counts.values()) == 1
+    assert len(cache) == cache.misses()
+
+def test_cache_is_cleared_for_each_call():
+    # Arrange
+    cache = PredicateCache()
+    p = IfItem(lambda x: x > 0)
+
+    # Act
+    first = p.matches([1], cachePredicates=cache)
+    second = p.matches([-1], cachePredicates=cache)
+
+    # Assert
+    assert first and not second
+    assert cache.misses() == 1
+    assert len(cache) == 1
+
+def test_cache_long_input():
+    # Arrange
+    cache = PredicateCache()
+    p = IfItem(lambda x: x == 1).repeat() & IfNext(lambda x, y: x < y) & Item(2)
+    seq = [1] * 20000 + [2]
+
+    # Act
+    found = p.matches(seq, cachePredicates=cache)
+
+    # Assert
+    assert found
+    assert cache.misses() == len(cache)
+
+def test_cache_pattern_is_made_once():
+    # Arrange
+    p = IfItem(lambda x: x >= 0).repeat().var('run') & IfItem(lambda x: x < 0)
+    p.matches([1, -1], cachePredicates=True)
+    before = cacheInfo().misses
+
+    # Act
+    ns = p.matches([1, 2, -1], cachePredicates=True)
+
+    # Assert
+    assert ns.run == [1, 2]
+    assert cacheInfo().misses == before
+
+def test_cache_interleaved_calls():
+    # Arrange
+    first = PredicateCache()
+    second = PredicateCache()
+    p = MANY & IfItem(lambda x: x == 'b') & MANY
+
+    # Act
+    a = p.findAllMatches("abab", end=False, cachePredicates=first)
+    b = p.findAllMatches("bbbbbb", end=False, cachePredicates=second)
+    found = [next(a), next(b), *a, *b]
+
+    # Assert
+    assert len(found) == len([*p.findAllMatches("abab", end=False)]) + len([*p.findAllMatches("bbbbbb", end=False)])
+    assert first.misses() == 4
+    assert second.misses() == 6
@@ -0,0 +1,89 @@
+from regex4seq import ANY, Item, IfItem, OneOf, ProfileStats
+
+def test_profile_counts():
+    # Arrange
+    stats = ProfileStats()
+    p = Item('a').repeat() & Item('b')
+
+    # Act
+    assert p.matches('aab', profile=stats)
+
+    # Assert
+    root = stats.root(p)
+    repeat, b = root.children
+    assert (root.entries, root.results, root.backtracks) == (1, 1, 0)
+    # The repeat first offers 'aa', which is followed by 'b'.
+    assert (repeat.entries, repeat.results, repeat.backtracks) == (1, 1, 0)
+    assert repeat.children[0].entries == 3
+    assert (b.entries, b.results) == (1, 1)
+
+def test_profile_backtracks():
+    # Arrange
+    stats = ProfileStats()
+    p = ANY.repeat().var('x') & Item('a')
+
+    # Act
+    ns = p.matches('aba', end=False, profile=stats)
+
+    # Assert
+    assert ns.x == 'ab'
+    group = stats.root(p).children[0]
+    assert group.results == 2
+    assert group.backtracks == 1
+
+def test_profile_predicates_and_suchthat():
+    # Arrange
+    stats = ProfileStats()
+    even = lambda s, lo, hi: (hi - lo) % 2 == 0
+    p = IfItem(lambda x: x > 0).repeat().var('x', suchthat=even)
+
+    # Act
+    assert [ns.x for ns in p.findAllMatches([1, 2, 3], end=False, profile=stats)] == [[1, 2], []]
+
+    # Assert
+    group = stats.root(p)
+    assert group.suchthatCalls == 4
+    assert group.children[0].children[0].predicateCalls == 3
+
+def test_profile_accumulates_and_renders():
+    # Arrange
+    stats = ProfileStats()
+    p = OneOf('a', 'b').var('x') & Item('c')
+
+    # Act
+    p.matches('ac', profile=stats)
+    p.matches('bc', profile=stats)
+    text = stats.render()
+
+    # Assert
+    assert stats.root(p).entries == 2
+    assert "MatchGroup('x')" in text
+    assert "    OneOf(" in text
+    assert len(text.splitlines()) == 5
+    stats.clear()
+    assert stats.root(p) is None
+
+def test_profile_gives_same_results():
+    # Arrange
+    p = (Item('a') | IfItem(lambda x: x == 'a')).repeat().var('x') & Item('b')
+
+    # Act/Assert
+    for s in ('aab', 'ab', 'b', 'aa'):
+        assert p.matches(s, profile=ProfileStats()) == p.matches(s)
+        assert [*p.findAllMatches(s, start=False, end=False, profile=ProfileStats())] == [*p.findAllMatches(s, start=False, end=False)]
+        assert p.matches(s, namespace=False, memo=True, profile=ProfileStats()) == p.matches(s, namespace=False)
+
+def test_profile_long_input():
+    # Arrange
+    stats = ProfileStats()
+    p = Item('a').repeat().var('x') & Item('b')
+    seq = 'a' * 20000 + 'b'
+
+    # Act
+    ns = p.matches(seq, profile=stats)
+
+    # Assert
+    assert len(ns.x) == 20000
+    group = stats.root(p).children[0]
+    assert (group.entries, group.results, group.backtracks) == (1, 1, 0)
+    assert group.children[0].children[0].entries == 20001
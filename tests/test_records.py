@@ -0,0 +1,127 @@
+import array
+import mmap
+import struct
+
+import pytest
+
+from regex4seq import ANY, Item, Items, OneOf, RecordArray
+
+def records(*rows):
+    return b''.join(struct.pack('<HI', code, value) for code, value in rows)
+
+def test_record_array_items():
+    # Arrange
+    buffer = b'HEAD' + records((1, 10), (2, 20), (3, 30))
+
+    # Act
+    codes = RecordArray(buffer, '<HI', field=0, offset=4)
+    rows = RecordArray(buffer, '<HI', offset=4)
+
+    # Assert
+    assert len(codes) == 3
+    assert list(codes) == [1, 2, 3]
+    assert codes[-1] == 3
+    assert rows[1] == (2, 20)
+    assert rows.select(1) == [10, 20, 30]
+    with pytest.raises(IndexError):
+        codes[3]
+
+def test_record_array_slices_share_the_buffer():
+    # Arrange
+    buffer = bytearray(array.array('H', [5, 6, 7, 8]).tobytes())
+    codes = RecordArray(buffer, 'H')
+
+    # Act
+    middle = codes[1:3]
+    buffer[2] = 9
+
+    # Assert
+    assert isinstance(middle, RecordArray)
+    assert middle == [9, 7]
+
+def test_match_record_codes_with_zero_copy_captures():
+    # Arrange
+    codes = RecordArray(records((1, 0), (4, 0), (4, 0), (2, 0), (4, 0)), '<HI', field=0)
+    p = Item(1) & Item(4).repeat().var('run') & OneOf(2, 3)
+
+    # Act
+    ns = p.matches(codes, end=False)
+
+    # Assert
+    assert isinstance(ns.run, RecordArray)
+    assert ns.run == [4, 4]
+    assert [(lo, hi) for lo, hi, _ in p.scan(codes)] == [(0, 4)]
+
+def test_literal_search_in_records():
+    # Arrange
+    codes = RecordArray(array.array('H', [0x0200, 0x0401, 0x0003, 0x0102, 0x0304]).tobytes(), 'H')
+    p = Items(0x0102, 0x0304).var('x')
+
+    # Act
+    found = list(p.findAllMatches(codes, start=False, end=False))
+
+    # Assert
+    # The bytes of the literal also occur straddling the first records,
+    # which is not a match.
+    assert len(found) == 1 and found[0].x == [0x0102, 0x0304]
+    assert list(codes._literalPositions((0x0102, 0x0304))) == [3]
+    assert list(codes[1:]._literalPositions((0x0102, 0x0304))) == [2]
+
+def test_match_buffers():
+    # Arrange
+    data = b'xxGETyyGETz'
+    p = Items(*b'GET').var('verb') & ANY.var('next')
+
+    # Act
+    inputs = [bytearray(data), memoryview(data), array.array('B', data)]
+
+    # Assert
+    for inputSeq in inputs:
+        found = [bytes(ns.verb) for ns in p.findAllMatches(inputSeq, start=False)]
+        assert found == [b'GET'], type(inputSeq)
+    assert isinstance(p.matches(memoryview(data), start=False, end=False).verb, memoryview)
+
+def test_match_mmap(tmp_path):
+    # Arrange
+    path = tmp_path / 'events.bin'
+    path.write_bytes(records(*((i % 5, i) for i in range(1000))))
+    p = Items(3, 4).var('pair')
+
+    # Act
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        raw = p.compile(engine='dfa').matches(mm, start=False, end=False, namespace=False)
+    with RecordArray.open(path, '<HI', field=0) as codes:
+        spans = [(lo, hi) for lo, hi, _ in p.scan(codes, namespace=False)]
+
+    # Assert
+    assert raw is False
+    assert spans == [(i, i + 2) for i in range(3, 1000, 5)]
+
+def test_record_array_open_empty_file(tmp_path):
+    # Arrange
+    path = tmp_path / 'empty.bin'
+    path.write_bytes(b'')
+
+    # Act
+    with RecordArray.open(path, 'B') as codes:
+
+        # Assert
+        assert len(codes) == 0
+        assert not Item(1).matches(codes, start=False, end=False)
+
+def test_record_array_close_with_live_captures(tmp_path):
+    # Arrange
+    path = tmp_path / 'codes.bin'
+    path.write_bytes(struct.pack('<4i', 5, 1, 2, 3))
+    p = Items(1, 2).var('x')
+
+    # Act
+    with RecordArray.open(path, '<i') as codes:
+        ns = p.matches(codes, start=False, end=False)
+    codes.close()
+
+    # Assert
+    assert codes._file is None
+    assert list(ns.x) == [1, 2]
+    with pytest.raises(ValueError):
+        codes[0]
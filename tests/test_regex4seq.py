@@ -1,3 +1,5 @@
+import pytest
+
 from regex4seq import NONE, ANY, Item, IfItem, MatchGroup, OneOf, Items, FAIL, MANY, IfNext, IfItems
 
 def test_matches_option_namespace():
@@ -425,3 +427,51 @@ def test_optimise_repeat_repeat():
     assert p.matches( ['x', 'x', 'x'] )
     assert not p.matches( ['xx', 'x'] )    
     assert not p.matches( ['x', 'xx'] )
+
+def test_unanchored_matches_is_leftmost():
+    # Arrange
+    p = (Item('a') & MANY.var("rest") & Item('b')) | Item('c').var("rest")
+
+    # Act
+    ns = p.matches("xxcaxbyb", start=False, end=False)
+
+    # Assert
+    assert ns.rest == 'c'
+
+def test_unanchored_matches_long_input():
+    # Arrange - restarting the backtracker at every position would recurse
+    # too deeply on this pattern.
+    p = (ANY & ANY & ANY).repeat() & Item('zz')
+    seq = ['e%d' % (i % 50) for i in range(3000)]
+
+    # Act/Assert
+    assert not p.matches(seq, start=False, end=False)
+    assert p.matches(seq[:300] + ['zz'], start=False, end=False)
+
+def test_unanchored_matches_suchthat():
+    # Arrange - the suchthat guard rejects the first place that matches.
+    p = Items('a', 'b').var("ab", suchthat=lambda s, lo, hi: lo > 0)
+
+    # Act
+    ns = p.matches("abab", start=False, end=False)
+
+    # Assert
+    assert ns.ab == "ab"
+    assert [*p.findAllMatches("abxab", start=False, end=False)] != []
+    assert not p.matches("ab", start=False, end=False)
+
+def test_ifitem_needs_a_predicate():
+    # Act/Assert
+    with pytest.raises(ValueError):
+        IfItem()
+
+def test_extract_only_applies_to_its_own_group():
+    # Arrange
+    p = ANY.var('x') & ANY.var('y', extract=lambda s, lo, hi: s[lo].upper())
+
+    # Act
+    ns = p.matches("ab")
+
+    # Assert
+    assert ns.x == 'a'
+    assert ns.y == 'B'
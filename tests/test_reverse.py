@@ -0,0 +1,92 @@
+import pytest
+
+from regex4seq import ANY, MANY, Item, Items, IfItem, IfNext, OneOf, StreamMatcher
+
+def test_reverse_matches_the_reversed_sequence():
+    # Arrange
+    p = Item('a') & (OneOf('b', 'c') | ANY & Item('d')).repeat(1, 3) & Item('e').optional()
+    inputs = ['a', 'ab', 'abe', 'aed', 'abcxde', 'abcbe', 'ba', 'abcbc']
+
+    # Act
+    r = p.reverse()
+
+    # Assert
+    for s in inputs:
+        assert bool(r.matches(s[::-1])) == bool(p.matches(s)), s
+        assert bool(r.reverse().matches(s)) == bool(p.matches(s)), s
+
+def test_reverse_captures():
+    # Arrange
+    p = Items('a', 'b').var('x') & ANY.repeat().var('rest')
+
+    # Act
+    ns = p.reverse().matches('dcba')
+
+    # Assert
+    assert ns.x == 'ba'
+    assert ns.rest == 'dc'
+
+def test_reverse_ifnext():
+    # Arrange
+    p = IfNext(lambda x, y: x < y).var('x') & ANY
+
+    # Act
+    r = p.reverse()
+
+    # Assert
+    assert r.matches([2, 1]).x == [1]
+    assert not r.matches([1, 2])
+    assert r.reverse().matches([1, 2]).x == [1]
+
+def test_reverse_rejects_guards_and_extracts():
+    # Arrange
+    guarded = ANY.repeat().var('x', suchthat=lambda s, lo, hi: hi - lo > 1)
+    extracted = ANY.var('x', extract=lambda s, lo, hi: s[lo])
+
+    # Act and Assert
+    with pytest.raises(ValueError):
+        guarded.reverse()
+    with pytest.raises(ValueError):
+        extracted.reverse()
+
+def test_end_anchored_search_reads_only_the_suffix():
+    # Arrange
+    calls = []
+    def isEven(x):
+        calls.append(x)
+        return x % 2 == 0
+    p = IfItem(isEven).repeat(1) & Item(-1)
+    inputSeq = list(range(1, 10001)) + [2, 4, -1]
+
+    # Act
+    found = p.matches(inputSeq, start=False, namespace=False)
+
+    # Assert
+    assert found is True
+    assert len(calls) < 10
+
+def test_end_anchored_captures_are_unchanged():
+    # Arrange
+    p = (ANY.var('x') | Items('b', 'c').var('y')).repeat(1, 3) & Item('d').var('z')
+    inputs = ['abcd', 'bcd', 'cd', 'd', 'xbcbcd', 'abdc']
+
+    # Act and Assert
+    for s in inputs:
+        expected = False
+        for i in range(len(s) + 1):
+            expected = p.matches(s[i:])
+            if expected:
+                break
+        assert p.matches(s, start=False) == expected, s
+
+def test_stream_reversed_ifnext():
+    # Arrange
+    p = (ANY & IfNext(lambda x, y: x < y).var('x')).reverse()
+    stream = StreamMatcher(p, start=False, end=False)
+
+    # Act
+    found = list(stream.feedAll([3, 1, 2, 0, 5])) + stream.close()
+
+    # Assert
+    assert [ns.x for ns in found] == [[1], [0]]
+    assert found == list(p.compile().findAllMatches([3, 1, 2, 0, 5], start=False, end=False))
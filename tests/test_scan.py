@@ -0,0 +1,74 @@
+from regex4seq import ANY, MANY, NONE, Item, IfItem
+
+def test_scan_is_non_overlapping():
+    # Arrange
+    p = (Item('a') & ANY).var('m')
+
+    # Act
+    found = [(lo, hi, ns.m) for lo, hi, ns in p.scan('aaaxa')]
+
+    # Assert
+    assert found == [(0, 2, 'aa'), (2, 4, 'ax')]
+
+def test_scan_ambiguous_pattern_once():
+    # Arrange
+    p = MANY & MANY
+
+    # Act
+    found = list(p.scan('abc', namespace=False))
+
+    # Assert
+    assert found == [(0, 3, True), (3, 3, True)]
+
+def test_scan_empty_matches_like_finditer():
+    # Arrange
+    p = Item('x').repeat()
+
+    # Act
+    found = [(lo, hi) for lo, hi, _ in p.scan('axb')]
+
+    # Assert
+    assert found == [(0, 0), (1, 2), (2, 2), (3, 3)]
+
+def test_scan_longest():
+    # Arrange
+    p = (Item('a') | (Item('a') & Item('b'))).var('m')
+
+    # Act
+    first = [ns.m for _, _, ns in p.scan('abxab')]
+    longest = [ns.m for _, _, ns in p.scan('abxab', longest=True)]
+
+    # Assert
+    assert first == ['a', 'a']
+    assert longest == ['ab', 'ab']
+
+def test_scan_guarded_pattern_uses_backtracker():
+    # Arrange
+    even = lambda s, lo, hi: (hi - lo) % 2 == 0
+    p = IfItem(str.isdigit).repeat().var('n', suchthat=even) & Item(';')
+
+    # Act
+    found = [(lo, hi, ns.n) for lo, hi, ns in p.scan('123;45;6;')]
+
+    # Assert
+    assert found == [(1, 4, '23'), (4, 7, '45'), (8, 9, '')]
+
+def test_scan_compiled_same_as_original():
+    # Arrange
+    p = (Item('a') & MANY.var('x') & Item('b')) | NONE
+    c = p.compile()
+    s = 'xabab ab'
+
+    # Act/Assert
+    for longest in (False, True):
+        assert list(c.scan(s, longest=longest)) == list(p.scan(s, longest=longest))
+
+def test_scan_long_input():
+    # Arrange
+    p = Item('a') & Item('b')
+
+    # Act
+    found = sum(1 for _ in p.scan('ab' * 100000))
+
+    # Assert
+    assert found == 100000
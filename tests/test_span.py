@@ -0,0 +1,68 @@
+from regex4seq import ANY, MANY, Item, Items, Span, SequenceView
+
+def test_span_positions_and_lazy_value():
+    # Arrange
+    p = MANY.var('lhs') & Item(0) & MANY.var('rhs')
+    seq = [1, 2, 0, 3]
+
+    # Act
+    ns = p.matches(seq, spans=True)
+
+    # Assert
+    assert ns.lhs == (0, 2)
+    assert (ns.rhs.start, ns.rhs.end) == (3, 4)
+    assert isinstance(ns.lhs.value, SequenceView)
+    assert ns.lhs.value == [1, 2]
+    assert list(ns.rhs.value) == [3]
+
+def test_span_memoryview_for_buffers():
+    # Arrange
+    p = Item(ord('=')).var('eq') & MANY.var('value')
+    data = b'key=value'
+
+    # Act
+    ns = p.matches(data, start=False, spans=True)
+
+    # Assert
+    assert isinstance(ns.value.value, memoryview)
+    assert bytes(ns.value.value) == b'value'
+    assert ns.eq == (3, 4)
+
+def test_span_extract_only_called_when_read():
+    # Arrange
+    calls = []
+    def extract(s, lo, hi):
+        calls.append((lo, hi))
+        return sum(s[lo:hi])
+    p = MANY.var('total', extract=extract)
+
+    # Act
+    found = list(p.findAllMatches([1, 2, 3], end=False, spans=True))
+
+    # Assert
+    assert len(found) == 4
+    assert calls == []
+    assert found[0].total.value == 6
+    assert calls == [(0, 3)]
+
+def test_span_with_history():
+    # Arrange
+    p = (ANY.var('x') & Item(',')).repeat()
+
+    # Act
+    ns = p.matches("a,b,", history={'x': 'xs'}, spans=True)
+
+    # Assert
+    assert list(ns.xs) == [Span("a,b,", 0, 1), Span("a,b,", 2, 3)]
+    assert [v.value for v in ns.xs] == ['a', 'b']
+
+def test_span_compiled():
+    # Arrange
+    p = Items('a', 'b').var('ab')
+
+    # Act
+    ns = p.compile().matches("xxab", start=False, spans=True)
+
+    # Assert
+    assert ns.ab == (2, 4)
+    assert ns.ab.value == "ab"
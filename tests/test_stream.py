@@ -0,0 +1,127 @@
+import mmap
+
+import pytest
+
+from regex4seq import ANY, MANY, Item, Items, IfNext, CompileError, StreamMatcher
+
+def test_stream_matches_as_decided():
+    # Arrange
+    p = Item('login') & Item('fail').repeat().var('fails') & Item('locked')
+    stream = StreamMatcher(p)
+
+    # Act
+    found = [stream.feed(x) for x in ['login', 'fail', 'fail', 'locked', 'ok']]
+
+    # Assert
+    assert [len(r) for r in found] == [0, 0, 0, 0, 1]
+    assert found[4][0].fails == ['fail', 'fail']
+    assert stream.close() == []
+
+def test_stream_same_as_compiled_findAllMatches():
+    # Arrange
+    p = (Item('a') & MANY.var('x') & Item('b')) | ANY.var('x')
+    seq = list("abcabxb")
+    for start in (True, False):
+        for end in (True, False):
+            stream = StreamMatcher(p, start=start, end=end)
+
+            # Act
+            found = list(stream.feedAll(seq)) + stream.close()
+
+            # Assert
+            assert found == list(p.compile().findAllMatches(seq, start=start, end=end))
+
+def test_stream_ifnext_waits_for_next_item():
+    # Arrange
+    p = IfNext(lambda x, y: x < y).var('x')
+    stream = StreamMatcher(p)
+
+    # Act/Assert
+    assert stream.feed(1) == []
+    assert [ns.x for ns in stream.feed(2)] == [[1]]
+    assert stream.feed(1) == []
+    assert stream.close() == []
+
+def test_stream_window_is_bounded():
+    # Arrange
+    p = Item('a') & ANY.var('x')
+    stream = StreamMatcher(p)
+
+    # Act
+    count = sum(len(stream.feed(i % 7)) for i in range(10000))
+
+    # Assert
+    assert count == 0
+    assert stream.position() == 10000
+    assert stream.windowSize() <= 200
+
+def test_stream_closed():
+    # Arrange
+    stream = StreamMatcher(Item(1), namespace=False)
+    stream.feed(1)
+
+    # Act
+    found = stream.close()
+
+    # Assert
+    assert found == [True]
+    with pytest.raises(ValueError):
+        stream.feed(1)
+
+def test_stream_guard_not_compiled():
+    # Arrange
+    p = ANY.var('x', suchthat=lambda s, lo, hi: True)
+
+    # Act/Assert
+    with pytest.raises(CompileError):
+        StreamMatcher(p)
+
+def test_stream_threads_are_bounded():
+    # Arrange - every 'e1' starts a match that stays live forever.
+    p = Item('e1') & MANY & Item('zz')
+    stream = StreamMatcher(p, namespace=False, maxStarts=10)
+
+    # Act
+    counts = []
+    for i in range(5000):
+        stream.feed('e1' if i % 25 == 0 else 'x')
+        counts.append(stream.threads())
+
+    # Assert
+    assert max(counts) == max(counts[-1000:])
+    assert max(counts) <= 10 * len(p.compile()._program.code)
+    assert stream.steps() < 5000 * 50
+
+def test_stream_unlimited_starts_same_as_findAllMatches():
+    # Arrange
+    p = Item('a') & MANY.var('x') & Item('b')
+    seq = list('ab' * 100)
+
+    # Act
+    stream = StreamMatcher(p, maxStarts=None)
+    found = list(stream.feedAll(seq)) + stream.close()
+    capped = StreamMatcher(p, maxStarts=5)
+    some = list(capped.feedAll(seq)) + capped.close()
+
+    # Assert
+    assert found == list(p.compile().findAllMatches(seq, start=False, end=False))
+    assert len(found) == 100 * 101 // 2
+    assert 0 < len(some) < len(found)
+    with pytest.raises(ValueError):
+        StreamMatcher(p, maxStarts=0)
+
+def test_stream_feedAll_mmap(tmp_path):
+    # Arrange
+    path = tmp_path / 'codes.bin'
+    path.write_bytes(bytes([5, 1, 2, 3]))
+    p = Items(1, 2).var('x')
+
+    # Act
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        stream = StreamMatcher(p)
+        found = [ns.x for ns in (*stream.feedAll(mm), *stream.close())]
+        expected = p.matches(mm, start=False, end=False)
+
+    # Assert
+    assert found == [[1, 2]]
+    assert expected
@@ -0,0 +1,109 @@
+import pytest
+
+from regex4seq import ANY, MANY, Item, IfItem, IfNext, OneOf, ProfileStats, cacheInfo
+
+np = pytest.importorskip("numpy")
+
+def test_vec_matches_like_scalar():
+    # Arrange
+    p = IfItem(vec=lambda a: a > 0).repeat().var('up') & IfItem(vec=lambda a: a <= 0)
+    seq = [3, 1, 2, -1, 5]
+
+    # Act
+    ns = p.matches(np.array(seq), end=False)
+
+    # Assert
+    assert list(ns.up) == [3, 1, 2]
+    assert bool(p.matches(seq, end=False))
+
+def test_vec_called_once_per_match():
+    # Arrange
+    calls = []
+    def positive(a):
+        calls.append(len(a))
+        return a > 0
+    p = (IfItem(vec=positive) | Item(0)).repeat() & Item(-1)
+
+    # Act
+    found = p.matches(np.array([1, 0, 2, 0, 3, -1]), namespace=False)
+
+    # Assert
+    assert found
+    assert calls == [6]
+
+def test_vec_called_once_per_profiled_match():
+    # Arrange
+    calls = []
+    def positive(a):
+        calls.append(len(a))
+        return a > 0
+    p = IfItem(vec=positive).repeat().var('x') & Item(-1)
+    arr = np.array([1, 2, 3, -1])
+    expected = p.matches(arr)
+    calls.clear()
+    stats = ProfileStats()
+
+    # Act
+    ns = p.matches(arr, profile=stats)
+
+    # Assert
+    assert list(ns.x) == list(expected.x) == [1, 2, 3]
+    assert calls == [4]
+    assert stats.root(p).children[0].children[0].children[0].predicateCalls == 1
+
+def test_vec_mixed_with_items_and_scalar_predicates():
+    # Arrange
+    p = Item(7) & IfItem(lambda x: x % 2 == 0) & OneOf(1, 2) & IfItem(vec=lambda a: a < 0).var('neg')
+    arr = np.array([5, 7, 4, 2, -3, 9])
+
+    # Act
+    ns = p.matches(arr, start=False, end=False)
+
+    # Assert
+    assert list(ns.neg) == [-3]
+
+def test_vec_findAllMatches_same_as_scalar():
+    # Arrange
+    p = MANY.var('a') & IfItem(vec=lambda a: a == 0) & MANY.var('b')
+    seq = [1, 0, 2, 0]
+
+    # Act
+    found = [(list(ns.a), list(ns.b)) for ns in p.findAllMatches(np.array(seq))]
+
+    # Assert
+    assert found == [(ns.a, ns.b) for ns in p.findAllMatches(seq)]
+
+def test_vec_only_predicate_on_list():
+    # Arrange
+    p = IfItem(vec=lambda a: a > 0).repeat()
+
+    # Act/Assert
+    assert p.matches([1, 2, 3])
+    assert not p.matches([1, -2])
+
+def test_vec_with_ifnext_falls_back():
+    # Arrange
+    p = IfItem(vec=lambda a: a > 0) & IfNext(lambda x, y: x < y) & ANY
+
+    # Act/Assert
+    assert p.matches(np.array([1, 2, 3]))
+    assert not p.matches(np.array([1, 3, 2]))
+
+def test_vec_captures_in_long_array():
+    # Arrange
+    high = IfItem(vec=lambda a: a > 5)
+    p = (high & high.repeat()).var('hi') & IfItem(vec=lambda a: a < 0).optional().var('neg')
+    seq = [0, 1] * 5000 + [7, 8, -1, 9, 0]
+    arr = np.array(seq)
+
+    # Act/Assert
+    for start in (True, False):
+        for end in (True, False):
+            found = p.matches(arr, start=start, end=end)
+            expected = p.matches(seq, start=start, end=end)
+            assert bool(found) == bool(expected)
+            if found:
+                assert (list(found.hi), list(found.neg)) == (expected.hi, expected.neg)
+    before = cacheInfo().hits
+    assert list(p.matches(arr, start=False, end=False).hi) == [7, 8]
+    assert cacheInfo().hits > before